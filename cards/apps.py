@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CardsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cards'
+
+    def ready(self):
+        from django.conf import settings
+        from . import signals  # noqa: F401
+
+        if settings.CATALOG_ARTIFACT:
+            from django.db.backends.signals import connection_created
+            from .catalog_artifact import restore_on_connect
+            connection_created.connect(restore_on_connect)
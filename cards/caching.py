@@ -0,0 +1,84 @@
+"""Cached public payloads and their invalidation.
+
+Shared-profile links get traffic bursts when posted to forums, so
+`shared_profile_data_view` caches its whole payload per share_uuid and
+profile `share_version`. The receivers in cards/signals.py bump that
+version whenever anything the payload is built from is saved or deleted;
+bulk writes that bypass model signals must call `invalidate_shared_profile`
+themselves. The version lives on the profile row, which the view reads on
+every request anyway, so an edit takes effect in every server process at
+once even though each has its own local-memory cache. The timeout is a
+backstop for catalog changes (card imports), which aren't tracked per
+profile.
+"""
+import time
+
+from django.db import DatabaseError
+from django.db.models import F
+
+SHARED_PROFILE_CACHE_TIMEOUT = 60 * 10
+
+
+def shared_profile_cache_key(profile):
+    return f'shared-profile:{profile.share_uuid}:{profile.share_version}'
+
+
+def invalidate_shared_profile(profile_id=None, user_id=None):
+    """Retire the cached shared payload for a profile, looked up by id or by
+    its owning user, by bumping its share_version. A no-op for profiles
+    that were never shared."""
+    from .models import UserSpendingProfile
+
+    profiles = UserSpendingProfile.objects.filter(share_uuid__isnull=False)
+    if profile_id is not None:
+        profiles = profiles.filter(pk=profile_id)
+    elif user_id is not None:
+        profiles = profiles.filter(user_id=user_id)
+    else:
+        return
+    profiles.update(share_version=F('share_version') + 1)
+
+
+# Catalog version, held in process memory. Importers bump the row and clear
+# their own process's copy; other processes pick the bump up within the TTL.
+CATALOG_VERSION_TTL = 60
+
+_catalog_version = None
+_catalog_version_fetched_at = 0.0
+
+
+def catalog_version():
+    """The current CatalogVersion row, at most CATALOG_VERSION_TTL seconds
+    stale. An unsaved version-0 row when none exists (or the DB is down),
+    so callers never have to handle None."""
+    global _catalog_version, _catalog_version_fetched_at
+    from creditcard_guru.metrics import cache_requests
+    from .models import CatalogVersion
+
+    now = time.monotonic()
+    if _catalog_version is None or now - _catalog_version_fetched_at > CATALOG_VERSION_TTL:
+        try:
+            _catalog_version = CatalogVersion.objects.filter(pk=1).first() or CatalogVersion(version=0)
+        except DatabaseError:
+            _catalog_version = CatalogVersion(version=0)
+        _catalog_version_fetched_at = now
+        # Counted after the refresh: the sample's catalog_version label
+        # reads the row just fetched.
+        cache_requests.inc(cache='catalog_version', result='miss')
+    else:
+        cache_requests.inc(cache='catalog_version', result='hit')
+    return _catalog_version
+
+
+def fresh_catalog_version():
+    """catalog_version()'s row if this process holds one within the TTL,
+    else None. Never queries, so it is safe anywhere (see
+    creditcard_guru/metrics.py)."""
+    if _catalog_version is None or time.monotonic() - _catalog_version_fetched_at > CATALOG_VERSION_TTL:
+        return None
+    return _catalog_version
+
+
+def invalidate_catalog_version():
+    global _catalog_version
+    _catalog_version = None
@@ -0,0 +1,92 @@
+"""Compiled catalog artifact: the whole card catalog in one SQLite file.
+
+`manage.py compile_catalog` imports data/input/system/*.json and
+data/input/cards/*.json into a fresh, fully migrated SQLite database (in a
+child process, so the configured database is never touched) and VACUUMs it
+into a single compact file. It is plain SQLite pages, with no pickled ORM
+objects, so it survives code changes that don't touch the schema and can
+be memory-mapped by SQLite like any database file.
+
+With the CATALOG_ARTIFACT setting pointing at one, the process runs in
+DB-free mode: every connection it opens is an in-memory SQLite database
+restored from the artifact through sqlite3's backup API, which takes
+milliseconds instead of a migrate plus import. Whatever a script writes
+there (scratch profiles, see roadmaps/offline.py) lives and dies with the
+process. Recompile after catalog or schema changes.
+"""
+import glob
+import os
+import sqlite3
+from io import StringIO
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+
+# Import order matters: cards resolve categories, issuers, reward types and
+# programs by name, and card credits resolve spending credits.
+SYSTEM_FILES = (
+    'spending_categories.json',
+    'issuers.json',
+    'reward_types.json',
+    'points_programs.json',
+)
+NON_CATALOG_CARD_FILES = ('personal.json',)
+
+
+def catalog_card_files(data_dir):
+    return [
+        path for path in sorted(glob.glob(os.path.join(data_dir, 'cards', '*.json')))
+        if os.path.basename(path) not in NON_CATALOG_CARD_FILES
+    ]
+
+
+def build_catalog(data_dir):
+    """Migrate the (empty) default database and import the catalog into it.
+    Returns the importers' output. Only ever run in compile_catalog's child
+    process, whose default database is the scratch file."""
+    out = StringIO()
+    call_command('migrate', interactive=False, verbosity=0, stdout=out)
+    for name in SYSTEM_FILES:
+        path = os.path.join(data_dir, 'system', name)
+        if os.path.exists(path):
+            call_command('import_cards', path, stdout=out)
+    call_command('import_spending_credits',
+                 file=os.path.join(data_dir, 'system', 'spending_credits.json'), stdout=out)
+    for path in catalog_card_files(data_dir):
+        call_command('import_cards', path, stdout=out)
+    return out.getvalue()
+
+
+def write_artifact(scratch_path, output_path):
+    """VACUUM the scratch database into `output_path`, replacing any
+    existing artifact atomically."""
+    partial = f'{output_path}.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    db = sqlite3.connect(scratch_path)
+    try:
+        db.execute('VACUUM INTO ?', (partial,))
+    finally:
+        db.close()
+    os.replace(partial, output_path)
+
+
+def restore_catalog(connection, path):
+    """Copy the artifact at `path` into a fresh SQLite connection."""
+    try:
+        source = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    except sqlite3.OperationalError:
+        raise ImproperlyConfigured(
+            f'CATALOG_ARTIFACT {path} cannot be opened; build it with '
+            f'`manage.py compile_catalog --output {path}`')
+    try:
+        source.backup(connection.connection)
+    finally:
+        source.close()
+
+
+def restore_on_connect(sender, connection, **kwargs):
+    """connection_created receiver for DB-free mode (see CardsConfig.ready)."""
+    if connection.vendor == 'sqlite':
+        restore_catalog(connection, settings.CATALOG_ARTIFACT)
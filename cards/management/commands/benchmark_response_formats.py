@@ -0,0 +1,106 @@
+"""
+Compare wire size and encode time of the roadmap response formats.
+
+Runs every scenario in the corpus through the engine, builds the
+quick-recommendation payload the API would return, and encodes it as JSON,
+gzipped JSON, MessagePack and gzipped MessagePack. Nothing is kept: each
+scenario's data is deleted again, as with run_scenario.
+
+Usage:
+    python manage.py benchmark_response_formats
+    python manage.py benchmark_response_formats --repeat 200
+    python manage.py benchmark_response_formats --file scenarios/portfolio
+"""
+
+import gzip
+import os
+import time
+
+from django.core.management.base import CommandError
+from rest_framework.renderers import JSONRenderer
+
+from cards.renderers import packb
+from cards.scenario_loader import ScenarioLoader
+from roadmaps.responses import build_recommendation_response
+
+from .run_scenario import Command as ScenarioCommand
+
+
+def _gzip(data):
+    # Same level GZipMiddleware uses.
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+FORMATS = [
+    ('json', lambda payload: JSONRenderer().render(payload)),
+    ('json+gzip', lambda payload: _gzip(JSONRenderer().render(payload))),
+    ('msgpack', packb),
+    ('msgpack+gzip', lambda payload: _gzip(packb(payload))),
+]
+
+
+class Command(ScenarioCommand):
+    help = 'Benchmark wire size and encode time of roadmap response formats over the scenario corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            default=None,
+            help='JSON file or directory containing scenarios (default: auto-detect)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Encodes per payload and format when timing (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['file']:
+                project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+                data = ScenarioLoader.load_scenarios(os.path.join(project_root, options['file']))
+            else:
+                data = ScenarioLoader.load_scenarios()
+        except FileNotFoundError as e:
+            raise CommandError(f'Scenarios not found: {e}')
+        scenarios = data.get('scenarios', [])
+        if not scenarios:
+            raise CommandError('No scenarios found in file')
+
+        self.setup_test_data()
+        payloads = []
+        for scenario in scenarios:
+            profile, result = self.generate_scenario(scenario)
+            payloads.append(build_recommendation_response(result))
+            self.cleanup_scenario(profile)
+
+        results = self.benchmark(payloads, max(1, options['repeat']))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(payloads)} scenario payloads, {options["repeat"]} encodes each'))
+        self.stdout.write(f'{"format":<14}{"total bytes":>13}{"mean bytes":>12}{"vs json":>9}{"mean encode":>14}')
+        json_bytes = results[0]['bytes'] or 1
+        for result in results:
+            self.stdout.write(
+                f'{result["format"]:<14}{result["bytes"]:>13,}'
+                f'{result["bytes"] / len(payloads):>12,.0f}'
+                f'{result["bytes"] / json_bytes:>9.0%}'
+                f'{result["seconds"] / len(payloads) * 1000:>12.3f}ms'
+            )
+
+    def benchmark(self, payloads, repeat):
+        """Total encoded bytes and total per-encode seconds of each format
+        over `payloads`."""
+        results = []
+        for name, encode in FORMATS:
+            total_bytes = 0
+            total_seconds = 0.0
+            for payload in payloads:
+                total_bytes += len(encode(payload))
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    encode(payload)
+                total_seconds += (time.perf_counter() - start) / repeat
+            results.append({'format': name, 'bytes': total_bytes, 'seconds': total_seconds})
+        return results
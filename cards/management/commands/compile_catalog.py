@@ -0,0 +1,75 @@
+"""
+Compile the card catalog into a single SQLite artifact.
+
+Imports data/input/system/*.json, the spending credits and
+data/input/cards/*.json (not personal.json) into a fresh SQLite database
+in a child process, then VACUUMs it into --output. Point CATALOG_ARTIFACT
+at the result to run scripts and batch workers without a database (see
+cards/catalog_artifact.py and roadmaps/offline.py).
+
+Usage:
+    python manage.py compile_catalog
+    python manage.py compile_catalog --output /tmp/catalog.sqlite3
+    CATALOG_ARTIFACT=build/catalog.sqlite3 python manage.py shell
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from cards.catalog_artifact import build_catalog, write_artifact
+
+
+class Command(BaseCommand):
+    help = 'Compile data/input catalog JSON into a single SQLite artifact for DB-free engine runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', type=str, default=os.path.join('build', 'catalog.sqlite3'),
+            help='Artifact path (default: build/catalog.sqlite3)')
+        parser.add_argument(
+            '--data-dir', type=str, default=os.path.join('data', 'input'),
+            help='Directory holding system/ and cards/ (default: data/input)')
+        # The child process's half: its default database is the scratch file.
+        parser.add_argument('--build-into', type=str, default=None, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        data_dir = os.path.abspath(options['data_dir'])
+        if options['build_into']:
+            if connection.vendor != 'sqlite' or str(connection.settings_dict['NAME']) != options['build_into']:
+                raise CommandError('--build-into is internal to compile_catalog')
+            build_catalog(data_dir)
+            return
+
+        if not os.path.isdir(os.path.join(data_dir, 'cards')):
+            raise CommandError(f'No cards/ directory under {data_dir}')
+        output = os.path.abspath(options['output'])
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            scratch = os.path.join(scratch_dir, 'catalog.sqlite3')
+            env = dict(os.environ, DATABASE_URL=f'sqlite:///{scratch}')
+            env.pop('CATALOG_ARTIFACT', None)
+            result = subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'compile_catalog',
+                 '--build-into', scratch, '--data-dir', data_dir],
+                env=env, capture_output=True, text=True)
+            if result.returncode:
+                raise CommandError(f'Catalog build failed:\n{result.stderr.strip()}')
+            write_artifact(scratch, output)
+
+        db = sqlite3.connect(f'file:{output}?mode=ro', uri=True)
+        try:
+            cards = db.execute('SELECT COUNT(*) FROM cards_creditcard').fetchone()[0]
+            version = db.execute('SELECT version FROM cards_catalogversion WHERE id = 1').fetchone()
+        finally:
+            db.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {output}: {cards:,} cards, catalog v{version[0] if version else 0}, '
+            f'{os.path.getsize(output) / 1024:,.0f} KiB'))
@@ -0,0 +1,175 @@
+"""
+List, view and replay slow-request captures (see roadmaps/profiling.py).
+
+`replay` runs a capture's scenario (the engine inputs it recorded) through
+the current code with roadmaps.offline and compares the timing. It also
+takes a scenario file, so `--export` turns a slow case into a benchmark
+fixture that later changes can be replayed against.
+
+Usage:
+    python manage.py engine_profiles list
+    python manage.py engine_profiles view 20261019T101500-ab12cd34 --flame slow.folded
+    python manage.py engine_profiles replay 20261019T1015 --repeat 5
+    python manage.py engine_profiles replay 20261019T1015 --export slow_case.json
+    python manage.py engine_profiles replay slow_case.json --flame now.folded
+
+Collapsed stacks (`--flame`) feed flamegraph.pl or speedscope.
+"""
+import json
+import os
+import statistics
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from roadmaps.profiling import list_captures, load_capture, profile_call, top_frames
+
+
+class Command(BaseCommand):
+    help = 'List, view and replay slow quick-recommendation captures'
+
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest='action', required=True)
+
+        list_parser = actions.add_parser('list', help='Stored captures, newest first')
+        list_parser.add_argument('--limit', type=int, default=20)
+
+        view = actions.add_parser('view', help='One capture: request, inputs and hottest frames')
+        view.add_argument('capture', help='Capture id (or a unique prefix)')
+        view.add_argument('--top', type=int, default=15, help='Frames to list (default: 15)')
+        view.add_argument('--flame', help='Write collapsed stacks to this file (- for stdout)')
+
+        replay = actions.add_parser('replay', help='Run a capture or scenario file on the current code')
+        replay.add_argument('capture', help='Capture id (or a unique prefix), or a scenario JSON file')
+        replay.add_argument('--repeat', type=int, default=3, help='Runs per scenario (default: 3)')
+        replay.add_argument('--top', type=int, default=10, help='Frames to list (default: 10)')
+        replay.add_argument('--flame', help="Write the replay's collapsed stacks to this file (- for stdout)")
+        replay.add_argument('--export', help='Write the capture as a scenario file instead of replaying')
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def capture(self, capture_id):
+        try:
+            return load_capture(capture_id)
+        except KeyError:
+            raise CommandError(f"No single capture matches '{capture_id}' in PROFILER_DIR")
+
+    def handle_list(self, options):
+        captures = list_captures()[:options['limit']]
+        if not captures:
+            self.stdout.write('No captures (is PROFILER_DIR set?)')
+            return
+        self.stdout.write(f"{'id':<26} {'reason':<7} {'ms':>8} {'status':>6}  {'strategy':<17} path")
+        for record in captures:
+            strategy = record['scenario'].get('strategy', 'default')
+            self.stdout.write(
+                f"{record['id']:<26} {record['reason']:<7} {record['duration_ms']:>8.1f} "
+                f"{record['status']:>6}  {strategy:<17} {record['path']}")
+
+    def handle_view(self, options):
+        record = self.capture(options['capture'])
+        if options['flame']:
+            self.write_stacks(record['stacks'], options['flame'])
+            if options['flame'] == '-':
+                return
+
+        scenario = record['scenario']
+        self.stdout.write(self.style.SUCCESS(f"{record['id']}  {record['method']} {record['path']}"))
+        self.stdout.write(
+            f"  {record['reason']}, {record['duration_ms']:.1f} ms, status {record['status']}, "
+            f"catalog v{record['catalog_version']}, captured {record['captured_at']}")
+        self.stdout.write(
+            f"  {record['samples']} samples every {record['sample_interval_ms']:g} ms; "
+            f"{len(scenario['owned_cards'])} cards held, "
+            f"${sum(scenario['user_profile']['spending'].values()):,.0f}/mo spending, "
+            f"strategy {scenario.get('strategy', 'default')}")
+        self.stdout.write('\nPayload:')
+        self.stdout.write(json.dumps(record['payload'], indent=2))
+        self.write_frames(record['stacks'], options['top'])
+
+    def handle_replay(self, options):
+        if os.path.exists(options['capture']):
+            scenarios, captured = self.load_scenario_file(options['capture']), None
+        else:
+            captured = self.capture(options['capture'])
+            scenarios = [dict(captured['scenario'], name=f"captured-{captured['id']}")]
+
+        if options['export']:
+            if captured is None:
+                raise CommandError('--export takes a capture id, not a file')
+            self.export(captured, options['export'])
+            return
+
+        from cards.caching import catalog_version
+        from roadmaps.offline import DocumentCatalog, ProfileDocumentError, recommend
+
+        catalog = DocumentCatalog()
+        stacks = Counter()
+        for scenario in scenarios:
+            timings = []
+            for _ in range(max(1, options['repeat'])):
+                started = time.perf_counter()
+                try:
+                    _, run_stacks = profile_call(lambda: recommend(scenario, catalog))
+                except ProfileDocumentError as e:
+                    raise CommandError(f"{scenario.get('name', 'scenario')}: {e}")
+                timings.append((time.perf_counter() - started) * 1000)
+                stacks.update(run_stacks)
+            line = (f"{scenario.get('name', 'scenario')}: median {statistics.median(timings):.1f} ms "
+                    f"(min {min(timings):.1f}, {len(timings)} runs, catalog v{catalog_version().version})")
+            if captured is not None:
+                line += (f"; captured {captured['duration_ms']:.1f} ms for the whole request "
+                         f"on catalog v{captured['catalog_version']}")
+            self.stdout.write(line)
+
+        if options['flame']:
+            self.write_stacks(stacks, options['flame'])
+        if options['flame'] != '-':
+            self.write_frames(stacks, options['top'])
+
+    def load_scenario_file(self, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except ValueError as e:
+            raise CommandError(f'{path}: {e}')
+        scenarios = data.get('scenarios', [data]) if isinstance(data, dict) else None
+        if not scenarios:
+            raise CommandError(f'{path} is not a scenario file')
+        return scenarios
+
+    def export(self, record, path):
+        scenario = {
+            'name': f"captured-{record['id']}",
+            'description': (f"{record['reason'].capitalize()} {record['method']} {record['path']}: "
+                            f"{record['duration_ms']:.0f} ms on catalog v{record['catalog_version']}"),
+            **record['scenario'],
+        }
+        with open(path, 'w') as f:
+            json.dump({
+                'description': 'Captured by the slow-request profiler',
+                'category': 'captured',
+                'scenarios': [scenario],
+            }, f, indent=2)
+            f.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path} ({scenario['name']})"))
+
+    def write_stacks(self, stacks, path):
+        lines = [f'{stack} {count}' for stack, count in sorted(stacks.items())]
+        if path == '-':
+            for line in lines:
+                self.stdout.write(line)
+            return
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        self.stdout.write(f'Wrote {len(lines)} collapsed stacks to {path}')
+
+    def write_frames(self, stacks, limit):
+        total = sum(stacks.values()) or 1
+        self_frames, inclusive_frames = top_frames(stacks, limit)
+        for title, frames in (('Self', self_frames), ('Inclusive', inclusive_frames)):
+            self.stdout.write(f'\n{title}:')
+            for frame, count in frames:
+                self.stdout.write(f'  {100 * count / total:5.1f}%  {frame}')
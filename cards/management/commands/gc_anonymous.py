@@ -0,0 +1,185 @@
+"""
+Reclaim the state anonymous visitors leave behind.
+
+Every anonymous roadmap submission creates a session, a UserSpendingProfile
+with its SpendingAmount rows, and a "Current Roadmap" whose
+RoadmapCalculation holds the full response JSON. Once the session has
+expired nobody can reach that profile again, so this deletes:
+
+- anonymous profiles whose session is gone or expired (and, by cascade,
+  their spending, entities, credit preferences/usage and roadmaps),
+  except profiles with a public shared roadmap, whose links stay live;
+- RoadmapFilter rows that only those profiles' roadmaps used. Filters
+  nothing links to for other reasons (created in the admin or API, or
+  between a get_or_create and its roadmap.filters.add) are left alone;
+- expired Session rows.
+
+Deletes run in batches, each in its own short transaction, with a pause
+between batches so a large backlog never holds a long write lock.
+
+Usage:
+    python manage.py gc_anonymous --dry-run
+    python manage.py gc_anonymous
+    python manage.py gc_anonymous --batch-size 500 --pause 0 --max-batches 20
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from cards.models import UserSpendingProfile
+from roadmaps.models import Roadmap, RoadmapFilter
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = 'Delete expired anonymous profiles, their roadmaps and filters, and expired sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Rows deleted per transaction (default: 200)')
+        parser.add_argument(
+            '--pause', type=float, default=0.5,
+            help='Seconds to sleep between batches (default: 0.5)')
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Stop after this many batches per kind; the rest waits for the next run')
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help='Leave profiles touched more recently than this alone (default: 24)')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in DB_SESSION_ENGINES:
+            raise CommandError(
+                f'gc_anonymous needs database-backed sessions to tell which are '
+                f'live; SESSION_ENGINE is {settings.SESSION_ENGINE}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        now = timezone.now()
+        min_age = timedelta(hours=options['min_age_hours'])
+        # Collected before the profiles go: once their roadmaps are deleted
+        # nothing says which filters were theirs.
+        filter_ids = list(
+            filters_only_used_by(expired_anonymous_profiles(now, min_age))
+            .values_list('pk', flat=True))
+        kinds = [
+            ('expired anonymous profiles', lambda: expired_anonymous_profiles(now, min_age)),
+            ('orphaned roadmap filters',
+             lambda: orphaned_roadmap_filters(filter_ids, expired_anonymous_profiles(now, min_age))),
+            ('expired sessions', lambda: Session.objects.filter(expire_date__lt=now)),
+        ]
+
+        if options['dry_run']:
+            for label, queryset in kinds:
+                self.stdout.write(f'{label}: {queryset().count():,} would be deleted')
+            return
+
+        row_bytes = self.average_row_bytes()
+        pages_before = self.sqlite_pages()
+        deleted = Counter()
+        for label, queryset in kinds:
+            counts = self.delete_in_batches(
+                queryset, options['batch_size'], options['pause'], options['max_batches'])
+            self.stdout.write(f'{label}: {counts.get(queryset().model._meta.label, 0):,} deleted')
+            deleted.update(counts)
+
+        for model_label, count in sorted(deleted.items()):
+            if count:
+                self.stdout.write(f'  {model_label}: {count:,} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Reclaimed {self.reclaimed_bytes(deleted, row_bytes, pages_before) / 1024:,.0f} KiB '
+            f'across {sum(deleted.values()):,} rows'))
+
+    def delete_in_batches(self, queryset, batch_size, pause, max_batches):
+        """Delete everything `queryset()` matches, batch_size primary keys
+        per transaction. Returns rows deleted per model label, cascades
+        included."""
+        counts = Counter()
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            pks = list(queryset().order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                _, per_model = queryset().model.objects.filter(pk__in=pks).delete()
+            counts.update(per_model)
+            batches += 1
+            if len(pks) < batch_size:
+                break
+            time.sleep(pause)
+        return counts
+
+    def sqlite_pages(self):
+        """(page_count, freelist_count, page_size) on SQLite, else None."""
+        if connection.vendor != 'sqlite':
+            return None
+        with connection.cursor() as cursor:
+            values = []
+            for pragma in ('page_count', 'freelist_count', 'page_size'):
+                cursor.execute(f'PRAGMA {pragma}')
+                values.append(cursor.fetchone()[0])
+        return tuple(values)
+
+    def average_row_bytes(self):
+        """{db_table: average on-disk bytes per row} on Postgres, else {}."""
+        if connection.vendor != 'postgresql':
+            return {}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, pg_total_relation_size(oid) / GREATEST(reltuples, 1) "
+                "FROM pg_class WHERE relkind = 'r'")
+            return {table: float(size) for table, size in cursor.fetchall()}
+
+    def reclaimed_bytes(self, deleted, row_bytes, pages_before):
+        """Space freed for reuse. Exact on SQLite (pages freed or truncated);
+        an estimate from per-table average row size on Postgres, where the
+        space comes back once autovacuum has run."""
+        if pages_before is not None:
+            page_count, freelist, page_size = pages_before
+            page_count_after, freelist_after, _ = self.sqlite_pages()
+            return max(0, (page_count - page_count_after) + (freelist_after - freelist)) * page_size
+        return sum(
+            count * row_bytes.get(apps.get_model(model_label)._meta.db_table, 0)
+            for model_label, count in deleted.items())
+
+
+def expired_anonymous_profiles(now, min_age):
+    """Anonymous profiles no live session points at, untouched for at least
+    `min_age`, without a public shared roadmap."""
+    live_sessions = Session.objects.filter(expire_date__gt=now).values('session_key')
+    return (UserSpendingProfile.objects
+            .filter(user__isnull=True, share_uuid__isnull=True, updated_at__lt=now - min_age)
+            .exclude(session_key__in=live_sessions)
+            .exclude(roadmaps__privacy_setting='public'))
+
+
+def filters_only_used_by(profiles):
+    """RoadmapFilters that `profiles`' roadmaps use and no other roadmap does."""
+    return (RoadmapFilter.objects
+            .filter(roadmap__profile__in=profiles)
+            .exclude(roadmap__in=Roadmap.objects.exclude(profile__in=profiles))
+            .distinct())
+
+
+def orphaned_roadmap_filters(filter_ids, profiles):
+    """Those of `filter_ids` still used by no roadmap outside `profiles`
+    (the expired profiles not deleted yet). A filter some other roadmap
+    picked up in the meantime is kept."""
+    return (RoadmapFilter.objects
+            .filter(pk__in=filter_ids)
+            .exclude(roadmap__in=Roadmap.objects.exclude(profile__in=profiles)))
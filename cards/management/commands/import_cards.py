@@ -7,8 +7,9 @@ from django.contrib.auth.models import User
 from cards.models import (
     Issuer, RewardType, SpendingCategory, CreditCard, 
     RewardCategory, CardCredit, UserSpendingProfile, UserCard,
-    SpendingCredit, PointsProgram, PointsValuation
+    SpendingCredit, PointsProgram, PointsValuation, CatalogVersion
 )
+from creditcard_guru.metrics import import_duration
 
 
 class Command(BaseCommand):
@@ -21,6 +22,7 @@ class Command(BaseCommand):
             help='Path to the JSON file containing credit card data'
         )
 
+    @import_duration.time(command='import_cards')
     def handle(self, *args, **options):
         file_path = options['file_path']
         
@@ -55,7 +57,9 @@ class Command(BaseCommand):
             # Issuer-specific credit card files (array of cards)
             self.import_credit_cards(data)
         elif filename == 'personal.json':
+            # Card ownership, not catalog data: no version bump.
             self.import_personal_cards(data)
+            return
         else:
             # Check if it's an array of credit cards vs legacy combined format
             if isinstance(data, list) and data and 'name' in data[0] and 'issuer' in data[0]:
@@ -65,6 +69,8 @@ class Command(BaseCommand):
                 # Legacy format - assume it's the old combined format
                 self.import_data(data)
 
+        CatalogVersion.bump(source=f'import_cards:{filename}')
+
     def import_data(self, data):
         """
         Expected JSON format:
@@ -21,6 +21,7 @@ from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 
 from cards.models import CreditCard, PendingCardUpdate
+from creditcard_guru.metrics import import_duration
 
 API_URL = ('https://raw.githubusercontent.com/andenacitelli/'
            'credit-card-bonuses-api/main/exports/data.json')
@@ -223,6 +224,7 @@ class Command(BaseCommand):
             '--no-import', action='store_true',
             help='Update the JSON files but skip the DB re-import')
 
+    @import_duration.time(command='import_external_cards')
     def handle(self, *args, **options):
         api_cards = self.load_api_data(options.get('file'))
         manual_map = self.load_manual_map()
@@ -2,7 +2,8 @@ import json
 import os
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
-from cards.models import SpendingCredit, SpendingCategory
+from cards.models import SpendingCredit, SpendingCategory, CatalogVersion
+from creditcard_guru.metrics import import_duration
 
 
 class Command(BaseCommand):
@@ -21,6 +22,7 @@ class Command(BaseCommand):
             help='Clear existing spending credits before importing'
         )
 
+    @import_duration.time(command='import_spending_credits')
     def handle(self, *args, **options):
         file_path = options['file']
         
@@ -96,6 +98,8 @@ class Command(BaseCommand):
                     created_count += 1
                     self.stdout.write(f'Created spending credit: {display_name}')
             
+            CatalogVersion.bump(source='import_spending_credits')
+
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Successfully processed {processed_count} spending credits '
@@ -0,0 +1,194 @@
+"""
+Find full table scans in the SQL the hot endpoints run.
+
+Requests each hot endpoint in-process against the current database (seed
+it first, e.g. with seed_profile), captures every SELECT it executes, and
+runs EXPLAIN on each one (SQLite's EXPLAIN QUERY PLAN, or Postgres'
+EXPLAIN (FORMAT JSON)). Scans of whole tables are listed with the table's
+current row count. Everything runs inside a transaction that is rolled
+back, so the writes some endpoints make (anonymous sessions, the Current
+Roadmap) are never kept.
+
+Usage:
+    python manage.py index_advisor
+    python manage.py index_advisor --username jamie
+    python manage.py index_advisor --fail-on-scan --ignore cards_issuer
+"""
+
+import json
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+
+from cards.models import SpendingAmount, SpendingCategory, UserCard, UserSpendingProfile
+
+# (method, path). The quick-recommendation POST body is built from the
+# profile being advised on.
+HOT_ENDPOINTS = [
+    ('GET', '/api/cards/cards/'),
+    ('GET', '/api/cards/profile/'),
+    ('GET', '/api/cards/user-cards/'),
+    ('GET', '/api/cards/credit-preferences/'),
+    ('GET', '/api/cards/credit-usage/'),
+    ('GET', '/api/cards/wallet/'),
+    ('GET', '/api/users/data/'),
+    ('GET', '/api/roadmaps/'),
+    ('GET', '/api/roadmaps/current/'),
+    ('POST', '/api/roadmaps/quick-recommendation/'),
+]
+
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+
+class _Rollback(Exception):
+    pass
+
+
+def sqlite_full_scans(plan_rows, tables):
+    """Tables read in full according to SQLite EXPLAIN QUERY PLAN rows.
+    `SCAN t USING [COVERING] INDEX i` counts too: it visits every row, in
+    index order. Only `SEARCH t USING INDEX` narrows the rows read."""
+    scanned = []
+    for row in plan_rows:
+        match = _SQLITE_SCAN.match(row[-1])
+        if match and match.group(1) in tables:
+            scanned.append(match.group(1))
+    return scanned
+
+
+def postgres_full_scans(plan):
+    """Relations under a Seq Scan node in an EXPLAIN (FORMAT JSON) plan."""
+    scanned = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            scanned.append(node['Relation Name'])
+        stack.extend(node.get('Plans', []))
+    return scanned
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the SQL the hot endpoints run and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username', type=str, default=None,
+            help='Request as this user (default: an anonymous visitor)')
+        parser.add_argument(
+            '--ignore', action='append', default=[], metavar='TABLE',
+            help='Table whose full scans are expected (e.g. small catalog tables); repeatable')
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help='Exit with an error when any non-ignored full scan is found')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'index_advisor supports SQLite and Postgres, not {vendor}')
+
+        user = None
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'No user named "{options["username"]}"')
+
+        ignored = set(options['ignore'])
+        findings = []
+        try:
+            with transaction.atomic():
+                tables = set(connection.introspection.table_names())
+                for method, path, queries in self.capture(user):
+                    scans = {}
+                    for sql, params in queries:
+                        for table in self.full_scans(vendor, sql, params, tables):
+                            scans.setdefault(table, sql)
+                    findings.append((method, path, len(queries), {
+                        table: (self.row_count(table), sql)
+                        for table, sql in scans.items() if table not in ignored
+                    }))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        flagged = 0
+        for method, path, query_count, scans in findings:
+            style = self.style.WARNING if scans else self.style.SUCCESS
+            self.stdout.write(style(f'{method} {path}: {query_count} queries, {len(scans)} full scans'))
+            for table, (rows, sql) in sorted(scans.items()):
+                flagged += 1
+                self.stdout.write(f'  SCAN {table} ({rows:,} rows)')
+                self.stdout.write(f'    {sql[:200]}')
+
+        if flagged and options['fail_on_scan']:
+            raise CommandError(f'{flagged} full table scans on hot endpoints')
+
+    def capture(self, user):
+        """(method, path, [(sql, params), ...]) for each hot endpoint."""
+        host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h), 'localhost')
+        client = Client(SERVER_NAME=host.lstrip('.'))
+        if user:
+            client.force_login(user)
+        body = self.quick_recommendation_body(user)
+
+        results = []
+        for method, path in HOT_ENDPOINTS:
+            queries = []
+
+            def record(execute, sql, params, many, context):
+                if not many and sql.lstrip().upper().startswith('SELECT'):
+                    queries.append((sql, params))
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(record):
+                if method == 'POST':
+                    response = client.post(path, body, content_type='application/json')
+                else:
+                    response = client.get(path)
+            if response.status_code >= 500:
+                self.stderr.write(f'{method} {path} returned {response.status_code}')
+            results.append((method, path, queries))
+        return results
+
+    def quick_recommendation_body(self, user):
+        """The profile's own spending and cards, or a token $500/month on the
+        first few categories for an anonymous visitor."""
+        profile = UserSpendingProfile.objects.filter(user=user).first() if user else None
+        spending = {}
+        if profile:
+            spending = {
+                str(amount.category_id): str(amount.monthly_amount)
+                for amount in SpendingAmount.objects.filter(profile=profile)
+            }
+        if not spending:
+            spending = {
+                str(category_id): '500.00'
+                for category_id in SpendingCategory.objects.values_list('id', flat=True)[:4]
+            }
+        user_cards = []
+        if user:
+            user_cards = [
+                {'card_id': card_id} for card_id in
+                UserCard.objects.filter(user=user, closed_date__isnull=True).values_list('card_id', flat=True)
+            ]
+        return {'spending_amounts': spending, 'user_cards': user_cards}
+
+    def full_scans(self, vendor, sql, params, tables):
+        with connection.cursor() as cursor:
+            if vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                return sqlite_full_scans(cursor.fetchall(), tables)
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return postgres_full_scans(plan[0]['Plan'])
+
+    def row_count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
@@ -0,0 +1,32 @@
+"""
+Issue an API key for the partner batch endpoint.
+
+The key is printed once; only its digest is stored. Revoke a key by
+unticking is_active in the admin.
+
+Usage:
+    python manage.py issue_partner_key "Acme Rewards"
+    python manage.py issue_partner_key "Acme Rewards" --max-concurrency 4
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from roadmaps.models import PartnerAPIKey
+
+
+class Command(BaseCommand):
+    help = 'Issue an API key for /api/roadmaps/partner/batch/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Partner name, for the admin')
+        parser.add_argument(
+            '--max-concurrency', type=int, default=2,
+            help='Batch items evaluated at once for this key, per server process (default: 2)')
+
+    def handle(self, *args, **options):
+        if options['max_concurrency'] < 1:
+            raise CommandError('--max-concurrency must be at least 1')
+        api_key, key = PartnerAPIKey.issue(options['name'], options['max_concurrency'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Issued key {api_key.prefix}… for {api_key.name} '
+            f'(max concurrency {api_key.max_concurrency}). It will not be shown again:'))
+        self.stdout.write(key)
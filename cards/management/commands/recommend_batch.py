@@ -0,0 +1,162 @@
+"""
+Score many profiles without creating users: JSONL in, JSONL out.
+
+Each input line is a profile document (see roadmaps/offline.py: spending,
+card history, credit preferences, strategy; any scenario is one). Each
+output line is {"line": n, "id": ..., "result": <quick-recommendation
+response>} or {"line": n, "id": ..., "error": "..."}; a bad line never
+stops the batch. Input is read as it is consumed and at most a few chunks
+per worker are in flight, so memory stays flat however long the input is.
+
+Run it against a compiled catalog (CATALOG_ARTIFACT, see compile_catalog):
+each worker then evaluates in its own in-memory copy. --workers above 1 is
+refused on a SQLite file database, where every worker's scratch writes
+would queue on the one write lock.
+
+Usage:
+    CATALOG_ARTIFACT=build/catalog.sqlite3 python manage.py recommend_batch profiles.jsonl > results.jsonl
+    zcat profiles.jsonl.gz | CATALOG_ARTIFACT=build/catalog.sqlite3 \\
+        python manage.py recommend_batch - --workers 8 --unordered
+"""
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from itertools import islice
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+# Chunks in flight per worker: enough to keep every worker busy while the
+# parent writes results, few enough to bound memory.
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# A worker's DocumentCatalog, loaded by _init_worker.
+_catalog = None
+
+
+def _init_worker():
+    global _catalog
+    import django
+    django.setup()
+    from roadmaps.offline import DocumentCatalog
+    _catalog = DocumentCatalog()
+
+
+def evaluate_lines(chunk, catalog=None):
+    """[(output line, failed), ...] for [(line number, input text), ...], in
+    input order. Runs in a worker process, or in the command's own for
+    --workers 1."""
+    from roadmaps.offline import ProfileDocumentError, recommend
+
+    catalog = catalog or _catalog
+    results = []
+    for line_number, text in chunk:
+        output = {'line': line_number}
+        try:
+            document = json.loads(text)
+        except json.JSONDecodeError as e:
+            output['error'] = f'Invalid JSON: {e}'
+        else:
+            if isinstance(document, dict) and 'id' in document:
+                output['id'] = document['id']
+            try:
+                output['result'] = recommend(document, catalog)
+            except ProfileDocumentError as e:
+                output['error'] = str(e)
+            except Exception as e:
+                output['error'] = f'{type(e).__name__}: {e}'
+        results.append((json.dumps(output, cls=DjangoJSONEncoder, separators=(',', ':')),
+                        'error' in output))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Stream recommendations for JSONL profile documents to stdout as JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='JSONL file of profile documents, or - for stdin (default)')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Worker processes (default: 1, in-process)')
+        parser.add_argument(
+            '--chunk-size', type=int, default=32,
+            help='Documents per task sent to a worker (default: 32)')
+        parser.add_argument(
+            '--unordered', action='store_true',
+            help='Write results as they finish instead of in input order')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        chunk_size = options['chunk_size']
+        if workers < 1 or chunk_size < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1')
+        if workers > 1 and connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+            raise CommandError(
+                '--workers > 1 would serialize on the SQLite file database\'s write lock; '
+                'set CATALOG_ARTIFACT (see compile_catalog) to give each worker an in-memory catalog')
+
+        start = time.perf_counter()
+        stream = sys.stdin if options['input'] == '-' else open(options['input'])
+        try:
+            chunks = self.chunks(stream, chunk_size)
+            if workers == 1:
+                from roadmaps.offline import DocumentCatalog
+                results = map(partial(evaluate_lines, catalog=DocumentCatalog()), chunks)
+            else:
+                results = self.parallel(chunks, workers, not options['unordered'])
+            lines = errors = 0
+            for chunk_results in results:
+                for line, failed in chunk_results:
+                    self.stdout.write(line)
+                    lines += 1
+                    errors += failed
+                self.stdout.flush()
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        self.stderr.write(
+            f'{lines:,} profiles, {errors:,} errors, {lines / elapsed if elapsed else 0:,.1f}/s')
+
+    def chunks(self, stream, chunk_size):
+        """[(line number, text), ...] chunks of the non-blank input lines."""
+        numbered = ((n, line) for n, line in enumerate(stream, 1) if line.strip())
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def parallel(self, chunks, workers, ordered):
+        """Results of each chunk from a process pool, keeping at most
+        CHUNKS_IN_FLIGHT_PER_WORKER chunks per worker submitted."""
+        window = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+        # spawn, not fork: a forked child would share the parent's database
+        # connection (an in-memory one is never really closed).
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                 initializer=_init_worker) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(evaluate_lines, chunk))
+                while len(pending) >= window:
+                    yield from self.drain(pending, ordered)
+            while pending:
+                yield from self.drain(pending, ordered)
+
+    def drain(self, pending, ordered):
+        """Take finished results off `pending`: the oldest one when output
+        is ordered, otherwise whichever finished."""
+        if ordered:
+            yield pending.popleft().result()
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            yield future.result()
@@ -0,0 +1,86 @@
+"""
+Worker for the roadmap generation queue (roadmaps/jobs.py).
+
+Usage:
+    python manage.py run_roadmap_jobs                  # poll forever
+    python manage.py run_roadmap_jobs --concurrency 4
+    python manage.py run_roadmap_jobs --once           # drain the queue and exit
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from roadmaps.jobs import claim_next_job, fail_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued roadmap generation jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.ROADMAP_JOB_WORKERS,
+            help='Jobs to run at once (default: ROADMAP_JOB_WORKERS)')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty instead of polling')
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait between polls of an empty queue')
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Fail jobs left running this many seconds by a dead worker')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1')
+
+        stale = fail_stale_jobs(timedelta(seconds=options['stale_after']))
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Failed {stale} stale running job(s)'))
+
+        self.stop = threading.Event()
+        self.counts_lock = threading.Lock()
+        self.counts = {'succeeded': 0, 'failed': 0}
+
+        self.stdout.write(f'Running roadmap jobs with concurrency {concurrency}')
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='roadmap-job') as pool:
+            workers = [
+                pool.submit(self.work, options['once'], options['poll_interval'])
+                for _ in range(concurrency)
+            ]
+            try:
+                for worker in workers:
+                    worker.result()
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping after in-flight jobs finish...')
+                self.stop.set()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {self.counts['succeeded']} succeeded, {self.counts['failed']} failed"))
+
+    def work(self, once, poll_interval):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_next_job()
+                if job is None:
+                    if once:
+                        return
+                    self.stop.wait(poll_interval)
+                    continue
+
+                started = time.monotonic()
+                job = run_job(job)
+                with self.counts_lock:
+                    self.counts[job.status] += 1
+                line = f'Job {job.pk} ({job.roadmap}): {job.status} in {time.monotonic() - started:.1f}s'
+                self.stdout.write(line if job.status == job.STATUS_SUCCEEDED else self.style.ERROR(
+                    f'{line} — {job.error}'))
+        finally:
+            connection.close()
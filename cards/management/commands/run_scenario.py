@@ -152,6 +152,17 @@ class Command(BaseCommand):
             self.stdout.write(f'Description: {scenario_data["description"]}')
             self.stdout.write('')
         
+        profile, result = self.generate_scenario(scenario_data)
+
+        # Display results
+        self.display_results(scenario_data, result['recommendations'], verbose)
+
+        self.cleanup_scenario(profile)
+
+    def generate_scenario(self, scenario_data):
+        """Create a scenario's profile and roadmap and run the engine on it.
+        Returns (profile, generate_quick_recommendations result); pass the profile to
+        cleanup_scenario() when done."""
         # Create the scenario
         profile, created_cards = self.create_test_scenario(scenario_data)
 
@@ -182,11 +193,9 @@ class Command(BaseCommand):
 
         # Generate recommendations
         engine = RecommendationEngine(profile, strategy=strategy)
-        recommendations = engine.generate_quick_recommendations(roadmap)
-        
-        # Display results
-        self.display_results(scenario_data, recommendations, verbose)
-        
+        return profile, engine.generate_quick_recommendations(roadmap)
+
+    def cleanup_scenario(self, profile):
         # Cleanup: the scenario user (cascades its profile/cards/spending)
         # AND any fixture cards this run created in the database.
         profile.user.delete()
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-19 04:55
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed(apps, schema_editor):
+    # Start from the newest card edit so the footer's "last updated" date
+    # carries over from the old Max('updated_at') aggregate.
+    CreditCard = apps.get_model('cards', 'CreditCard')
+    CatalogVersion = apps.get_model('cards', 'CatalogVersion')
+    latest = CreditCard.objects.aggregate(latest=Max('updated_at'))['latest']
+    CatalogVersion.objects.get_or_create(
+        pk=1, defaults={'version': 1 if latest else 0, 'updated_at': latest})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0015_reapplied_card_open_holding_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('source', models.CharField(blank=True, help_text='Importer that made the last bump', max_length=100)),
+            ],
+        ),
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 05:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0016_catalogversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rewardcategory',
+            index=models.Index(fields=['card', 'is_active', 'start_date', 'end_date'], name='rewardcat_card_active_dates'),
+        ),
+        migrations.AddIndex(
+            model_name='usercard',
+            index=models.Index(fields=['user', 'closed_date'], name='usercard_user_closed'),
+        ),
+    ]
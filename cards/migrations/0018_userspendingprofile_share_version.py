@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0017_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userspendingprofile',
+            name='share_version',
+            field=models.PositiveIntegerField(default=0, help_text="Bumped on every change to a shared profile; part of its payload's cache key"),
+        ),
+    ]
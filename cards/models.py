@@ -195,6 +195,12 @@ class RewardCategory(models.Model):
 
     class Meta:
         unique_together = ['card', 'category', 'start_date']
+        indexes = [
+            # RewardCategory.objects.filter(card__in=...).active_on(date),
+            # the rate-table query behind every recommendation.
+            models.Index(fields=['card', 'is_active', 'start_date', 'end_date'],
+                         name='rewardcat_card_active_dates'),
+        ]
     
     def __str__(self):
         period = ""
@@ -263,17 +269,20 @@ class CardCredit(models.Model):
         from datetime import date
         if date_obj is None:
             date_obj = date.today()
+        keys = self.period_keys(date_obj)
+        return keys.get(self.times_per_year, keys[1])
+
+    @staticmethod
+    def period_keys(date_obj):
+        """The period key for `date_obj` per times_per_year (monthly,
+        quarterly, half-yearly); any other frequency uses the year key, 1."""
         year = date_obj.year
-        if self.times_per_year == 12:
-            return f"{year}-{date_obj.month:02d}"
-        elif self.times_per_year == 4:
-            quarter = (date_obj.month - 1) // 3 + 1
-            return f"{year}-Q{quarter}"
-        elif self.times_per_year == 2:
-            half = 1 if date_obj.month <= 6 else 2
-            return f"{year}-H{half}"
-        else:
-            return f"{year}"
+        return {
+            12: f"{year}-{date_obj.month:02d}",
+            4: f"{year}-Q{(date_obj.month - 1) // 3 + 1}",
+            2: f"{year}-H{1 if date_obj.month <= 6 else 2}",
+            1: f"{year}",
+        }
 
 
 class UserSpendingProfile(models.Model):
@@ -290,6 +299,7 @@ class UserSpendingProfile(models.Model):
     # Profile sharing settings
     privacy_setting = models.CharField(max_length=10, choices=PRIVACY_CHOICES, default='private')
     share_uuid = models.UUIDField(default=None, null=True, blank=True, unique=True, help_text="Unique ID for sharing public profiles")
+    share_version = models.PositiveIntegerField(default=0, help_text="Bumped on every change to a shared profile; part of its payload's cache key")
     
     class Meta:
         unique_together = [['user'], ['session_key']]
@@ -298,6 +308,17 @@ class UserSpendingProfile(models.Model):
         if self.user:
             return f"Profile for {self.user.username}"
         return f"Anonymous profile {self.session_key}"
+
+    def save(self, *args, **kwargs):
+        # share_version is only ever bumped in the database (see
+        # cards.caching.invalidate_shared_profile). Writing this instance's
+        # copy back, stale after any bump since it was loaded, would roll
+        # the version back and let a later bump reuse a retired cache key.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'share_version']
+        super().save(*args, **kwargs)
     
     def generate_share_uuid(self):
         """Generate a unique UUID for sharing this profile"""
@@ -421,6 +442,11 @@ class UserCard(models.Model):
                 condition=models.Q(closed_date__isnull=True),
                 name='uniq_open_usercard_user_card_owner'),
         ]
+        indexes = [
+            # A user's open (or closed) cards: the wallet, eligibility rules
+            # and every generation's owned-card load.
+            models.Index(fields=['user', 'closed_date'], name='usercard_user_closed'),
+        ]
         ordering = ['-opened_date', '-created_at']
     
     def __str__(self):
@@ -497,6 +523,19 @@ class PendingCardUpdate(models.Model):
         return f"{self.card_label} - {self.section} ({self.status})"
 
 
+class UserCreditUsageQuerySet(models.QuerySet):
+    def current(self, on_date):
+        """Usages recorded for the period their credit is in on `on_date`
+        (`CardCredit.get_period_key`), matched in SQL rather than by loading
+        every past period."""
+        keys = CardCredit.period_keys(on_date)
+        frequencies = [times for times in keys if times != 1]
+        current = models.Q(period_key=keys[1]) & ~models.Q(card_credit__times_per_year__in=frequencies)
+        for times in frequencies:
+            current |= models.Q(card_credit__times_per_year=times, period_key=keys[times])
+        return self.filter(current)
+
+
 class UserCreditUsage(models.Model):
     """Tracks which card credits were actually used in a given period (month, quarter, half, year)"""
     profile = models.ForeignKey(UserSpendingProfile, on_delete=models.CASCADE, related_name='credit_usages')
@@ -509,8 +548,37 @@ class UserCreditUsage(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserCreditUsageQuerySet.as_manager()
+
     class Meta:
         unique_together = ['profile', 'card_credit', 'period_key']
 
     def __str__(self):
-        return f"{self.profile} - Credit {self.card_credit_id} ({self.period_key}): {self.used}"
\ No newline at end of file
+        return f"{self.profile} - Credit {self.card_credit_id} ({self.period_key}): {self.used}"
+
+class CatalogVersion(models.Model):
+    """Single-row counter bumped by the catalog importers.
+
+    Readers go through cards.caching.catalog_version(), which keeps the row
+    in process memory, rather than querying this table (or aggregating over
+    CreditCard.updated_at) on every request.
+    """
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+    source = models.CharField(max_length=100, blank=True, help_text="Importer that made the last bump")
+
+    def __str__(self):
+        return f"Catalog v{self.version}"
+
+    @classmethod
+    def bump(cls, source=''):
+        """Record that catalog data changed; returns the new row."""
+        from django.db.models import F
+        from django.utils import timezone
+        from .caching import invalidate_catalog_version
+
+        cls.objects.get_or_create(pk=1)
+        cls.objects.filter(pk=1).update(
+            version=F('version') + 1, updated_at=timezone.now(), source=source)
+        invalidate_catalog_version()
+        return cls.objects.get(pk=1)
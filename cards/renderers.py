@@ -0,0 +1,121 @@
+"""MessagePack rendering for the large read-mostly API payloads.
+
+Roadmap responses and the card list offer MessagePack to API clients that
+send `Accept: application/x-msgpack` (or `?format=msgpack`); JSON stays the
+default. Those views are also gzipped, and over the scenario corpus gzipped
+JSON is the smallest encoding (`manage.py benchmark_response_formats`), so
+the site's own pages stay on JSON. The encoder is a small pure-Python
+implementation of the spec covering the types DRF serializers emit;
+anything else goes through DRF's JSON encoder first, so both formats carry
+the same values (Decimals, datetimes, UUIDs...).
+`static/js/roadmap-results.js` has the matching decoder.
+"""
+import struct
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+_json_default = JSONEncoder().default
+
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -0x20 <= obj < 0:
+            out.append(obj & 0xff)
+        elif obj >= 0:
+            if obj <= 0xff:
+                out += struct.pack('>BB', 0xcc, obj)
+            elif obj <= 0xffff:
+                out += struct.pack('>BH', 0xcd, obj)
+            elif obj <= 0xffffffff:
+                out += struct.pack('>BI', 0xce, obj)
+            else:
+                out += struct.pack('>BQ', 0xcf, obj)
+        elif obj >= -0x80:
+            out += struct.pack('>Bb', 0xd0, obj)
+        elif obj >= -0x8000:
+            out += struct.pack('>Bh', 0xd1, obj)
+        elif obj >= -0x80000000:
+            out += struct.pack('>Bi', 0xd2, obj)
+        else:
+            out += struct.pack('>Bq', 0xd3, obj)
+    elif isinstance(obj, float):
+        out += struct.pack('>Bd', 0xcb, obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        elif size <= 0xff:
+            out += struct.pack('>BB', 0xd9, size)
+        elif size <= 0xffff:
+            out += struct.pack('>BH', 0xda, size)
+        else:
+            out += struct.pack('>BI', 0xdb, size)
+        out += data
+    elif isinstance(obj, dict):
+        size = len(obj)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size <= 0xffff:
+            out += struct.pack('>BH', 0xde, size)
+        else:
+            out += struct.pack('>BI', 0xdf, size)
+        for key, value in obj.items():
+            _pack(key if isinstance(key, str) else str(key), out)
+            _pack(value, out)
+    elif isinstance(obj, (list, tuple)):
+        size = len(obj)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size <= 0xffff:
+            out += struct.pack('>BH', 0xdc, size)
+        else:
+            out += struct.pack('>BI', 0xdd, size)
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, (bytes, bytearray)):
+        size = len(obj)
+        if size <= 0xff:
+            out += struct.pack('>BB', 0xc4, size)
+        elif size <= 0xffff:
+            out += struct.pack('>BH', 0xc5, size)
+        else:
+            out += struct.pack('>BI', 0xc6, size)
+        out += obj
+    else:
+        _pack(_json_default(obj), out)
+
+
+def packb(obj):
+    """Serialize `obj` to MessagePack bytes. Dict keys are emitted as
+    strings, as JSON would."""
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return packb(data)
+
+
+# Renderer list for the endpoints that offer MessagePack. JSON stays first,
+# so clients that don't ask for anything keep getting JSON.
+COMPACT_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer]
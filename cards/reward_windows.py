@@ -0,0 +1,111 @@
+"""In-memory index of reward category date windows.
+
+Rotating and seasonal RewardCategory rows carry start_date/end_date, so the
+set in effect for a card only changes at those dates. `RewardWindowIndex`
+keeps, per card, the sorted boundary dates and the rows in effect between
+each pair of them: "categories active for card X on date D" is then a
+bisect rather than an `active_on` query, for today or for any `as_of` date
+the engine plans against.
+
+There is one index per process (`reward_window_index`). It is dropped when
+the catalog version changes, when a RewardCategory is saved or deleted in
+this process (cards/signals.py), and after REWARD_WINDOW_TTL as a backstop
+for admin edits made in other processes. A card's entry is also tied to its
+updated_at, so a card saved since it was indexed is read again.
+"""
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+from creditcard_guru.metrics import cache_requests
+
+from .caching import catalog_version
+
+REWARD_WINDOW_TTL = 60 * 10
+
+
+def _in_effect(reward_category, on_date):
+    return ((reward_category.start_date is None or reward_category.start_date <= on_date)
+            and (reward_category.end_date is None or reward_category.end_date >= on_date))
+
+
+def build_windows(rows):
+    """(boundaries, slices) for one card's active rows: slices[i] holds the
+    rows in effect from boundaries[i - 1] up to (not including)
+    boundaries[i], open-ended at both ends. Rows keep their given order."""
+    edges = set()
+    for row in rows:
+        if row.start_date is not None:
+            edges.add(row.start_date)
+        if row.end_date is not None:
+            edges.add(row.end_date + timedelta(days=1))
+    boundaries = sorted(edges)
+    if not boundaries:
+        return [], [tuple(rows)]
+    starts = [boundaries[0] - timedelta(days=1)] + boundaries
+    slices = [tuple(row for row in rows if _in_effect(row, start)) for start in starts]
+    return boundaries, slices
+
+
+class RewardWindowIndex:
+    """Active RewardCategory rows (category preloaded) per card and date."""
+
+    def __init__(self):
+        self._cards = {}
+
+    def load(self, cards):
+        """Index every card in `cards` not indexed yet (or saved since), in
+        one query."""
+        from .models import RewardCategory
+
+        stale = {}
+        for card in cards:
+            entry = self._cards.get(card.id)
+            if entry is None or entry[0] != card.updated_at:
+                stale[card.id] = card.updated_at
+        if not stale:
+            return
+        rows = {card_id: [] for card_id in stale}
+        for reward_category in (RewardCategory.objects
+                                .filter(card_id__in=list(stale), is_active=True)
+                                .select_related('category')
+                                .order_by('id')):
+            rows[reward_category.card_id].append(reward_category)
+        for card_id, card_rows in rows.items():
+            self._cards[card_id] = (stale[card_id], *build_windows(card_rows))
+
+    def active(self, card, on_date):
+        """The card's categories in effect on `on_date`, by RewardCategory id;
+        what `card.reward_categories.active_on(on_date)` returns."""
+        entry = self._cards.get(card.id)
+        if entry is None or entry[0] != card.updated_at:
+            self.load([card])
+            entry = self._cards[card.id]
+        _, boundaries, slices = entry
+        return slices[bisect_right(boundaries, on_date)]
+
+
+_index = None
+_index_version = None
+_index_built_at = 0.0
+
+
+def reward_window_index():
+    """This process's RewardWindowIndex for the current catalog version."""
+    global _index, _index_version, _index_built_at
+
+    version = catalog_version().version
+    now = time.monotonic()
+    if _index is None or _index_version != version or now - _index_built_at > REWARD_WINDOW_TTL:
+        _index = RewardWindowIndex()
+        _index_version = version
+        _index_built_at = now
+        cache_requests.inc(cache='reward_window_index', result='miss')
+    else:
+        cache_requests.inc(cache='reward_window_index', result='hit')
+    return _index
+
+
+def invalidate_reward_window_index():
+    global _index
+    _index = None
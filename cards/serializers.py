@@ -351,10 +351,19 @@ class SharedProfileDataSerializer(serializers.ModelSerializer):
     def get_profile_owner(self, obj):
         return obj.user.username if obj.user else 'Anonymous User'
 
+    def _open_user_cards(self, obj):
+        """The owner's open UserCards, loaded once and shared by both
+        method fields below."""
+        if not hasattr(self, '_open_cards'):
+            self._open_cards = (
+                list(obj.user.owned_cards.filter(closed_date__isnull=True).select_related('card'))
+                if obj.user else [])
+        return self._open_cards
+
     def get_portfolio_summary(self, obj):
         if obj.user:
-            user_cards = obj.user.owned_cards.filter(closed_date__isnull=True)
-            total_cards = user_cards.count()
+            user_cards = self._open_user_cards(obj)
+            total_cards = len(user_cards)
             total_annual_fees = sum(float(card.card.annual_fee or 0) for card in user_cards)
             return {
                 'total_cards': total_cards,
@@ -368,62 +377,44 @@ class SharedProfileDataSerializer(serializers.ModelSerializer):
         }
 
     def get_card_recommendations(self, obj):
+        """Which owned card earns the most on each spending category of $50+/mo.
+
+        Runs the engine's own allocation (`allocate_spending`) over one
+        preloaded rate table of the owner's open cards, so caps and
+        parent-category rates (a 'travel' rate covering 'airlines') are
+        honoured exactly as on the roadmap. A category no owned card earns
+        on comes back with recommended_card=None.
+        """
+        if not obj.user:
+            return []
+        from datetime import date
+        from roadmaps.engine.calculators.rewards import (
+            allocate_spending, load_category_index, load_rate_table)
+
+        spending_amounts = list(
+            obj.spending_amounts.select_related('category').order_by('-monthly_amount'))
+        cards = [uc.card for uc in self._open_user_cards(obj)]
+        allocation = allocate_spending(
+            {sa.category.slug: sa.monthly_amount for sa in spending_amounts},
+            load_rate_table(cards, date.today()),
+            load_category_index())
+
+        best_by_slug = {}
+        for entry in allocation:
+            if entry['card'] is not None and entry['category_slug'] not in best_by_slug:
+                best_by_slug[entry['category_slug']] = entry
+
         card_recommendations = []
-        if obj.user:
-            user_cards = obj.user.owned_cards.filter(closed_date__isnull=True)
-            spending_amounts = obj.spending_amounts.all().order_by('-monthly_amount')
-            
-            for spending in spending_amounts:
-                if float(spending.monthly_amount) < 50:
-                    continue
-                    
-                category_name = spending.category.display_name
-                category_slug = spending.category.slug
-                monthly_amount = float(spending.monthly_amount)
-                
-                best_card = None
-                reward_rate = "1x"
-                
-                for user_card in user_cards:
-                    card = user_card.card
-                    has_category = card.reward_categories.filter(
-                        category__slug=category_slug
-                    ).exists()
-                    
-                    if has_category:
-                        reward_cat = card.reward_categories.filter(
-                            category__slug=category_slug
-                        ).first()
-                        if reward_cat:
-                            best_card = card.name
-                            reward_rate = f"{reward_cat.reward_rate}x"
-                            break
-                
-                if not best_card:
-                    if category_slug in ['dining']:
-                        best_card = "Chase Sapphire Reserve"
-                        reward_rate = "3x"
-                    elif category_slug in ['airlines', 'hotels', 'rental_cars']:
-                        best_card = "Chase Sapphire Reserve"
-                        reward_rate = "3x" 
-                    elif category_slug in ['in_store_grocery', 'groceries']:
-                        best_card = "Blue Cash Preferred Card from American Express"
-                        reward_rate = "6x"
-                    elif category_slug in ['gas']:
-                        best_card = "Blue Cash Preferred Card from American Express"
-                        reward_rate = "3x"
-                    elif category_slug in ['streaming']:
-                        best_card = "Blue Cash Preferred Card from American Express"
-                        reward_rate = "6x"
-                    else:
-                        best_card = "Chase Sapphire Reserve"
-                        reward_rate = "1x"
-                
-                card_recommendations.append({
-                    'category': category_name,
-                    'monthly_spending': monthly_amount,
-                    'recommended_card': best_card,
-                    'reward_rate': reward_rate,
-                    'percentage': f"${monthly_amount:,.0f}/month"
-                })
-        return card_recommendations
\ No newline at end of file
+        for spending in spending_amounts:
+            monthly_amount = float(spending.monthly_amount)
+            if monthly_amount < 50:
+                continue
+            best = best_by_slug.get(spending.category.slug)
+            card_recommendations.append({
+                'category': spending.category.display_name,
+                'monthly_spending': monthly_amount,
+                'recommended_card': best['card'].name if best else None,
+                'reward_rate': f"{best['rate']:g}x" if best else None,
+                'percentage': f"${monthly_amount:,.0f}/month"
+            })
+        return card_recommendations
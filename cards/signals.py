@@ -0,0 +1,32 @@
+"""Model signal receivers, connected in CardsConfig.ready()."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_shared_profile
+from .models import ProfileEntity, RewardCategory, SpendingAmount, UserCard, UserSpendingProfile
+from .reward_windows import invalidate_reward_window_index
+
+
+@receiver(post_save, sender=UserSpendingProfile)
+def profile_changed(sender, instance, **kwargs):
+    # A deleted profile needs nothing: its payload is unreachable.
+    if instance.share_uuid:
+        invalidate_shared_profile(profile_id=instance.pk)
+        # The bump went to the row; keep this instance's copy current.
+        instance.refresh_from_db(fields=['share_version'])
+
+
+@receiver([post_save, post_delete], sender=SpendingAmount)
+@receiver([post_save, post_delete], sender=ProfileEntity)
+def profile_child_changed(sender, instance, **kwargs):
+    invalidate_shared_profile(profile_id=instance.profile_id)
+
+
+@receiver([post_save, post_delete], sender=UserCard)
+def user_card_changed(sender, instance, **kwargs):
+    invalidate_shared_profile(user_id=instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=RewardCategory)
+def reward_category_changed(sender, instance, **kwargs):
+    invalidate_reward_window_index()
@@ -37,10 +37,12 @@ class CreditCardTestBase(TestCase):
         # assertions instead.
         self.command.stdout = OutputWrapper(StringIO())
         self.command.setup_test_data()
+        self.portfolio_summary = {}
 
     def run_scenario_test(self, scenario):
         """Create the scenario's data, generate recommendations, assert
-        the scenario's expectations, and return the recommendations."""
+        the scenario's expectations, and return the recommendations. The
+        run's portfolio summary is left on self.portfolio_summary."""
         profile, _created_cards = self.command.create_test_scenario(scenario)
 
         # Mirrors run_scenario.run_scenario: a strategy preset supplies the
@@ -66,7 +68,9 @@ class CreditCardTestBase(TestCase):
         apply_strategy_to_roadmap(roadmap, strategy)
 
         engine = RecommendationEngine(profile, strategy=strategy)
-        recommendations = engine.generate_quick_recommendations(roadmap)
+        result = engine.generate_quick_recommendations(roadmap)
+        recommendations = result['recommendations']
+        self.portfolio_summary = result['portfolio_summary']
 
         # DUMP_SCENARIOS=1 prints every scenario's full results BEFORE the
         # assertions — the recalibration workflow needs the actual numbers
@@ -76,9 +80,28 @@ class CreditCardTestBase(TestCase):
         if os.environ.get('DUMP_SCENARIOS'):
             self.print_scenario_results(scenario, recommendations)
 
+        self.assert_response_parity(result)
         self.assert_expectations(scenario, recommendations)
         return recommendations
 
+    def assert_response_parity(self, result):
+        """roadmaps/responses.py must render the same bytes as the DRF
+        serializers it stands in for, for the full response and for each
+        streamed headline."""
+        from rest_framework.renderers import JSONRenderer
+        from roadmaps.responses import build_recommendation_response, recommendation_headline
+        from roadmaps.serializers import (
+            RecommendationHeadlineSerializer, RoadmapRecommendationResponseSerializer)
+
+        render = JSONRenderer().render
+        recommendations = result['recommendations']
+        self.assertEqual(
+            render(build_recommendation_response(result)),
+            render(RoadmapRecommendationResponseSerializer(result).data))
+        self.assertEqual(
+            render([recommendation_headline(rec) for rec in recommendations]),
+            render(RecommendationHeadlineSerializer(recommendations, many=True).data))
+
     def assert_expectations(self, scenario, recommendations):
         """Validate recommendations against the scenario's expectations,
         reusing the management command's validators."""
@@ -190,7 +213,7 @@ class CreditCardTestBase(TestCase):
             for breakdown in rec.get('rewards_breakdown') or []:
                 print(f"     • {breakdown['category_name']}: {breakdown['calculation']}")
 
-        bonus_capacity = recommendations[0].get('portfolio_summary', {}).get('bonus_capacity')
+        bonus_capacity = self.portfolio_summary.get('bonus_capacity')
         if bonus_capacity:
             print(f"\nBonus capacity: {bonus_capacity['months_committed']}/"
                  f"{bonus_capacity['capacity_months']} months committed")
@@ -156,6 +156,37 @@ class JSONScenarioTest(JSONScenarioTestBase):
         recommendations = self.run_scenario_test(scenario)
         self.print_scenario_results(scenario, recommendations)
 
+    def test_multi_player_household_plans_are_exhaustive(self):
+        """Every multi_player.json household is assigned by a complete
+        search, well inside the planner's node budget."""
+        if not self.scenarios:
+            self.skipTest("No scenarios found in JSON file")
+        from unittest import mock
+        from django.db import transaction
+        from roadmaps.engine.household import HouseholdPlanner
+
+        plans = []
+        original = HouseholdPlanner.plan_applications
+
+        def recording(planner, *args, **kwargs):
+            result = original(planner, *args, **kwargs)
+            plans.append(planner.last_plan)
+            return result
+
+        scenarios = [s for s in self.scenarios if 'entities' in s]
+        self.assertTrue(scenarios)
+        with mock.patch.object(HouseholdPlanner, 'plan_applications', recording):
+            for scenario in scenarios:
+                with self.subTest(scenario=scenario['name']):
+                    plans.clear()
+                    sid = transaction.savepoint()
+                    try:
+                        self.run_scenario_test(scenario)
+                    finally:
+                        transaction.savepoint_rollback(sid)
+                    self.assertTrue(plans)
+                    self.assertTrue(all(plan['exhaustive'] for plan in plans))
+
     def test_bonus_capacity_defers_third_card(self):
         """Phase E: two $10K bonuses fit a $2K/mo year. Selection is now
         capacity-aware (_bonus_capacity_plan), so the third card's bonus is
@@ -170,7 +201,7 @@ class JSONScenarioTest(JSONScenarioTestBase):
             self.skipTest("No scenarios found in JSON file")
         scenario = self.get_scenario('Bonus capacity - only two 10K bonuses fit a year')
         recommendations = self.run_scenario_test(scenario)
-        capacity = recommendations[0]['portfolio_summary']['bonus_capacity']
+        capacity = self.portfolio_summary['bonus_capacity']
         self.assertEqual(capacity['deferred_applies'], [])
         self.assertAlmostEqual(capacity['months_committed'], 10.0, places=1)
         self.print_scenario_results(scenario, recommendations)
@@ -242,7 +273,7 @@ class JSONScenarioTest(JSONScenarioTestBase):
         scenario = self.get_scenario(
             'Bonus sequencing - selection never wastes a slot on an unrealizable bonus')
         recommendations = self.run_scenario_test(scenario)
-        capacity = recommendations[0]['portfolio_summary']['bonus_capacity']
+        capacity = self.portfolio_summary['bonus_capacity']
         self.assertEqual(capacity['deferred_applies'], [])
         self.assertAlmostEqual(capacity['months_committed'], 12.0, places=1)
         self.print_scenario_results(scenario, recommendations)
@@ -268,7 +299,7 @@ class JSONScenarioTest(JSONScenarioTestBase):
             "Breakdown must carry the deferral info line")
         self.assertEqual(strong['recommended_month'], 0,
                          "Bonus-less applies consume no budget — apply whenever")
-        capacity = recommendations[0]['portfolio_summary']['bonus_capacity']
+        capacity = self.portfolio_summary['bonus_capacity']
         self.assertEqual(capacity['deferred_applies'], [])
         self.assertAlmostEqual(capacity['months_committed'], 12.0, places=1)
         self.assertIn('Sequencing Strong Ongoing Card', capacity['bonus_less_applies'])
@@ -281,7 +312,7 @@ class JSONScenarioTest(JSONScenarioTestBase):
             self.skipTest("No scenarios found in JSON file")
         scenario = self.get_scenario('Bonus sequencing - two-card ordering by density')
         recommendations = self.run_scenario_test(scenario)
-        capacity = recommendations[0]['portfolio_summary']['bonus_capacity']
+        capacity = self.portfolio_summary['bonus_capacity']
         self.assertAlmostEqual(capacity['months_committed'], 9.0, places=1)
         self.print_scenario_results(scenario, recommendations)
 
@@ -0,0 +1,78 @@
+"""Tests for RewardWindowIndex, the engine's in-memory view of date-aware
+reward categories (cards/reward_windows.py)."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from .models import (
+    CatalogVersion, CreditCard, Issuer, RewardCategory, RewardType, SpendingCategory,
+)
+from .reward_windows import RewardWindowIndex, reward_window_index
+
+
+class RewardWindowIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        issuer = Issuer.objects.create(name='Chase', slug='chase')
+        cashback = RewardType.objects.create(name='Cashback', slug='cashback')
+        cls.dining, other, amazon, gas = (
+            SpendingCategory.objects.create(name=slug, slug=slug, display_name=slug.title())
+            for slug in ('dining', 'other', 'amazon', 'gas'))
+
+        def card(name, slug, *rewards):
+            card_obj = CreditCard.objects.create(
+                name=name, slug=slug, issuer=issuer,
+                signup_bonus_type=cashback, primary_reward_type=cashback)
+            for category, rate, start, end in rewards:
+                RewardCategory.objects.create(
+                    card=card_obj, category=category, reward_rate=Decimal(rate),
+                    reward_type=cashback, start_date=start, end_date=end)
+            return card_obj
+
+        # Permanent rates plus one current and one expired rotating window,
+        # whose edges the boundary test walks across.
+        cls.flex = card(
+            'Freedom Flex', 'freedom-flex',
+            (cls.dining, '3', None, None), (other, '1', None, None),
+            (amazon, '5', date(2026, 4, 1), date(2026, 6, 30)),
+            (gas, '5', date(2025, 1, 1), date(2025, 3, 31)))
+        cls.flat = card(
+            'Flat Two', 'flat-two',
+            (other, '2', None, None), (cls.dining, '2', None, None))
+
+    def test_matches_active_on_around_every_boundary(self):
+        index = RewardWindowIndex()
+        edges = [date(2025, 1, 1), date(2025, 3, 31), date(2026, 4, 1), date(2026, 6, 30)]
+        days = [edge + timedelta(days=delta) for edge in edges for delta in (-1, 0, 1)]
+        for card in (self.flex, self.flat):
+            for day in days:
+                expected = list(card.reward_categories.active_on(day)
+                                .order_by('id').values_list('id', flat=True))
+                self.assertEqual([rc.id for rc in index.active(card, day)], expected, (card, day))
+
+    def test_loads_many_cards_in_one_query(self):
+        index = RewardWindowIndex()
+        with self.assertNumQueries(1):
+            index.load([self.flex, self.flat, self.flex])
+        with self.assertNumQueries(0):
+            rows = index.active(self.flex, date(2026, 5, 1))
+            self.assertEqual({rc.category.slug for rc in rows}, {'dining', 'other', 'amazon'})
+
+    def test_card_saved_since_indexing_is_read_again(self):
+        index = RewardWindowIndex()
+        index.load([self.flat])
+        RewardCategory.objects.filter(card=self.flat, category=self.dining).update(is_active=False)
+        self.flat.save()
+        self.assertEqual(
+            [rc.category.slug for rc in index.active(self.flat, date(2026, 5, 1))], ['other'])
+
+    def test_process_index_dropped_on_reward_category_save_and_catalog_bump(self):
+        index = reward_window_index()
+        self.assertIs(reward_window_index(), index)
+        RewardCategory.objects.get(card=self.flat, category=self.dining).save()
+        fresh = reward_window_index()
+        self.assertIsNot(fresh, index)
+        CatalogVersion.bump(source='test')
+        self.assertIsNot(reward_window_index(), fresh)
@@ -26,12 +26,13 @@ from roadmaps.models import Roadmap
 
 # Root-level named routes that are not pages, and so are out of scope here.
 # The API routes under api/cards/, api/roadmaps/ and api/users/ are URLResolver
-# includes and drop out on their own; `api_home` is a bare path() at the root
-# and has to be named explicitly.
-NON_PAGE_ROUTE_NAMES = {'api_home'}
+# includes and drop out on their own; `api_home`, the wallet's service
+# worker script and the metrics endpoint are bare path()s at the root and
+# have to be named explicitly.
+NON_PAGE_ROUTE_NAMES = {'api_home', 'wallet_sw', 'metrics'}
 
 # `wallet` is the one page route that requires a login. It has no
-# `login_required` decorator — cards/wallet.py:94 redirects by hand — which is
+# `login_required` decorator — cards/wallet.py:161 redirects by hand — which is
 # why a grep for the decorator says every page is anonymous.
 LOGIN_REQUIRED_ROUTE_NAMES = {'wallet'}
 
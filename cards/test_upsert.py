@@ -0,0 +1,73 @@
+"""Tests for bulk_upsert on backends without a conflict target (MySQL)."""
+
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.constants import OnConflict
+from django.test import TestCase
+
+from .models import (
+    CardCredit, CreditCard, Issuer, RewardType, SpendingCategory, SpendingCredit,
+    UserCreditUsage, UserSpendingCreditPreference,
+)
+
+
+@contextmanager
+def targetless_upserts():
+    """Make SQLite upsert the way MySQL does: no conflict target, any
+    unique key matches (SQLite's `ON CONFLICT DO UPDATE` without a target,
+    the closest it has to ON DUPLICATE KEY UPDATE), and return no rows
+    from the insert. Django rejects `unique_fields` here as on MySQL."""
+    suffix_sql = connection.ops.on_conflict_suffix_sql
+
+    def on_conflict_suffix_sql(fields, on_conflict, update_fields, unique_fields):
+        if on_conflict != OnConflict.UPDATE:
+            return suffix_sql(fields, on_conflict, update_fields, unique_fields)
+        return 'ON CONFLICT DO UPDATE SET ' + ', '.join(
+            f'{name} = EXCLUDED.{name}' for name in map(connection.ops.quote_name, update_fields))
+
+    features = connection.features
+    with mock.patch.object(features, 'supports_update_conflicts_with_target', False), \
+            mock.patch.object(type(features), 'can_return_rows_from_bulk_insert', False), \
+            mock.patch.object(connection.ops, 'on_conflict_suffix_sql', on_conflict_suffix_sql):
+        yield
+
+
+class TargetlessUpsertTests(TestCase):
+    def setUp(self):
+        category = SpendingCategory.objects.create(name='Travel', slug='travel')
+        SpendingCredit.objects.create(
+            name='Airport Lounge', slug='airport_lounge', display_name='Airport Lounge Access',
+            category=category, stackable=False)
+        cashback = RewardType.objects.create(name='Cashback', slug='cashback')
+        card = CreditCard.objects.create(
+            name='Test Card', slug='test-card',
+            issuer=Issuer.objects.create(name='Generic Bank', slug='generic-bank'),
+            signup_bonus_type=cashback, primary_reward_type=cashback)
+        self.credit = CardCredit.objects.create(
+            card=card, description='Monthly Credit', value=10.0, times_per_year=12)
+        self.client.force_login(User.objects.create_user(username='u', password='x'))
+
+    def _put_twice(self, url, first, second):
+        with targetless_upserts():
+            for body in (first, second):
+                response = self.client.put(url, body, content_type='application/json')
+                self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_credit_preferences_put(self):
+        data = self._put_twice(
+            '/api/cards/credit-preferences/',
+            {'preferences': {'airport_lounge': True}},
+            {'preferences': {'airport_lounge': False}})
+        self.assertEqual(data['preferences'], {'airport_lounge': False})
+        self.assertEqual(UserSpendingCreditPreference.objects.count(), 1)
+
+    def test_credit_usage_put(self):
+        key = str(self.credit.id)
+        data = self._put_twice(
+            '/api/cards/credit-usage/', {'usages': {key: True}}, {'usages': {key: False}})
+        self.assertEqual(data['usages'], {key: False})
+        self.assertEqual(UserCreditUsage.objects.count(), 1)
@@ -11,7 +11,7 @@ from .models import (
     CreditCard, Issuer, RewardCategory, RewardType, SpendingCategory,
     UserCard,
 )
-from .wallet import build_wallet_rows, quarter_end
+from .wallet import build_wallet_rows, quarter_end, serialize_wallet
 
 
 class WalletTestCase(TestCase):
@@ -117,6 +117,81 @@ class WalletTestCase(TestCase):
         self.assertContains(response, 'Freedom Flex')
         self.assertContains(response, 'All other purchases')
 
+    # The JSON snapshot the wallet's service worker caches for offline use.
+
+    def payload(self, today):
+        rows, base = build_wallet_rows(self.user, today)
+        return serialize_wallet(rows, base, 2, today)
+
+    def test_expiry_is_day_after_earliest_rotating_end(self):
+        # Amazon 5% runs to Jun 30: the payload is wrong from Jul 1.
+        payload = self.payload(date(2026, 6, 11))
+        self.assertEqual(payload['expires'], '2026-07-01')
+        amazon = next(r for r in payload['rows'] if r['category'] == 'Amazon')
+        self.assertEqual(amazon['end_date'], '2026-06-30')
+        self.assertEqual(amazon['unit'], '%')
+
+    def test_expiry_capped_at_quarter_boundary_without_rotating_rows(self):
+        payload = self.payload(date(2026, 2, 1))
+        self.assertEqual(payload['expires'], '2026-04-01')
+
+    def test_version_tracks_content_not_generation_date(self):
+        same_a = self.payload(date(2026, 6, 11))
+        same_b = self.payload(date(2026, 6, 12))
+        self.assertNotEqual(same_a['generated'], same_b['generated'])
+        self.assertEqual(same_a['version'], same_b['version'])
+
+        UserCard.objects.filter(card=self.flex).update(closed_date=date(2026, 1, 1))
+        self.assertNotEqual(self.payload(date(2026, 6, 11))['version'], same_a['version'])
+
+    def test_data_endpoint_requires_login(self):
+        response = self.client.get(reverse('cards:wallet-data'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_data_endpoint_etag_round_trip(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('cards:wallet-data'))
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(response['ETag'], f'"{payload["version"]}"')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        again = self.client.get(
+            reverse('cards:wallet-data'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_page_embeds_payload_version(self):
+        self.client.force_login(self.user)
+        version = self.client.get(reverse('cards:wallet-data')).json()['version']
+        page = self.client.get(reverse('wallet'))
+        self.assertContains(page, f'data-version="{version}"')
+
+    def test_service_worker_served_within_wallet_scope(self):
+        response = self.client.get(reverse('wallet_sw'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/javascript')
+        self.assertTrue(reverse('wallet_sw').startswith(reverse('wallet')))
+        self.assertContains(response, reverse('cards:wallet-data'))
+
+    def test_cached_responses_carry_their_owner(self):
+        # The service worker and base.js drop cached wallet responses whose
+        # owner isn't the user a freshly rendered page is for.
+        other = User.objects.create_user(username='sam', password='x')
+        owners = []
+        for user in (self.user, other):
+            self.client.force_login(user)
+            page = self.client.get(reverse('wallet'))
+            data = self.client.get(reverse('cards:wallet-data'))
+            self.assertEqual(page['X-Wallet-Owner'], data['X-Wallet-Owner'])
+            self.assertContains(
+                self.client.get(reverse('landing')),
+                f'data-wallet-owner="{page["X-Wallet-Owner"]}"')
+            owners.append(page['X-Wallet-Owner'])
+        self.assertNotEqual(owners[0], owners[1])
+
+        self.client.logout()
+        self.assertContains(self.client.get(reverse('landing')), 'data-wallet-owner=""')
+
 
 class QuarterEndTest(TestCase):
     def test_quarter_ends(self):
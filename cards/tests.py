@@ -1,6 +1,8 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
 from django.db import IntegrityError, transaction
+from django.utils import timezone
 
 from .models import (
     SpendingCategory, SpendingCredit, UserSpendingProfile,
@@ -66,6 +68,31 @@ class CreditPreferencesAPITests(TestCase):
         get_response = self.client.get('/api/cards/credit-preferences/')
         self.assertEqual(get_response.json(), {'preferences': {'uber_eats': True}})
 
+    def test_put_updates_existing_rows_in_one_upsert(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        user = User.objects.create_user(username='u', password='x')
+        self.client.force_login(user)
+        self.client.put(
+            '/api/cards/credit-preferences/',
+            {'preferences': {'airport_lounge': True, 'uber_eats': True}},
+            content_type='application/json')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(
+                '/api/cards/credit-preferences/',
+                {'preferences': {'airport_lounge': False, 'uber_eats': True, 'nope': True}},
+                content_type='application/json')
+        self.assertEqual(response.json()['preferences'], {
+            'airport_lounge': False, 'uber_eats': True,
+        })
+        table = UserSpendingCreditPreference._meta.db_table
+        writes = [q['sql'] for q in ctx.captured_queries
+                  if table in q['sql'] and not q['sql'].startswith('SELECT')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(UserSpendingCreditPreference.objects.count(), 2)
+
     def test_put_unknown_slug_ignored(self):
         response = self.client.put(
             '/api/cards/credit-preferences/',
@@ -404,6 +431,58 @@ class CreditUsageTests(TestCase):
         })
 
 
+    def test_put_updates_existing_rows_in_one_upsert(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        user = User.objects.create_user(username='u', password='x')
+        self.client.force_login(user)
+        self.client.put(
+            '/api/cards/credit-usage/',
+            {'usages': {str(self.credit_monthly.id): True}},
+            content_type='application/json')
+
+        self.credit_annual.is_active = False
+        self.credit_annual.save()
+        payload = {
+            str(self.credit_monthly.id): False,
+            str(self.credit_quarterly.id): True,
+            str(self.credit_annual.id): True,
+            'not-an-id': True,
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(
+                '/api/cards/credit-usage/', {'usages': payload}, content_type='application/json')
+        self.assertEqual(response.json()['usages'], {
+            str(self.credit_monthly.id): False,
+            str(self.credit_quarterly.id): True,
+        })
+        table = UserCreditUsage._meta.db_table
+        writes = [q['sql'] for q in ctx.captured_queries
+                  if table in q['sql'] and not q['sql'].startswith('SELECT')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(UserCreditUsage.objects.count(), 2)
+
+    def test_current_matches_get_period_key(self):
+        profile = UserSpendingProfile.objects.create()
+        on = date(2026, 7, 18)
+        for credit in (self.credit_monthly, self.credit_quarterly,
+                       self.credit_semiannual, self.credit_annual):
+            UserCreditUsage.objects.create(
+                profile=profile, card_credit=credit, period_key=credit.get_period_key(on))
+            UserCreditUsage.objects.create(
+                profile=profile, card_credit=credit, period_key=credit.get_period_key(date(2025, 1, 1)))
+        # A yearly key on a monthly credit is not its current period.
+        UserCreditUsage.objects.create(
+            profile=profile, card_credit=self.credit_monthly, period_key='2026')
+
+        current = UserCreditUsage.objects.current(on)
+        self.assertEqual(
+            sorted(current.values_list('card_credit__description', 'period_key')),
+            [('Annual Credit', '2026'), ('Monthly Credit', '2026-07'),
+             ('Quarterly Credit', '2026-Q3'), ('Semi-Annual Credit', '2026-H2')])
+
+
 class TemplatePagesTests(TestCase):
     def setUp(self):
         from django.contrib.sites.models import Site
@@ -567,3 +646,289 @@ class CreditMathBuilderAPITests(TestCase):
         unclaimed_data = next(c for c in results if c['slug'] == 'unclaimed')
         self.assertIsNone(unclaimed_data['typical_value'])
 
+
+
+class SharedProfileDataTests(TestCase):
+    """Shared-profile card_recommendations come from the engine's allocation
+    over the owner's cards, and the payload is cached per share_uuid."""
+
+    def setUp(self):
+        import uuid
+        from decimal import Decimal
+        from django.core.cache import cache
+        from .models import RewardCategory, SpendingAmount
+        cache.clear()
+        self.SpendingAmount = SpendingAmount
+
+        cashback = RewardType.objects.create(name='Cashback', slug='cashback')
+        issuer = Issuer.objects.create(name='Share Bank', slug='share-bank')
+        self.travel = SpendingCategory.objects.create(name='travel', slug='travel', display_name='Travel')
+        self.airlines = SpendingCategory.objects.create(
+            name='airlines', slug='airlines', display_name='Airlines', parent=self.travel)
+        self.dining = SpendingCategory.objects.create(name='dining', slug='dining', display_name='Dining')
+        self.gas = SpendingCategory.objects.create(name='gas', slug='gas', display_name='Gas')
+        other = SpendingCategory.objects.create(name='other', slug='other', display_name='Other')
+
+        def card(name, rates):
+            c = CreditCard.objects.create(
+                name=name, slug=name.lower().replace(' ', '-'), issuer=issuer,
+                signup_bonus_type=cashback, primary_reward_type=cashback)
+            for category, rate in rates:
+                RewardCategory.objects.create(
+                    card=c, category=category, reward_rate=Decimal(rate), reward_type=cashback)
+            return c
+
+        self.travel_card = card('Trip Card', [(self.travel, '3'), (other, '1')])
+        self.dining_card = card('Dine Card', [(self.dining, '4'), (other, '1.5')])
+
+        self.user = User.objects.create_user(username='sharer', password='x')
+        self.profile = UserSpendingProfile.objects.create(
+            user=self.user, privacy_setting='public', share_uuid=uuid.uuid4())
+        for category, amount in [(self.airlines, 400), (self.dining, 300), (self.gas, 100)]:
+            SpendingAmount.objects.create(profile=self.profile, category=category, monthly_amount=amount)
+        UserCard.objects.create(user=self.user, card=self.travel_card)
+        UserCard.objects.create(user=self.user, card=self.dining_card)
+        self.url = f'/api/cards/profile/shared/{self.profile.share_uuid}/'
+
+    def recommendations(self):
+        return {r['category']: r for r in self.client.get(self.url).json()['card_recommendations']}
+
+    def test_parent_category_rate_and_base_rate_fallback(self):
+        recs = self.recommendations()
+        # Airlines rolls up to the travel card's 3x parent rate...
+        self.assertEqual(recs['Airlines']['recommended_card'], 'Trip Card')
+        self.assertEqual(recs['Airlines']['reward_rate'], '3x')
+        self.assertEqual(recs['Dining']['recommended_card'], 'Dine Card')
+        self.assertEqual(recs['Dining']['reward_rate'], '4x')
+        # ...and gas, which no card bonuses, goes to the best base rate.
+        self.assertEqual(recs['Gas']['recommended_card'], 'Dine Card')
+        self.assertEqual(recs['Gas']['reward_rate'], '1.5x')
+
+    def test_payload_cached_until_profile_edit(self):
+        self.recommendations()
+        with self.assertNumQueries(1):  # just the public-profile lookup
+            self.client.get(self.url)
+
+        UserCard.objects.filter(card=self.dining_card).update(closed_date='2026-01-01')
+        self.assertEqual(self.recommendations()['Dining']['recommended_card'], 'Dine Card')
+
+        # A signal-firing edit retires the cached payload.
+        self.SpendingAmount.objects.filter(category=self.gas).get().save()
+        self.assertEqual(self.recommendations()['Dining']['recommended_card'], 'Trip Card')
+
+    def test_edit_in_another_process_retires_this_process_cache(self):
+        from django.db.models import F
+        self.recommendations()
+        UserCard.objects.filter(card=self.dining_card).update(closed_date='2026-01-01')
+        # What another worker's signal receiver writes; this process's
+        # cache never hears of it, but the version is on the profile row.
+        UserSpendingProfile.objects.filter(pk=self.profile.pk).update(
+            share_version=F('share_version') + 1)
+        self.assertEqual(self.recommendations()['Dining']['recommended_card'], 'Trip Card')
+
+    def test_profile_saves_never_roll_share_version_back(self):
+        from .caching import shared_profile_cache_key
+        keys = {shared_profile_cache_key(UserSpendingProfile.objects.get(pk=self.profile.pk))}
+        # self.profile is stale: the spending and card rows created after
+        # it have bumped the version in the database since.
+        for _ in range(2):
+            self.profile.save()
+            stored = UserSpendingProfile.objects.get(pk=self.profile.pk)
+            self.assertEqual(self.profile.share_version, stored.share_version)
+            keys.add(shared_profile_cache_key(self.profile))
+        self.assertEqual(len(keys), 3)
+
+    def test_private_profile_not_served_from_cache(self):
+        self.recommendations()
+        UserSpendingProfile.objects.filter(pk=self.profile.pk).update(privacy_setting='private')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class MessagePackRendererTests(TestCase):
+    def test_packb_matches_the_spec_encodings(self):
+        from decimal import Decimal
+        from .renderers import packb
+        self.assertEqual(packb({'a': 1}), b'\x81\xa1a\x01')
+        self.assertEqual(packb([None, True, False, -1, -33, 300]),
+                         b'\x96\xc0\xc3\xc2\xff\xd0\xdf\xcd\x01\x2c')
+        self.assertEqual(packb(1.5), b'\xcb\x3f\xf8' + b'\x00' * 6)
+        self.assertEqual(packb('x' * 40), b'\xd9\x28' + b'x' * 40)
+        self.assertEqual(packb(list(range(16)))[:3], b'\xdc\x00\x10')
+        # Non-native values go through DRF's JSON encoder, as in JSON.
+        self.assertEqual(packb(Decimal('2.5')), packb(2.5))
+
+    def test_card_list_negotiates_messagepack(self):
+        from .renderers import packb
+        issuer = Issuer.objects.create(name='Pack Bank', slug='pack-bank')
+        reward_type = RewardType.objects.create(name='Points', slug='points')
+        CreditCard.objects.create(
+            name='Pack Card', slug='pack-card', issuer=issuer,
+            primary_reward_type=reward_type, signup_bonus_type=reward_type)
+
+        as_json = self.client.get('/api/cards/cards/').json()
+        response = self.client.get('/api/cards/cards/', HTTP_ACCEPT='application/x-msgpack')
+        self.assertEqual(response['Content-Type'], 'application/x-msgpack')
+        self.assertEqual(response.content, packb(as_json))
+
+
+class IndexAdvisorTests(TestCase):
+    def test_reports_every_hot_endpoint_and_keeps_nothing(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from roadmaps.models import Roadmap
+        from .management.commands.index_advisor import HOT_ENDPOINTS
+
+        user = User.objects.create_user(username='advised', password='x')
+        profile = UserSpendingProfile.objects.create(user=user)
+        category = SpendingCategory.objects.create(name='Dining', slug='dining')
+        profile.spending_amounts.create(category=category, monthly_amount=400)
+
+        out = StringIO()
+        call_command('index_advisor', '--username', 'advised', stdout=out, stderr=StringIO())
+        for method, path in HOT_ENDPOINTS:
+            self.assertIn(f'{method} {path}:', out.getvalue())
+        self.assertFalse(Roadmap.objects.filter(profile=profile).exists())
+
+    def test_fail_on_scan_honours_ignored_tables(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command('index_advisor', '--fail-on-scan', stdout=StringIO(), stderr=StringIO())
+        call_command('index_advisor', '--fail-on-scan',
+                     '--ignore', 'cards_creditcard', '--ignore', 'cards_spendingcategory',
+                     stdout=StringIO(), stderr=StringIO())
+
+    def test_plan_parsing(self):
+        from .management.commands.index_advisor import postgres_full_scans, sqlite_full_scans
+        tables = {'cards_usercard', 'cards_issuer'}
+        self.assertEqual(sqlite_full_scans([
+            (2, 0, 0, 'SCAN cards_issuer'),
+            (3, 0, 0, 'SEARCH cards_usercard USING INDEX usercard_user_closed (user_id=?)'),
+            (4, 0, 0, 'SCAN CONSTANT ROW'),
+        ], tables), ['cards_issuer'])
+        self.assertEqual(sqlite_full_scans([
+            (2, 0, 0, 'SCAN cards_usercard USING INDEX usercard_user_closed'),
+            (3, 0, 0, 'SCAN cards_issuer USING COVERING INDEX cards_issuer_slug'),
+        ], tables), ['cards_usercard', 'cards_issuer'])
+        self.assertEqual(postgres_full_scans({
+            'Node Type': 'Hash Join', 'Plans': [
+                {'Node Type': 'Seq Scan', 'Relation Name': 'cards_issuer'},
+                {'Node Type': 'Index Scan', 'Relation Name': 'cards_usercard'},
+            ]}), ['cards_issuer'])
+
+
+class GcAnonymousTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.contrib.sessions.backends.db import SessionStore
+        from roadmaps.models import Roadmap, RoadmapCalculation, RoadmapFilter
+
+        def anon_profile(session_key, public=False, filters=()):
+            profile = UserSpendingProfile.objects.create(session_key=session_key)
+            roadmap = Roadmap.objects.create(profile=profile, name='Current Roadmap')
+            RoadmapCalculation.objects.create(
+                roadmap=roadmap, total_estimated_rewards=0, calculation_data={'response': {}})
+            roadmap.filters.add(self.shared_filter, *filters)
+            if public:
+                roadmap.privacy_setting = 'public'
+                roadmap.generate_share_uuid()
+                roadmap.save()
+            return profile
+
+        self.shared_filter = RoadmapFilter.objects.create(
+            name='No fee', filter_type='annual_fee', value='0')
+        # Linked to no roadmap, as if just made in the admin: not GC's to delete.
+        self.unlinked_filter = RoadmapFilter.objects.create(
+            name='Chase', filter_type='issuer', value='Chase')
+        self.expired_filter = RoadmapFilter.objects.create(
+            name='Amex', filter_type='issuer', value='Amex')
+
+        live = SessionStore()
+        live.create()
+        expired = SessionStore()
+        expired.create()
+        Session.objects.filter(session_key=expired.session_key).update(
+            expire_date=timezone.now() - timedelta(days=1))
+
+        self.expired = anon_profile(expired.session_key, filters=[self.expired_filter])
+        self.sessionless = anon_profile(None, filters=[self.expired_filter])
+        self.live = anon_profile(live.session_key)
+        self.shared = anon_profile('gone-but-shared', public=True)
+        self.user_profile = UserSpendingProfile.objects.create(
+            user=User.objects.create_user(username='kept', password='x'))
+        self.recent = anon_profile('gone-but-recent')
+
+        UserSpendingProfile.objects.exclude(pk=self.recent.pk).update(
+            updated_at=timezone.now() - timedelta(days=3))
+
+    def _run(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('gc_anonymous', '--pause', '0', '--batch-size', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_expired_anonymous_state_only(self):
+        from roadmaps.models import Roadmap, RoadmapCalculation, RoadmapFilter
+
+        output = self._run()
+
+        remaining = set(UserSpendingProfile.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {
+            self.live.pk, self.shared.pk, self.user_profile.pk, self.recent.pk})
+        self.assertEqual(Roadmap.objects.count(), 3)
+        self.assertEqual(RoadmapCalculation.objects.count(), 3)
+        self.assertEqual(set(RoadmapFilter.objects.all()),
+                         {self.shared_filter, self.unlinked_filter})
+        self.assertFalse(Session.objects.filter(expire_date__lt=timezone.now()).exists())
+        self.assertIn('expired anonymous profiles: 2 deleted', output)
+        self.assertIn('orphaned roadmap filters: 1 deleted', output)
+        self.assertIn('Reclaimed', output)
+
+    def test_dry_run_deletes_nothing(self):
+        output = self._run('--dry-run')
+        self.assertIn('expired anonymous profiles: 2 would be deleted', output)
+        self.assertIn('orphaned roadmap filters: 1 would be deleted', output)
+        self.assertEqual(UserSpendingProfile.objects.count(), 6)
+
+
+class CompileCatalogTests(SimpleTestCase):
+    def test_artifact_holds_the_catalog_and_restores_into_memory(self):
+        import json
+        import os
+        import shutil
+        import sqlite3
+        import tempfile
+        from io import StringIO
+        from types import SimpleNamespace
+        from django.conf import settings
+        from django.core.management import call_command
+        from .catalog_artifact import restore_catalog
+
+        source = settings.BASE_DIR / 'data' / 'input'
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, 'input')
+            shutil.copytree(source / 'system', os.path.join(data_dir, 'system'))
+            os.makedirs(os.path.join(data_dir, 'cards'))
+            shutil.copy(source / 'cards' / 'chase.json', os.path.join(data_dir, 'cards'))
+            shutil.copy(source / 'cards' / 'personal.json', os.path.join(data_dir, 'cards'))
+            output = os.path.join(tmp, 'catalog.sqlite3')
+
+            out = StringIO()
+            call_command('compile_catalog', '--output', output, '--data-dir', data_dir, stdout=out)
+            self.assertIn('Wrote', out.getvalue())
+
+            with open(source / 'cards' / 'chase.json') as f:
+                slugs = {card['slug'] for card in json.load(f) if card.get('verified')}
+            memory = SimpleNamespace(connection=sqlite3.connect(':memory:'))
+            restore_catalog(memory, output)
+            compiled = {slug for slug, in memory.connection.execute(
+                'SELECT slug FROM cards_creditcard')}
+            self.assertEqual(compiled, slugs)
+            # Card ownership in personal.json is not catalog data.
+            self.assertEqual(memory.connection.execute(
+                'SELECT COUNT(*) FROM cards_usercard').fetchone()[0], 0)
+            self.assertGreater(memory.connection.execute(
+                'SELECT COUNT(*) FROM cards_spendingcredit').fetchone()[0], 0)
@@ -0,0 +1,20 @@
+"""
+One-statement inserts that update the rows already there.
+
+`bulk_create(update_conflicts=True)` needs a conflict target
+(`unique_fields`) on SQLite and Postgres, but MySQL, which production runs
+on, has no such clause: its ON DUPLICATE KEY UPDATE matches any unique key,
+and Django refuses `unique_fields` there. The target is passed only where
+the backend takes one, so every model upserted through here must have
+`unique_fields` as its only unique key besides the primary key.
+"""
+from django.db import connection
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields):
+    """Insert `objs`, updating `update_fields` on those whose
+    `unique_fields` match an existing row."""
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields
+    return model.objects.bulk_create(objs, **options)
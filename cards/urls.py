@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, wallet
 
 app_name = 'cards'
 
@@ -24,6 +24,7 @@ urlpatterns = [
     path('profile/shared/<uuid:share_uuid>/', views.shared_profile_data_view, name='shared-profile-data'),
     path('credit-preferences/', views.credit_preferences_view, name='credit-preferences'),
     path('credit-usage/', views.credit_usage_view, name='credit-usage'),
+    path('wallet/', wallet.wallet_data_view, name='wallet-data'),
 
     # Quick recommendations
     path('recommendations/preview/', views.card_recommendations_preview, name='recommendations-preview'),
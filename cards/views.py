@@ -7,7 +7,12 @@ from django.db.models import Q, ProtectedError, RestrictedError
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import Http404
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.gzip import gzip_page
+from django.core.cache import cache
+
+from creditcard_guru.metrics import cache_requests
 
 from .models import (
     Issuer, RewardType, SpendingCategory, CreditCard,
@@ -24,6 +29,9 @@ from .serializers import (
     CategoryWithRewardsSerializer, RecommendationPreviewSerializer,
     SharedProfileDataSerializer
 )
+from .caching import SHARED_PROFILE_CACHE_TIMEOUT, shared_profile_cache_key
+from .renderers import COMPACT_RENDERER_CLASSES
+from .upsert import bulk_upsert
 
 
 
@@ -73,6 +81,7 @@ class SpendingCreditListView(generics.ListAPIView):
         }
 
 
+@method_decorator(gzip_page, name='dispatch')
 class CreditCardListView(generics.ListAPIView):
     queryset = CreditCard.objects.filter(is_active=True).select_related(
         'issuer', 'primary_reward_type', 'signup_bonus_type'
@@ -82,6 +91,7 @@ class CreditCardListView(generics.ListAPIView):
         'credits'
     )
     serializer_class = CreditCardSerializer
+    renderer_classes = COMPACT_RENDERER_CLASSES
     pagination_class = None  # Disable pagination for this view
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = {
@@ -185,30 +195,26 @@ def credit_preferences_view(request):
             session_key=request.session.session_key
         )
 
-    valid_credits = {c.slug: c for c in SpendingCredit.objects.all()}
-    for slug, values_credit in preferences.items():
-        credit = valid_credits.get(slug)
-        if not credit:
-            continue
-        UserSpendingCreditPreference.objects.update_or_create(
-            profile=profile,
-            spending_credit=credit,
-            defaults={'values_credit': bool(values_credit)}
-        )
+    # One upsert for the whole payload; unknown slugs are ignored.
+    bulk_upsert(
+        UserSpendingCreditPreference,
+        [
+            UserSpendingCreditPreference(
+                profile=profile, spending_credit=credit,
+                values_credit=bool(preferences[credit.slug]))
+            for credit in SpendingCredit.objects.filter(slug__in=list(preferences))
+        ],
+        unique_fields=['profile', 'spending_credit'],
+        update_fields=['values_credit'],
+    )
 
     return Response({'preferences': _serialize_credit_preferences(profile)})
 
 
 def _serialize_credit_usages(profile):
     from datetime import date
-    today = date.today()
-    usages_qs = profile.credit_usages.select_related('card_credit').all()
-    usages_dict = {}
-    for usage in usages_qs:
-        current_period = usage.card_credit.get_period_key(today)
-        if usage.period_key == current_period:
-            usages_dict[str(usage.card_credit_id)] = usage.used
-    return usages_dict
+    usages = profile.credit_usages.current(date.today()).values_list('card_credit_id', 'used')
+    return {str(card_credit_id): used for card_credit_id, used in usages}
 
 
 @api_view(['GET', 'PUT'])
@@ -248,20 +254,22 @@ def credit_usage_view(request):
 
     from datetime import date
     today = date.today()
-    
-    valid_credits = {str(c.id): c for c in CardCredit.objects.filter(is_active=True)}
-    for credit_id_str, used_val in usages.items():
-        credit = valid_credits.get(credit_id_str)
-        if not credit:
-            continue
-        
-        period_key = credit.get_period_key(today)
-        UserCreditUsage.objects.update_or_create(
-            profile=profile,
-            card_credit=credit,
-            period_key=period_key,
-            defaults={'used': bool(used_val)}
-        )
+
+    # One upsert for the whole payload; unknown or inactive credits are ignored.
+    credit_ids = [int(key) for key in usages if str(key).isdigit()]
+    bulk_upsert(
+        UserCreditUsage,
+        [
+            UserCreditUsage(
+                profile=profile, card_credit=credit,
+                period_key=credit.get_period_key(today),
+                used=bool(usages[str(credit.id)]))
+            for credit in CardCredit.objects.filter(is_active=True, pk__in=credit_ids)
+            if str(credit.id) in usages
+        ],
+        unique_fields=['profile', 'card_credit', 'period_key'],
+        update_fields=['used', 'updated_at'],
+    )
 
     return Response({'usages': _serialize_credit_usages(profile)})
 
@@ -398,8 +406,8 @@ def card_recommendations_preview(request):
     
     if serializer.is_valid():
         try:
-            recommendations = serializer.generate_recommendations()
-            response_serializer = RecommendationPreviewSerializer({'recommendations': recommendations})
+            response_serializer = RecommendationPreviewSerializer(
+                serializer.generate_recommendations())
             return Response(response_serializer.data)
         except Exception as e:
             return Response(
@@ -604,16 +612,28 @@ def shared_profile_view(request, share_uuid):
 
 @api_view(['GET'])
 def shared_profile_data_view(request, share_uuid):
-    """Get profile data for a shared public profile"""
+    """Get profile data for a shared public profile.
+
+    The payload is cached per share_uuid and share_version (see
+    cards/caching.py); the public-profile lookup still runs every time,
+    so an edit or making a profile private takes effect immediately.
+    """
     try:
         profile = get_object_or_404(
             UserSpendingProfile, 
             share_uuid=share_uuid,
             privacy_setting='public'
         )
-        
-        serializer = SharedProfileDataSerializer(profile)
-        return Response(serializer.data)
+
+        cache_key = shared_profile_cache_key(profile)
+        data = cache.get(cache_key)
+        if data is None:
+            cache_requests.inc(cache='shared_profile', result='miss')
+            data = SharedProfileDataSerializer(profile).data
+            cache.set(cache_key, data, SHARED_PROFILE_CACHE_TIMEOUT)
+        else:
+            cache_requests.inc(cache='shared_profile', result='hit')
+        return Response(data)
         
     except (ValueError, UserSpendingProfile.DoesNotExist):
         return Response(
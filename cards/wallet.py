@@ -3,18 +3,44 @@
 Deliberately independent of the recommendation engine — this answers
 "which card do I swipe?" from owned cards' reward rates alone, so it
 stays fast and trivially verifiable.
+
+The page is also an installable PWA (static/manifest.json). A service
+worker served from /wallet/sw.js caches the page and the JSON payload
+from wallet_data_view, so an in-store open renders from cache instantly
+and revalidates in the background. The payload carries a content version
+(its ETag) and an expiry: the day the earliest rotating category shown
+stops being true.
+
+Cached responses carry X-Wallet-Owner, an opaque key for the signed-in
+user. base.js drops cached wallet entries whenever a page renders for
+anyone else (or for nobody), so after a logout or a change of user the
+wallet never opens on the previous user's cards.
 """
 
-from datetime import date
+import hashlib
+import json
+from datetime import date, timedelta
 
+from django.http import HttpResponseNotModified, JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import salted_hmac
 
 from .models import UserCard, UserSpendingProfile
 
 # Category slugs that represent the unboosted base/catch-all rate.
 BASE_CATEGORY_SLUGS = {'other', 'general'}
 
+OWNER_HEADER = 'X-Wallet-Owner'
+
+
+def wallet_owner(user):
+    """Opaque key for whose wallet a response holds; '' when signed out."""
+    if not user.is_authenticated:
+        return ''
+    return salted_hmac('cards.wallet.owner', str(user.pk)).hexdigest()[:16]
+
 
 def quarter_end(on_date):
     """Last day of the calendar quarter containing on_date."""
@@ -90,22 +116,115 @@ def build_wallet_rows(user, today=None):
     return rows, base_entry
 
 
+def wallet_expiry(rows, base_entry, today):
+    """First date on which the rows may no longer be right.
+
+    That's the day after the earliest rotating end_date on display, capped
+    at the next quarter boundary — the day new rotating categories start
+    even if nothing currently shown ends.
+    """
+    entries = rows + ([base_entry] if base_entry else [])
+    ends = [e['end_date'] for e in entries if e['end_date']]
+    return min(ends + [quarter_end(today)]) + timedelta(days=1)
+
+
+def _serialize_entry(entry):
+    return {
+        'card_label': entry['card_label'],
+        'category': str(entry['category']),
+        'icon': entry['category'].icon,
+        'rate': float(entry['rate']),
+        'unit': '%' if entry['reward_type'] == 'Cashback' else 'x',
+        'end_date': entry['end_date'].isoformat() if entry['end_date'] else None,
+        'is_rotating': entry['is_rotating'],
+        'max_annual_spend': (
+            float(entry['max_annual_spend'])
+            if entry['max_annual_spend'] is not None else None),
+    }
+
+
+def serialize_wallet(rows, base_entry, open_card_count, today):
+    """JSON-ready wallet snapshot, as cached by the service worker.
+
+    `version` hashes everything except `generated`, so it only changes
+    when what the page would show changes — the service worker and page
+    compare it to decide whether to re-render.
+    """
+    body = {
+        'expires': wallet_expiry(rows, base_entry, today).isoformat(),
+        'quarter': (today.month - 1) // 3 + 1,
+        'year': today.year,
+        'quarter_end': quarter_end(today).isoformat(),
+        'open_card_count': open_card_count,
+        'rows': [_serialize_entry(row) for row in rows],
+        'base': _serialize_entry(base_entry) if base_entry else None,
+    }
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8'))
+    return {
+        'version': digest.hexdigest()[:16],
+        'generated': today.isoformat(),
+        **body,
+    }
+
+
+def _open_card_count(user):
+    return UserCard.objects.filter(user=user, closed_date__isnull=True).count()
+
+
 def wallet_view(request):
     if not request.user.is_authenticated:
         return redirect(f"{reverse('account_login')}?next={request.path}")
 
     today = date.today()
     rows, base_entry = build_wallet_rows(request.user, today)
-    open_card_count = UserCard.objects.filter(
-        user=request.user, closed_date__isnull=True
-    ).count()
+    open_card_count = _open_card_count(request.user)
+    payload = serialize_wallet(rows, base_entry, open_card_count, today)
 
     context = {
         'rows': rows,
         'base_entry': base_entry,
         'open_card_count': open_card_count,
         'today': today,
-        'quarter': (today.month - 1) // 3 + 1,
+        'quarter': payload['quarter'],
         'quarter_end': quarter_end(today),
+        'wallet_version': payload['version'],
     }
-    return render(request, 'wallet.html', context)
+    response = render(request, 'wallet.html', context)
+    response[OWNER_HEADER] = wallet_owner(request.user)
+    return response
+
+
+def wallet_data_view(request):
+    """The wallet as JSON, for the service worker's offline cache.
+
+    ETag is the payload version, so a background revalidation that finds
+    nothing changed costs a 304 rather than a re-download.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    today = date.today()
+    rows, base_entry = build_wallet_rows(request.user, today)
+    payload = serialize_wallet(
+        rows, base_entry, _open_card_count(request.user), today)
+
+    etag = f'"{payload["version"]}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(payload)
+    response['ETag'] = etag
+    response[OWNER_HEADER] = wallet_owner(request.user)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def wallet_service_worker_view(request):
+    """Serve the wallet service worker from /wallet/ rather than /static/.
+
+    A worker's scope can't be wider than its own path, so one under
+    /static/js/ could never control the /wallet/ page.
+    """
+    response = render(request, 'wallet_sw.js', content_type='application/javascript')
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'creditcard_guru.settings')
 
 application = get_asgi_application()
+
+# Resolve footer version info now, not on the first request.
+from creditcard_guru.site_metadata import version_info  # noqa: E402
+
+version_info()
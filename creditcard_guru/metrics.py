@@ -0,0 +1,280 @@
+"""Prometheus-style metrics for the API, the engine and catalog imports.
+
+Instrumented code updates the module-level Counter and Histogram objects
+at the bottom of this file; GET /metrics/ renders them in the Prometheus
+text exposition format (version 0.0.4). Every sample is labeled with the
+catalog version it was recorded under, so a p99 regression lines up with
+the card import that caused it.
+
+Under gunicorn, where each worker has its own registry, set METRICS_DIR to
+a directory shared by all of them: every process then writes its samples
+to METRICS_DIR/<pid>.json at most every METRICS_FLUSH_INTERVAL seconds
+(and at exit), and whichever worker answers a scrape sums every file. So
+do management commands, which is how import durations reach the server.
+Files of exited processes are kept so their counts don't drop out of the
+totals; empty the directory before starting the server.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+REGISTRY = {}
+_lock = threading.Lock()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+def _catalog_label():
+    """The catalog version to label a sample with. Reads the process's
+    cached row; only refreshes it outside transactions, so recording a
+    sample never adds a query inside one (or to a test's query count)."""
+    from cards.caching import catalog_version, fresh_catalog_version
+
+    version = fresh_catalog_version()
+    if version is None:
+        if connection.in_atomic_block:
+            return 'unknown'
+        version = catalog_version()
+    return str(version.version)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames) + ('catalog_version',)
+        self._samples = {}
+        REGISTRY[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames[:-1]) + (_catalog_label(),)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._samples[key] = self._samples.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    """Samples are [per-bucket counts (last is +Inf), sum]; rendering makes
+    the counts cumulative."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                sample = self._samples[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            sample[0][index] += 1
+            sample[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the block's run time in seconds; also a decorator."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def snapshot():
+    """{metric name: [[label values, sample], ...]} for this process."""
+    with _lock:
+        return {
+            name: [[list(key), value if metric.kind == 'counter' else [list(value[0]), value[1]]]
+                   for key, value in metric._samples.items()]
+            for name, metric in REGISTRY.items()
+        }
+
+
+def _merge(metric, into, samples):
+    for labels, value in samples:
+        key = tuple(labels)
+        current = into.get(key)
+        if metric.kind == 'counter':
+            into[key] = (current or 0) + value
+        elif current is None:
+            into[key] = [list(value[0]), value[1]]
+        elif len(current[0]) == len(value[0]):  # else flushed by other bucket bounds
+            current[0] = [a + b for a, b in zip(current[0], value[0])]
+            current[1] += value[1]
+
+
+def collect():
+    """{metric name: {label values: sample}} for the whole server: this
+    process's live samples plus every other process's last flush."""
+    merged = {name: {} for name in REGISTRY}
+    if settings.METRICS_DIR:
+        own = f'{os.getpid()}.json'
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            if os.path.basename(path) == own:
+                continue
+            try:
+                with open(path) as f:
+                    flushed = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, samples in flushed.items():
+                if name in REGISTRY:
+                    _merge(REGISTRY[name], merged[name], samples)
+    for name, samples in snapshot().items():
+        _merge(REGISTRY[name], merged[name], samples)
+    return merged
+
+
+_last_flush = 0.0
+
+
+def flush():
+    """Write this process's samples to METRICS_DIR/<pid>.json."""
+    global _last_flush
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+    partial = f'{path}.{threading.get_ident()}.partial'
+    with open(partial, 'w') as f:
+        json.dump(snapshot(), f)
+    os.replace(partial, path)
+    _last_flush = time.monotonic()
+
+
+def maybe_flush():
+    if settings.METRICS_DIR and time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        if settings.configured:
+            flush()
+    except Exception:
+        pass
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(pairs):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(merged):
+    """Text exposition format for collect()'s result."""
+    lines = []
+    for name, metric in sorted(REGISTRY.items()):
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for key, value in sorted(merged[name].items()):
+            pairs = list(zip(metric.labelnames, key))
+            if metric.kind == 'counter':
+                lines.append(f'{name}{_labels(pairs)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (float('inf'),), value[0]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(pairs + [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(pairs)} {_number(value[1])}')
+            lines.append(f'{name}_count{_labels(pairs)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """GET /metrics/. With METRICS_TOKEN set, scrapers must send
+    `Authorization: Bearer <token>`. Without one the endpoint only exists
+    under DEBUG: route names, traffic and catalog versions are not public."""
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse('Not Found\n', status=404, content_type='text/plain')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricsMiddleware:
+    """Latency and SQL query count of every request, by URL route."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        endpoint = match.route if match else 'unmatched'
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        request_duration.observe(elapsed, endpoint=endpoint, method=method,
+                                 status=response.status_code)
+        request_queries.observe(queries, endpoint=endpoint)
+        maybe_flush()
+        return response
+
+
+def candidates_label(count):
+    """Bounded label for an engine run's number of candidate cards."""
+    for bound in (25, 50, 100, 200):
+        if count <= bound:
+            return f'<={bound}'
+    return '>200'
+
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Request latency by URL route.',
+    ('endpoint', 'method', 'status'))
+request_queries = Histogram(
+    'http_request_queries', 'SQL queries per request by URL route.',
+    ('endpoint',), buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500))
+engine_duration = Histogram(
+    'engine_duration_seconds', 'Quick-recommendation engine runs by strategy and candidate cards.',
+    ('strategy', 'candidates'))
+optimizer_iterations = Histogram(
+    'engine_optimizer_iterations', 'Candidate portfolios scored per greedy portfolio search.',
+    buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000))
+cache_requests = Counter(
+    'cache_requests_total', 'Cache lookups by cache and result (hit or miss).',
+    ('cache', 'result'))
+import_duration = Histogram(
+    'import_duration_seconds', 'Catalog import command run time.',
+    ('command',), buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800))
@@ -60,6 +60,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'creditcard_guru.metrics.MetricsMiddleware',
+    'roadmaps.profiling.SlowRequestProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +86,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'creditcard_guru.context_processors.footer_context',
+                'creditcard_guru.context_processors.wallet_context',
             ],
         },
     },
@@ -107,6 +110,16 @@ if config('DATABASE_URL', default=None):
     import dj_database_url
     DATABASES['default'] = dj_database_url.parse(config('DATABASE_URL'))
 
+# DB-free engine mode for scripts and batch workers: every connection is an
+# in-memory SQLite database restored from a catalog artifact built by
+# `manage.py compile_catalog` (see cards/catalog_artifact.py).
+CATALOG_ARTIFACT = config('CATALOG_ARTIFACT', default=None)
+if CATALOG_ARTIFACT:
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -226,6 +239,42 @@ if not DEBUG:
 # Custom settings
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Engine threads behind /api/roadmaps/quick-recommendation/async/ (per process).
+QUICK_RECOMMENDATION_WORKERS = config('QUICK_RECOMMENDATION_WORKERS', default=2, cast=int)
+
+# Partner batch endpoint (roadmaps/partner.py): items per request, and
+# threads (per process) that evaluate slices of batches in parallel.
+PARTNER_BATCH_MAX_ITEMS = config('PARTNER_BATCH_MAX_ITEMS', default=100, cast=int)
+PARTNER_BATCH_WORKERS = config('PARTNER_BATCH_WORKERS', default=4, cast=int)
+
+# Metrics (creditcard_guru/metrics.py). METRICS_DIR, shared by every
+# gunicorn worker, makes /metrics/ report the whole server rather than the
+# worker that answered; METRICS_TOKEN, if set, is required as a Bearer token.
+# With DEBUG off and no METRICS_TOKEN, /metrics/ is a 404.
+METRICS_DIR = config('METRICS_DIR', default=None)
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Slow-request profiler (roadmaps/profiling.py), off unless PROFILER_DIR is
+# set: requests under PROFILER_PATHS are stack-sampled every
+# PROFILER_INTERVAL seconds and kept when slower than PROFILER_SLOW_THRESHOLD
+# seconds or with probability PROFILER_SAMPLE_RATE; the newest
+# PROFILER_MAX_CAPTURES are kept. See `manage.py engine_profiles`.
+PROFILER_DIR = config('PROFILER_DIR', default=None)
+PROFILER_PATHS = config('PROFILER_PATHS', default='/api/roadmaps/quick-recommendation/',
+                        cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+PROFILER_SLOW_THRESHOLD = config('PROFILER_SLOW_THRESHOLD', default=1.0, cast=float)
+PROFILER_SAMPLE_RATE = config('PROFILER_SAMPLE_RATE', default=0.0, cast=float)
+PROFILER_INTERVAL = config('PROFILER_INTERVAL', default=0.005, cast=float)
+PROFILER_MAX_CAPTURES = config('PROFILER_MAX_CAPTURES', default=200, cast=int)
+
+# Roadmap generation (roadmaps/jobs.py) runs inside the request unless
+# ROADMAP_JOBS_INLINE is off, which only an always-on `run_roadmap_jobs`
+# worker makes safe: with it off and no worker, jobs stay pending forever.
+ROADMAP_JOBS_INLINE = config('ROADMAP_JOBS_INLINE', default=True, cast=bool)
+# Default concurrency of the `run_roadmap_jobs` worker (per process).
+ROADMAP_JOB_WORKERS = config('ROADMAP_JOB_WORKERS', default=2, cast=int)
+
 # Logging: engine debug detail is opt-in via ENGINE_LOG_LEVEL; everything
 # else stays at INFO so server output is readable.
 LOGGING = {
@@ -0,0 +1,85 @@
+"""
+Site-wide metadata that doesn't change while a process is running.
+
+Version info is resolved once per process — from the VERSION file written
+at deploy, or from git in local dev — instead of on every template render.
+The WSGI/ASGI entry points resolve it at startup so the first request
+doesn't pay for the git subprocesses either.
+"""
+import functools
+import json
+import os
+import subprocess
+from datetime import datetime
+
+from django.conf import settings
+
+
+def _parse_iso_timestamp(timestamp_str):
+    """
+    Parse ISO 8601 timestamp string to datetime object.
+
+    Args:
+        timestamp_str: ISO 8601 timestamp string (e.g., "2026-07-02T16:18:40-05:00")
+
+    Returns:
+        datetime: Parsed datetime object, or None if parsing fails
+    """
+    try:
+        return datetime.fromisoformat(timestamp_str)
+    except (ValueError, TypeError):
+        return None
+
+
+def _get_version_info():
+    """
+    Get version info from VERSION file (generated during deploy) or from git.
+
+    Uncached; templates should use version_info().
+
+    Returns:
+        dict: Version info with 'timestamp' (datetime object) and 'commit' keys, or empty dict if unavailable
+    """
+    version_file = os.path.join(settings.BASE_DIR, 'VERSION')
+
+    # Try to read from VERSION file (generated during deploy)
+    if os.path.exists(version_file):
+        try:
+            with open(version_file, 'r') as f:
+                data = json.load(f)
+                # Parse the timestamp string to datetime object
+                if 'timestamp' in data and data['timestamp']:
+                    data['timestamp'] = _parse_iso_timestamp(data['timestamp'])
+                return data
+        except Exception:
+            pass
+
+    # Fallback: generate from git (for local dev)
+    try:
+        # Get the timestamp of the last commit to main
+        timestamp_str = subprocess.check_output(
+            ['git', 'log', '-1', '--format=%cI', 'main'],
+            cwd=settings.BASE_DIR,
+            stderr=subprocess.DEVNULL
+        ).decode('utf-8').strip()
+
+        # Get the short commit hash
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR,
+            stderr=subprocess.DEVNULL
+        ).decode('utf-8').strip()
+
+        if timestamp_str:
+            timestamp = _parse_iso_timestamp(timestamp_str)
+            return {'timestamp': timestamp, 'commit': commit}
+    except Exception:
+        pass
+
+    return {}
+
+
+@functools.cache
+def version_info():
+    """Version info for this process, resolved on first call."""
+    return _get_version_info()
@@ -5,9 +5,13 @@ import json
 import os
 import tempfile
 from datetime import datetime
+from unittest import mock
 from django.test import TestCase, override_settings
 from django.test.client import RequestFactory
-from creditcard_guru.context_processors import footer_context, _parse_iso_timestamp, _get_version_info
+from cards.caching import invalidate_catalog_version
+from cards.models import CatalogVersion
+from creditcard_guru.context_processors import footer_context
+from creditcard_guru.site_metadata import _parse_iso_timestamp, _get_version_info
 
 
 class ParseIsoTimestampTest(TestCase):
@@ -127,3 +131,26 @@ class FooterContextTest(TestCase):
         version_info = context['version_info']
 
         self.assertIsInstance(version_info, dict)
+
+    def test_footer_context_is_free_once_warm(self):
+        """After the first render, footer data comes from memory: no queries
+        and no git subprocesses, whether or not VERSION is deployed."""
+        request = RequestFactory().get('/')
+        footer_context(request)
+
+        with mock.patch('subprocess.check_output') as check_output, \
+                self.assertNumQueries(0):
+            for _ in range(3):
+                footer_context(request)
+        check_output.assert_not_called()
+
+    def test_last_import_date_follows_catalog_bump(self):
+        """Importers bump the catalog version; the footer picks it up without
+        aggregating over CreditCard."""
+        invalidate_catalog_version()
+        self.assertIsNone(footer_context(RequestFactory().get('/'))['last_import_date'])
+
+        row = CatalogVersion.bump(source='test')
+        context = footer_context(RequestFactory().get('/'))
+        self.assertEqual(context['last_import_date'], row.updated_at)
+        self.assertEqual(CatalogVersion.bump().version, row.version + 1)
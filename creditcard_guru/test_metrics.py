@@ -0,0 +1,67 @@
+"""
+Tests for the metrics registry and /metrics/.
+"""
+import json
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from cards.caching import invalidate_catalog_version
+from creditcard_guru import metrics
+
+
+class MetricsEndpointTest(TestCase):
+    """Requests are recorded by route; /metrics/ renders the exposition format."""
+
+    def setUp(self):
+        # Inside the test transaction an uncached version labels as "unknown".
+        invalidate_catalog_version()
+
+    @override_settings(DEBUG=True)
+    def test_request_recorded_by_route_and_rendered(self):
+        self.client.get('/api/')
+        response = self.client.get('/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_count{endpoint="api/",method="GET",status="200",', body)
+        self.assertIn('http_request_queries_count{endpoint="api/",', body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.import_duration.observe(3, command='bucket-test')
+        body = metrics.render(metrics.collect())
+
+        self.assertIn('import_duration_seconds_bucket{command="bucket-test",catalog_version="unknown",le="1"} 0', body)
+        self.assertIn('import_duration_seconds_bucket{command="bucket-test",catalog_version="unknown",le="5"} 1', body)
+        self.assertIn('import_duration_seconds_bucket{command="bucket-test",catalog_version="unknown",le="+Inf"} 1', body)
+        self.assertIn('import_duration_seconds_sum{command="bucket-test",catalog_version="unknown"} 3', body)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 401)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_hidden_in_production_without_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+
+class MultiprocessMetricsTest(TestCase):
+    """With METRICS_DIR, a scrape sums every process's flushed samples."""
+
+    def setUp(self):
+        invalidate_catalog_version()
+
+    def test_other_processes_summed_and_own_file_not_double_counted(self):
+        with tempfile.TemporaryDirectory() as metrics_dir, override_settings(METRICS_DIR=metrics_dir):
+            with open(os.path.join(metrics_dir, '1.json'), 'w') as f:
+                json.dump({'cache_requests_total': [[['merge-test', 'hit', '7'], 3]]}, f)
+            metrics.cache_requests.inc(cache='merge-test', result='hit')
+            metrics.flush()
+
+            self.assertTrue(os.path.exists(os.path.join(metrics_dir, f'{os.getpid()}.json')))
+            samples = metrics.collect()['cache_requests_total']
+            self.assertEqual(samples[('merge-test', 'hit', '7')], 3)
+            self.assertEqual(samples[('merge-test', 'hit', 'unknown')], 1)
@@ -19,8 +19,9 @@ from django.urls import path, include
 from django.http import JsonResponse
 from django.shortcuts import render
 from cards.views import landing_view, index_view, cards_list_view, categories_list_view, category_detail_page_view, issuers_list_view, profile_view, shared_profile_view, help_view, resources_view, redemptions_view
-from cards.wallet import wallet_view
+from cards.wallet import wallet_view, wallet_service_worker_view
 from roadmaps.views import shared_roadmap_view
+from creditcard_guru.metrics import metrics_view
 
 def home_view(request):
     if 'text/html' in request.META.get('HTTP_ACCEPT', ''):
@@ -53,6 +54,7 @@ urlpatterns = [
     path('issuers/', issuers_list_view, name='issuers_list'),
     path('profile/', profile_view, name='profile'),
     path('wallet/', wallet_view, name='wallet'),
+    path('wallet/sw.js', wallet_service_worker_view, name='wallet_sw'),
     path('help/', help_view, name='help'),
     path('resources/', resources_view, name='resources'),
     path('redemptions/', redemptions_view, name='redemptions'),
@@ -68,4 +70,5 @@ urlpatterns = [
     path('api/cards/', include('cards.urls')),
     path('api/roadmaps/', include('roadmaps.urls')),
     path('api/users/', include('users.urls')),
+    path('metrics/', metrics_view, name='metrics'),
 ]
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import RoadmapFilter, Roadmap, RoadmapRecommendation, RoadmapCalculation
+from .models import (
+    RoadmapFilter, Roadmap, RoadmapRecommendation, RoadmapCalculation, RoadmapGenerationJob,
+    PartnerAPIKey,
+)
 
 
 @admin.register(RoadmapFilter)
@@ -40,4 +43,19 @@ class RoadmapRecommendationAdmin(admin.ModelAdmin):
 @admin.register(RoadmapCalculation)
 class RoadmapCalculationAdmin(admin.ModelAdmin):
     list_display = ['roadmap', 'total_estimated_rewards', 'calculated_at']
-    readonly_fields = ['calculated_at']
\ No newline at end of file
+    readonly_fields = ['calculated_at']
+
+@admin.register(RoadmapGenerationJob)
+class RoadmapGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['roadmap', 'status', 'attempts', 'created_at', 'started_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['roadmap__name', 'error']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(PartnerAPIKey)
+class PartnerAPIKeyAdmin(admin.ModelAdmin):
+    list_display = ['name', 'prefix', 'max_concurrency', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    search_fields = ['name', 'prefix']
+    readonly_fields = ['prefix', 'key_digest', 'created_at']
@@ -0,0 +1,122 @@
+"""Single-flight execution of expensive computations on a bounded pool.
+
+Used by the async quick-recommendation endpoint: identical in-flight
+requests (same key) share one computation, and a caller that sends a new
+request supersedes its own previous one instead of queueing behind it.
+
+Deliberately loop-agnostic. Under WSGI every async view runs in its own
+event loop, so the shared state is a concurrent.futures.Future and each
+waiter gets its own asyncio future, resolved via call_soon_threadsafe.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+
+class Superseded(Exception):
+    """The same owner started a different computation before this one returned."""
+
+
+class _Flight:
+    __slots__ = ('future', 'waiters')
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = set()
+
+
+def _deliver(waiter, future):
+    if waiter.done():
+        return
+    if future.cancelled():
+        waiter.cancel()
+    elif future.exception() is not None:
+        waiter.set_exception(future.exception())
+    else:
+        waiter.set_result(future.result())
+
+
+def _supersede(waiter):
+    if not waiter.done():
+        waiter.set_exception(Superseded())
+
+
+def with_fresh_connections(fn):
+    """Wrap `fn` for a pool thread. Pool threads live outside the request
+    cycle, so nothing else closes their DB connections when they go stale."""
+    def run():
+        close_old_connections()
+        try:
+            return fn()
+        finally:
+            close_old_connections()
+    return run
+
+
+class SingleFlight:
+    """Run each distinct key's computation at most once at a time.
+
+    `await flights.run(key, fn, owner=...)` submits `fn` to the pool unless
+    a computation for `key` is already in flight, in which case it waits
+    for that one. Passing an `owner` (a session) makes a later run() from
+    the same owner with a different key raise Superseded in the earlier
+    waiter. A computation every waiter has abandoned is cancelled if it
+    hasn't started yet; one already running finishes and is discarded.
+    """
+
+    def __init__(self, max_workers, thread_name_prefix='single-flight'):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.RLock()
+        self._flights = {}
+        self._owners = {}
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    async def run(self, key, fn, owner=None):
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        previous = None
+
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight(self._executor.submit(with_fresh_connections(fn)))
+                self._flights[key] = flight
+                flight.future.add_done_callback(
+                    lambda _, key=key, flight=flight: self._finished(key, flight))
+            flight.waiters.add(waiter)
+            if owner is not None:
+                previous = self._owners.get(owner)
+                self._owners[owner] = (key, waiter)
+
+        if previous is not None and previous[0] != key:
+            previous_waiter = previous[1]
+            previous_waiter.get_loop().call_soon_threadsafe(_supersede, previous_waiter)
+
+        flight.future.add_done_callback(
+            lambda future: loop.call_soon_threadsafe(_deliver, waiter, future))
+        try:
+            return await waiter
+        finally:
+            self._leave(key, flight, waiter, owner)
+
+    def _finished(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _leave(self, key, flight, waiter, owner):
+        with self._lock:
+            flight.waiters.discard(waiter)
+            if owner is not None and self._owners.get(owner, (None, None))[1] is waiter:
+                del self._owners[owner]
+            # A running computation stays registered so a fresh request for
+            # the same key can still pick up its result.
+            if not flight.waiters and flight.future.cancel():
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
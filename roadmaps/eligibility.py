@@ -72,6 +72,7 @@ and multi_player.json's per-entity 5/24 headroom case.
 
 import calendar
 from datetime import date, timedelta
+from types import SimpleNamespace
 
 # When a UserCard has no bonus_earned_date, assume the bonus landed about
 # this long after opening (typical 3-month spending requirement).
@@ -228,6 +229,27 @@ def application_block(card, card_history, today):
     return None
 
 
+def applications_interact(card, other_card):
+    """Can holding or newly opening `other_card` change whether `card` is
+    approved? True if `other_card` counts toward one of `card`'s issuer
+    rules, or the two share an application family. Used to split a
+    household's applications into independent groups."""
+    if card.id == other_card.id:
+        return True
+    entry = SimpleNamespace(card=other_card)
+    for rule in _issuer_rules(card.issuer.slug).get('application_rules', []):
+        if _counts_toward(rule['counts'], entry, card):
+            return True
+    meta, other_meta = card.metadata or {}, other_card.metadata or {}
+    family = meta.get('application_family')
+    if family and other_meta.get('application_family') == family:
+        return True
+    elig_family = (meta.get('application_eligibility') or {}).get('family')
+    if elig_family and (other_meta.get('application_eligibility') or {}).get('family') == elig_family:
+        return True
+    return False
+
+
 def _approx_bonus_earned_date(user_card):
     """Best guess at when this card's signup bonus was earned.
 
@@ -1,4 +1,5 @@
 import logging
+import math
 import re
 from typing import List
 from cards.models import CreditCard
@@ -14,6 +15,7 @@ class BonusCapacityManager:
 
     def __init__(self, engine):
         self.engine = engine
+        self._plan_memo = {}
 
     def bonus_months_needed(self, card: CreditCard) -> float:
         """Months of the user's TOTAL spending it takes to meet this card's signup requirement."""
@@ -26,8 +28,32 @@ class BonusCapacityManager:
             return float('inf')
         return requirement / monthly
 
+    # Exact planning discretizes months into steps of this size and gives
+    # up (greedy only) once the DP table would exceed MAX_DP_CELLS.
+    MONTH_RESOLUTION = 0.1
+    MAX_DP_CELLS = 200_000
+    MAX_MEMO_ENTRIES = 4096
+
     def bonus_capacity_plan(self, cards: List[CreditCard], program_multipliers: dict = None) -> dict:
-        """Single capacity authority: which of these cards' signup bonuses fit within BONUS_CAPACITY_MONTHS."""
+        """Single capacity authority: which of these cards' signup bonuses fit within BONUS_CAPACITY_MONTHS.
+
+        Memoized per engine by the set of cards, the pooled multipliers
+        that value them and the monthly spend that meters them — the
+        optimizer asks again for the same apply set on every greedy pass.
+        Callers must treat the returned plan as read-only.
+        """
+        monthly = self.engine._total_monthly_spending()
+        key = (tuple(sorted(card.id for card in cards)),
+               tuple(sorted((program_multipliers or {}).items())),
+               monthly)
+        plan = self._plan_memo.get(key)
+        if plan is None:
+            if len(self._plan_memo) >= self.MAX_MEMO_ENTRIES:
+                self._plan_memo.clear()
+            plan = self._plan_memo[key] = self._solve_capacity_plan(cards, program_multipliers)
+        return plan
+
+    def _solve_capacity_plan(self, cards: List[CreditCard], program_multipliers: dict) -> dict:
         entries = [{
             'card': card,
             'bonus_value': self.get_signup_bonus_value(card, program_multipliers),
@@ -41,6 +67,16 @@ class BonusCapacityManager:
             key=lambda e: (-(e['bonus_value'] / e['months']),
                            -e['bonus_value'], e['card'].id))
 
+        counted = self._greedy_fill(metered, set())
+        exact = self._exact_selection(metered)
+        if exact is not None:
+            exact = self._greedy_fill(metered, exact)
+            value = lambda picked: sum(metered[i]['bonus_value'] for i in picked)
+            # Only depart from the greedy plan when it actually leaves value
+            # on the table, so ties keep their established sequencing.
+            if value(exact) > value(counted) + 1e-9:
+                counted = exact
+
         by_card_id = {}
         sequence = []
         for e in free:
@@ -51,18 +87,17 @@ class BonusCapacityManager:
             sequence.append(e['card'].id)
 
         committed = 0.0
-        for e in metered:
-            months = e['months']
-            if months != float('inf') and committed + months <= self.engine.BONUS_CAPACITY_MONTHS:
+        for i, e in enumerate(metered):
+            if i in counted:
                 by_card_id[e['card'].id] = {
-                    'bonus_value': e['bonus_value'], 'months': months,
+                    'bonus_value': e['bonus_value'], 'months': e['months'],
                     'counted': True, 'start_month': committed,
                 }
                 sequence.append(e['card'].id)
-                committed += months
+                committed += e['months']
             else:
                 by_card_id[e['card'].id] = {
-                    'bonus_value': e['bonus_value'], 'months': months,
+                    'bonus_value': e['bonus_value'], 'months': e['months'],
                     'counted': False, 'start_month': None,
                 }
 
@@ -72,6 +107,56 @@ class BonusCapacityManager:
             'sequence': sequence,
         }
 
+    def _greedy_fill(self, metered: list, counted: set) -> set:
+        """Positions in `metered` (already in value-per-month order): `counted`
+        plus every other entry that still fits."""
+        counted = set(counted)
+        committed = sum(metered[i]['months'] for i in counted)
+        for i, e in enumerate(metered):
+            if i in counted:
+                continue
+            months = e['months']
+            if months != float('inf') and committed + months <= self.engine.BONUS_CAPACITY_MONTHS:
+                counted.add(i)
+                committed += months
+        return counted
+
+    def _exact_selection(self, metered: list):
+        """Positions in `metered` of the most valuable bonus set fitting capacity (0/1
+        knapsack over MONTH_RESOLUTION steps), or None when the table
+        would be too large. Months round up, so the set always fits."""
+        capacity = int(self.engine.BONUS_CAPACITY_MONTHS / self.MONTH_RESOLUTION + 1e-9)
+        items = []
+        for i, e in enumerate(metered):
+            if e['bonus_value'] <= 0 or e['months'] == float('inf'):
+                continue
+            weight = math.ceil(e['months'] / self.MONTH_RESOLUTION - 1e-9)
+            if weight <= capacity:
+                items.append((i, weight, e['bonus_value']))
+        if len(items) * (capacity + 1) > self.MAX_DP_CELLS:
+            logger.debug(f"Bonus capacity plan: {len(items)} cards exceed the exact "
+                         f"solver's budget, using greedy")
+            return None
+
+        best = [0.0] * (capacity + 1)
+        took = []
+        for _, weight, value in items:
+            row = [False] * (capacity + 1)
+            for room in range(capacity, weight - 1, -1):
+                candidate = best[room - weight] + value
+                if candidate > best[room] + 1e-9:
+                    best[room] = candidate
+                    row[room] = True
+            took.append(row)
+
+        chosen = set()
+        room = capacity
+        for (position, weight, _), row in zip(reversed(items), reversed(took)):
+            if row[room]:
+                chosen.add(position)
+                room -= weight
+        return chosen
+
     def signup_bonus_plan(self, card: CreditCard, portfolio_allocation: list,
                            allocated_annual_spend: float) -> dict:
         """Model how this card's signup spending requirement actually gets met."""
@@ -96,7 +181,7 @@ class BonusCapacityManager:
 
         this_mult = self.engine._own_multiplier(card)
         this_rate = 1.0
-        for rc in card.reward_categories.active_on(self.engine.today).select_related('category'):
+        for rc in self.engine.rewards_calculator.active_reward_categories(card):
             if rc.category.slug in self.engine.rewards_calculator.BASE_CATEGORY_SLUGS:
                 this_rate = max(this_rate, float(rc.reward_rate))
         this_value = this_rate * this_mult
@@ -243,19 +328,7 @@ class BonusCapacityManager:
         reachable, _, _ = self.can_meet_signup_requirement_with_expense(card, expense_amount)
         if not reachable:
             return 0.0
-
-        signup_bonus_type = getattr(card, 'signup_bonus_type', None)
-        if signup_bonus_type and hasattr(signup_bonus_type, 'name'):
-            bonus_type_name = signup_bonus_type.name.lower()
-        elif signup_bonus_type:
-            bonus_type_name = str(signup_bonus_type).lower()
-        else:
-            bonus_type_name = 'unknown'
-
-        if bonus_type_name in ['cashback', 'cash', 'cash back']:
-            return float(card.signup_bonus_amount)
-        reward_value_multiplier = self.engine._effective_multiplier(card, program_multipliers)
-        return float(card.signup_bonus_amount) * reward_value_multiplier
+        return self.signup_bonus_face_value(card, program_multipliers)
 
     def get_best_signup_bonus_card(self, eligible_cards: List[CreditCard]) -> dict:
         """Get the best signup bonus card as a fallback recommendation for high spenders."""
@@ -317,19 +390,24 @@ class BonusCapacityManager:
         if self.engine._bonus_ineligibility_note(card):
             return 0.0
         if card.signup_bonus_amount and self.can_meet_signup_requirement(card):
-            signup_bonus_type = getattr(card, 'signup_bonus_type', None)
+            return self.signup_bonus_face_value(card, program_multipliers)
+        return 0.0
 
-            if signup_bonus_type and hasattr(signup_bonus_type, 'name'):
-                bonus_type_name = signup_bonus_type.name.lower()
-            elif signup_bonus_type:
-                bonus_type_name = str(signup_bonus_type).lower()
-            else:
-                bonus_type_name = 'unknown'
+    def signup_bonus_face_value(self, card: CreditCard, program_multipliers: dict = None) -> float:
+        """Dollar value of the bonus itself, before any eligibility or
+        reachability check."""
+        if not card.signup_bonus_amount:
+            return 0.0
+        signup_bonus_type = getattr(card, 'signup_bonus_type', None)
 
-            if bonus_type_name in ['cashback', 'cash', 'cash back']:
-                return float(card.signup_bonus_amount)
-            else:
-                reward_value_multiplier = self.engine._effective_multiplier(card, program_multipliers)
-                bonus_value = float(card.signup_bonus_amount) * reward_value_multiplier
-                return bonus_value
-        return 0.0
+        if signup_bonus_type and hasattr(signup_bonus_type, 'name'):
+            bonus_type_name = signup_bonus_type.name.lower()
+        elif signup_bonus_type:
+            bonus_type_name = str(signup_bonus_type).lower()
+        else:
+            bonus_type_name = 'unknown'
+
+        if bonus_type_name in ['cashback', 'cash', 'cash back']:
+            return float(card.signup_bonus_amount)
+        reward_value_multiplier = self.engine._effective_multiplier(card, program_multipliers)
+        return float(card.signup_bonus_amount) * reward_value_multiplier
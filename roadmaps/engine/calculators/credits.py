@@ -2,7 +2,7 @@ import logging
 from typing import List
 from cards.models import CreditCard
 from cards.valuations import credit_currency_rate
-from ..utils import info_item
+from ..utils import credit_line, info_item
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +40,10 @@ class CreditsCalculator:
                     for pref in self.engine.profile.spending_credit_preferences.filter(values_credit=True)
                 )
             self.engine._credit_prefs = prefs
+        if self.engine._credit_spending_categories is None:
             self.engine._credit_spending_categories = set(
-                spending.category.slug
-                for spending in self.engine.profile.spending_amounts.all()
-                if spending.monthly_amount > 0
+                slug for slug, amount in self.engine.spending_amounts.items()
+                if amount > 0
             )
 
         entries = []
@@ -103,38 +103,10 @@ class CreditsCalculator:
     def credit_breakdown_item(credit: dict) -> dict:
         """Breakdown line for a counted credit (same shape as reward lines).
 
-        USD credits render the face `$` value throughout. Points-denominated
-        credits (non-USD `currency`) render the point amount and per-point
-        rate alongside the discounted dollar total, so the line item still
-        reconciles to the dollars that flow into totals (trustworthy math)."""
-        is_usd = credit.get('is_usd', True)
-        if is_usd:
-            if credit['times_per_year'] > 1:
-                credit_display = f"{credit['name']} (${credit['value']:.0f}×{credit['times_per_year']})"
-            else:
-                credit_display = f"{credit['name']} (${credit['value']:.0f})"
-            calculation = f"Card benefit: ${credit['annual_value']:.0f} annually"
-        else:
-            currency = credit['currency']
-            qty_text = f"{credit['value']:,.0f} {currency} pts"
-            if credit['times_per_year'] > 1:
-                qty_text += f" × {credit['times_per_year']}/year"
-                credit_display = f"{credit['name']} ({credit['value']:,.0f} {currency} pts×{credit['times_per_year']} → ${credit['annual_value']:.0f})"
-            else:
-                credit_display = f"{credit['name']} ({credit['value']:,.0f} {currency} pts → ${credit['annual_value']:.0f})"
-            calculation = f"Card benefit: {qty_text} × ${credit['rate']:.4f}/pt → ${credit['annual_value']:.0f} annually"
-        return {
-            'category_name': credit_display,
-            'monthly_spend': 0,
-            'annual_spend': 0,
-            'reward_rate': 0,
-            'reward_multiplier': 1.0,
-            'points_earned': credit['annual_value'],
-            'category_rewards': credit['annual_value'],
-            'calculation': calculation,
-            'type': 'credit',
-            'credit_detail': credit,
-        }
+        Numeric only — this runs for every trial portfolio the optimizer
+        scores; `render_breakdown` adds the display text for the final
+        recommendations."""
+        return credit_line(credit)
 
     def allocate_portfolio_credits(self, cards: List[CreditCard]) -> dict:
         """Portfolio-wide credit allocation — the single dedup authority."""
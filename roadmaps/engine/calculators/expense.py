@@ -1,10 +1,20 @@
+import calendar
 import logging
+from datetime import date
 from typing import List
-from cards.models import CreditCard, SpendingCategory
+from cards.models import CreditCard
 
 logger = logging.getLogger(__name__)
 
 
+def _add_months(day: date, months: float) -> date:
+    """`day` plus whole `months`, clamped to the end of a shorter month."""
+    month_index = day.month - 1 + int(round(months))
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
 class ExpenseRecommender:
     """
     Phase N: one-off upcoming-expense mode. Given a single lump-sum amount
@@ -40,6 +50,9 @@ class ExpenseRecommender:
                                max_results: int = 5) -> dict:
         amount = float(amount)
         category_name, parent_slug = self._resolve_category(category_slug)
+        # Warm the engine's rate table for every card scored below in one query.
+        self.engine.rewards_calculator.rate_table(
+            [uc.card for uc in self.engine.user_cards] + list(eligible_cards))
 
         program_multipliers = self.engine._program_multipliers(
             [uc.card for uc in self.engine.user_cards])
@@ -83,6 +96,205 @@ class ExpenseRecommender:
             'best_owned': best_owned,
         }
 
+    def plan_expenses(self, expenses: List[dict], eligible_cards: List[CreditCard],
+                      max_new_cards: int = 1) -> dict:
+        """Plan several dated one-off expenses at once.
+
+        `expenses` are {amount, category_slug, date}. Each one is assigned
+        to an owned card or one of at most `max_new_cards` new
+        applications so that new cards' signup minimums are met within
+        their `time_limit_months` window, counted from the first expense
+        put toward them.
+
+        Every card's reward on every expense is computed once up front,
+        from the engine's rate table (one query for the whole catalog).
+        New cards are then picked greedily by marginal gain. For each
+        candidate and each possible window start, the minimum spend is
+        covered with the expenses that cost least to move off their
+        current best card. Recurring monthly spend in a window counts
+        toward that card's minimum, but only once across overlapping
+        windows. Category caps apply per expense, as in
+        recommend_for_expense().
+        """
+        today = self.engine.today
+        items = []
+        for expense in expenses:
+            slug = expense.get('category_slug')
+            name, parent_slug = self._resolve_category(slug)
+            items.append({
+                'amount': float(expense['amount']),
+                'category_slug': slug,
+                'category_name': name,
+                'parent_slug': parent_slug,
+                'date': expense.get('date') or today,
+            })
+        by_date = sorted(range(len(items)), key=lambda i: (items[i]['date'], i))
+
+        owned = [uc.card for uc in self.engine.user_cards]
+        owned_ids = {card.id for card in owned}
+        candidates = []
+        seen = set(owned_ids)
+        for card in eligible_cards:
+            if card.id in seen or not self.engine._is_eligible_for_card(card):
+                continue
+            seen.add(card.id)
+            candidates.append(card)
+
+        self.engine.rewards_calculator.rate_table(owned + candidates)
+        valuations = self.engine.valuations
+        values = {}
+        for card in owned + candidates:
+            rows = valuations.reward_categories(card)
+            multiplier = self.engine._own_multiplier(card)
+            values[card.id] = [
+                self._lump_rewards(rows, item['amount'],
+                                   item['category_slug'], item['parent_slug'], multiplier)[0]
+                for item in items]
+
+        # Best reward each expense earns on cards already held (or chosen).
+        best = [0.0] * len(items)
+        for card in owned:
+            best = [max(b, v) for b, v in zip(best, values[card.id])]
+
+        program_multipliers = self.engine._program_multipliers(owned)
+        monthly = self.engine._total_monthly_spending()
+        locked = {}
+        organic_windows = []
+        applications = []
+        while len(applications) < max_new_cards:
+            chosen = None
+            picked_ids = {app['card'].id for app in applications}
+            for card in candidates:
+                if card.id in picked_ids:
+                    continue
+                option = self._plan_for_card(
+                    card, items, by_date, values[card.id], best, locked,
+                    monthly, organic_windows, program_multipliers)
+                if option['gain'] > 0 and (chosen is None or option['gain'] > chosen['gain']):
+                    chosen = option
+            if chosen is None:
+                break
+            applications.append(chosen)
+            for i in chosen['bonus_expenses']:
+                locked[i] = chosen['card']
+            if chosen['organic_spend'] > 0:
+                organic_windows.append((chosen['apply_by'], chosen['bonus_deadline']))
+            best = [max(b, v) for b, v in zip(best, values[chosen['card'].id])]
+
+        held = owned + [app['card'] for app in applications]
+        assignments = []
+        for i, item in enumerate(items):
+            card = locked.get(i)
+            if card is None:
+                for candidate in held:
+                    if card is None or values[candidate.id][i] > values[card.id][i]:
+                        card = candidate
+            assignments.append({
+                'amount': item['amount'],
+                'category_slug': item['category_slug'],
+                'category_name': item['category_name'],
+                'date': item['date'],
+                'card': card,
+                'action': None if card is None else ('keep' if card.id in owned_ids else 'apply'),
+                'rewards': values[card.id][i] if card is not None else 0.0,
+                'counts_toward_bonus': i in locked,
+            })
+
+        for app in applications:
+            app['category_rewards'] = sum(
+                a['rewards'] for a in assignments
+                if a['card'] is not None and a['card'].id == app['card'].id)
+            app['net_value'] = (app['signup_bonus_value'] + app['category_rewards']
+                                - app['effective_annual_fee'])
+            del app['gain'], app['bonus_expenses']
+
+        total_rewards = sum(a['rewards'] for a in assignments)
+        total_bonus = sum(app['signup_bonus_value'] for app in applications)
+        total_fees = sum(app['effective_annual_fee'] for app in applications)
+        logger.debug(f"Expense plan: {len(items)} expenses, "
+                     f"{len(applications)} new cards, ${total_bonus:.0f} in bonuses")
+        return {
+            'expenses': assignments,
+            'applications': applications,
+            'total_rewards': total_rewards,
+            'total_signup_bonus': total_bonus,
+            'total_fees': total_fees,
+            'net_value': total_rewards + total_bonus - total_fees,
+        }
+
+    def _plan_for_card(self, card: CreditCard, items: list, by_date: list, values: list,
+                       best: list, locked: dict, monthly: float, organic_windows: list,
+                       program_multipliers: dict) -> dict:
+        """Most valuable way to add `card` to the plan: its marginal gain,
+        the expenses that must go on it to earn the bonus, and the window."""
+        annual_fee_waived = card.metadata.get('annual_fee_waived_first_year', False)
+        fee = 0.0 if annual_fee_waived else float(card.annual_fee)
+        free = [i for i in by_date if i not in locked]
+        improvement = {i: values[i] - best[i] for i in free}
+        rate_gain = sum(max(0.0, delta) for delta in improvement.values())
+
+        bonus_manager = self.engine.bonus_capacity_manager
+        _, required, months = bonus_manager.can_meet_signup_requirement_with_expense(card, 0)
+        bonus_value = bonus_manager.get_signup_bonus_value_for_expense(
+            card, required, program_multipliers)
+        today = self.engine.today
+
+        def option(gain, bonus, start, end, bonus_expenses, organic):
+            return {
+                'card': card,
+                'action': 'apply',
+                'gain': gain,
+                'signup_bonus_value': bonus,
+                'required_amount': required,
+                'time_months': months,
+                'apply_by': start,
+                'bonus_deadline': end,
+                'expense_spend': sum(items[i]['amount'] for i in bonus_expenses),
+                'organic_spend': organic,
+                'effective_annual_fee': fee,
+                'bonus_expenses': bonus_expenses,
+            }
+
+        plan = option(rate_gain - fee, 0.0, today, None, [], 0.0)
+        if bonus_value <= 0:
+            return plan
+        if required <= 0:
+            return option(bonus_value + rate_gain - fee, bonus_value, today, None, [], 0.0)
+
+        starts = sorted({items[i]['date'] for i in free}) or [today]
+        for start in starts:
+            end = _add_months(start, months)
+            window_days = max((end - start).days, 1)
+            overlap = sum(max(0, (min(end, o_end) - max(start, o_start)).days)
+                          for o_start, o_end in organic_windows)
+            organic = monthly * months * max(0.0, 1 - overlap / window_days)
+            need = required - organic
+
+            in_window = [i for i in free if start <= items[i]['date'] < end]
+            in_window.sort(key=lambda i: -improvement[i] / items[i]['amount'])
+            bonus_expenses = []
+            covered = 0.0
+            for i in in_window:
+                if covered >= need:
+                    break
+                bonus_expenses.append(i)
+                covered += items[i]['amount']
+            if covered < need:
+                continue
+            # Greedy can overshoot: drop the costliest picks that aren't needed.
+            for i in sorted(bonus_expenses, key=lambda i: improvement[i]):
+                if covered - items[i]['amount'] >= need:
+                    bonus_expenses.remove(i)
+                    covered -= items[i]['amount']
+
+            forced = sum(min(0.0, improvement[i]) for i in bonus_expenses)
+            gain = bonus_value + rate_gain + forced - fee
+            if gain > plan['gain']:
+                plan = option(gain, bonus_value, start, end,
+                              sorted(bonus_expenses, key=lambda i: (items[i]['date'], i)),
+                              min(organic, required))
+        return plan
+
     def _score_apply_candidate(self, card: CreditCard, amount: float,
                                 category_slug: str, parent_slug: str,
                                 program_multipliers: dict) -> dict:
@@ -124,12 +336,18 @@ class ExpenseRecommender:
         `RewardsCalculator.calculate_portfolio_allocation`, applied to a
         single lump instead of a portfolio allocation.
         """
-        base_slugs = self.engine.rewards_calculator.BASE_CATEGORY_SLUGS
-        active = card.reward_categories.active_on(self.engine.today).select_related('category')
+        rows = self.engine.valuations.reward_categories(card)
+        multiplier = self.engine._own_multiplier(card)
+        total_rewards, best_rate = self._lump_rewards(
+            rows, amount, category_slug, parent_slug, multiplier)
+        return total_rewards, best_rate, multiplier
 
+    def _lump_rewards(self, rows: list, amount: float, category_slug: str,
+                      parent_slug: str, multiplier: float) -> tuple:
+        base_slugs = self.engine.rewards_calculator.BASE_CATEGORY_SLUGS
         specific = []
         base = []
-        for rc in active:
+        for rc in rows:
             if rc.category.slug in base_slugs:
                 base.append(rc)
             elif category_slug and (rc.category.slug == category_slug
@@ -138,7 +356,6 @@ class ExpenseRecommender:
         specific.sort(key=lambda rc: float(rc.reward_rate), reverse=True)
         base.sort(key=lambda rc: float(rc.reward_rate), reverse=True)
 
-        multiplier = self.engine._own_multiplier(card)
         remaining = amount
         total_rewards = 0.0
         best_rate = 0.0
@@ -156,19 +373,17 @@ class ExpenseRecommender:
                 best_rate = rate
             remaining -= take
 
-        return total_rewards, best_rate, multiplier
+        return total_rewards, best_rate
 
-    @staticmethod
-    def _resolve_category(category_slug: str) -> tuple:
+    def _resolve_category(self, category_slug: str) -> tuple:
         if not category_slug:
             return 'General purchase', None
-        try:
-            category = SpendingCategory.objects.select_related('parent').get(slug=category_slug)
-            name = category.display_name or category.name
-            parent_slug = category.parent.slug if category.parent else None
-            return name, parent_slug
-        except SpendingCategory.DoesNotExist:
+        category = self.engine.rewards_calculator.category_index().get(category_slug)
+        if category is None:
             return category_slug.replace('_', ' ').title(), None
+        name = category.display_name or category.name
+        parent_slug = category.parent.slug if category.parent else None
+        return name, parent_slug
 
     @staticmethod
     def _bonus_note(amount: float, reachable: bool, required_amount: float,
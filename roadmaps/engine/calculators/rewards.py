@@ -1,19 +1,133 @@
 import logging
 from typing import List, Dict
 from cards.models import CreditCard, SpendingCategory
+from cards.reward_windows import reward_window_index
+from ..utils import reward_line
 
 logger = logging.getLogger(__name__)
 
+BASE_CATEGORY_SLUGS = ('general', 'other', 'everything-else')
+
+
+def load_category_index() -> dict:
+    """{slug: SpendingCategory} with parents preloaded, in one query."""
+    return {c.slug: c for c in SpendingCategory.objects.select_related('parent')}
+
+
+def load_rate_table(cards: List[CreditCard], on_date, windows=None) -> list:
+    """[(card, RewardCategory)] for every category active on `on_date` across
+    `cards`, read from the reward window index (`windows`, default this
+    process's), which queries only for cards it hasn't indexed. Duplicate
+    cards are dropped; rows come back in card order, then RewardCategory id,
+    so rate ties break the same way every time."""
+    if windows is None:
+        windows = reward_window_index()
+    windows.load(cards)
+    seen = set()
+    table = []
+    for card in cards:
+        if card.id in seen:
+            continue
+        seen.add(card.id)
+        table.extend((card, reward_cat) for reward_cat in windows.active(card, on_date))
+    return table
+
+
+def allocate_spending(spending_amounts: dict, rate_table: list, category_index: dict) -> list:
+    """Allocate annual spending across a preloaded rate table.
+
+    Each spending category goes to the highest rate that matches it — its
+    own category, its parent's (via `category_index`), or a base/catch-all
+    rate — filling `max_annual_spend` caps before spilling to the next
+    best. Whatever no card earns on comes back as a `card=None` entry.
+    """
+    category_rewards = []
+    base_rewards = []
+    for card, reward_cat in rate_table:
+        if reward_cat.category.slug in BASE_CATEGORY_SLUGS:
+            base_rewards.append((card, reward_cat))
+        else:
+            category_rewards.append((card, reward_cat))
+
+    cap_room = {}
+    for _, reward_cat in category_rewards + base_rewards:
+        if reward_cat.max_annual_spend:
+            cap_room[reward_cat.id] = float(reward_cat.max_annual_spend)
+
+    base_rewards.sort(key=lambda cr: float(cr[1].reward_rate), reverse=True)
+
+    allocation = []
+
+    def allocate(spending_slug, category_name, amount, candidates):
+        remaining = amount
+        for card, reward_cat in candidates:
+            if remaining <= 0:
+                return
+            take = remaining
+            if reward_cat.id in cap_room:
+                take = min(take, cap_room[reward_cat.id])
+                if take <= 0:
+                    continue
+                cap_room[reward_cat.id] -= take
+            allocation.append({
+                'category_slug': spending_slug,
+                'category_name': category_name,
+                'card': card,
+                'rate': float(reward_cat.reward_rate),
+                'annual_spend': take,
+                'max_spend': float(reward_cat.max_annual_spend) if reward_cat.max_annual_spend else None,
+                'reward_category_id': reward_cat.id,
+                'is_base_rate': reward_cat.category.slug in BASE_CATEGORY_SLUGS,
+            })
+            remaining -= take
+        if remaining > 0:
+            allocation.append({
+                'category_slug': spending_slug,
+                'category_name': category_name,
+                'card': None,
+                'rate': 0.0,
+                'annual_spend': remaining,
+                'max_spend': None,
+                'reward_category_id': None,
+                'is_base_rate': False,
+            })
+
+    for spending_slug, monthly_amount in spending_amounts.items():
+        annual_spend = float(monthly_amount) * 12
+        if annual_spend <= 0:
+            continue
+
+        parent_slug = None
+        spend_category = category_index.get(spending_slug)
+        if spend_category is not None:
+            category_name = spend_category.display_name or spend_category.name
+            if spend_category.parent_id:
+                parent_slug = spend_category.parent.slug
+        else:
+            category_name = spending_slug.replace('_', ' ').title()
+
+        matches = [
+            (card, reward_cat) for card, reward_cat in category_rewards
+            if reward_cat.category.slug == spending_slug
+            or (parent_slug and reward_cat.category.slug == parent_slug)
+        ]
+        candidates = sorted(matches + base_rewards, key=lambda cr: float(cr[1].reward_rate), reverse=True)
+        allocate(spending_slug, category_name, annual_spend, candidates)
+
+    return allocation
+
 class RewardsCalculator:
     """
     Manages spending allocations, points pooling effective multipliers,
     parent category spending rollups, and card rewards breakdowns.
     """
 
-    BASE_CATEGORY_SLUGS = ('general', 'other', 'everything-else')
+    BASE_CATEGORY_SLUGS = BASE_CATEGORY_SLUGS
 
     def __init__(self, engine):
         self.engine = engine
+        self._category_index = None
+        self._reward_windows = None
 
     def total_monthly_spending(self) -> float:
         return sum(float(amount) for amount in self.engine.spending_amounts.values())
@@ -60,6 +174,7 @@ class RewardsCalculator:
 
     def build_parent_category_spending(self) -> dict:
         """Build parent category spending by aggregating subcategory spending."""
+        categories = self.category_index()
         all_spending = {}
         for category_slug, monthly_amount in self.engine.spending_amounts.items():
             all_spending[category_slug] = float(monthly_amount) * 12
@@ -68,115 +183,49 @@ class RewardsCalculator:
         parent_categories_with_subcategories = set()
 
         for category_slug, annual_spend in all_spending.items():
-            try:
-                spending_category = SpendingCategory.objects.get(slug=category_slug)
-                if spending_category.is_subcategory and annual_spend > 0:
-                    parent_categories_with_subcategories.add(spending_category.parent.slug)
-            except SpendingCategory.DoesNotExist:
-                pass
+            spending_category = categories.get(category_slug)
+            if spending_category and spending_category.parent_id and annual_spend > 0:
+                parent_categories_with_subcategories.add(spending_category.parent.slug)
 
         for category_slug, annual_spend in all_spending.items():
-            try:
-                spending_category = SpendingCategory.objects.get(slug=category_slug)
-                if spending_category.is_subcategory:
-                    parent_slug = spending_category.parent.slug
-                    parent_category_spending[parent_slug] = parent_category_spending.get(parent_slug, 0.0) + annual_spend
-                else:
-                    if category_slug in parent_categories_with_subcategories:
-                        pass
-                    else:
-                        parent_category_spending[category_slug] = parent_category_spending.get(category_slug, 0.0) + annual_spend
-            except SpendingCategory.DoesNotExist:
+            spending_category = categories.get(category_slug)
+            if spending_category is None:
+                parent_category_spending[category_slug] = parent_category_spending.get(category_slug, 0.0) + annual_spend
+            elif spending_category.parent_id:
+                parent_slug = spending_category.parent.slug
+                parent_category_spending[parent_slug] = parent_category_spending.get(parent_slug, 0.0) + annual_spend
+            elif category_slug not in parent_categories_with_subcategories:
                 parent_category_spending[category_slug] = parent_category_spending.get(category_slug, 0.0) + annual_spend
 
         return parent_category_spending
 
+    def category_index(self) -> dict:
+        """{slug: SpendingCategory} (parents preloaded), loaded once per engine."""
+        if self._category_index is None:
+            self._category_index = load_category_index()
+        return self._category_index
+
+    def reward_windows(self):
+        """The process's reward window index, fixed for this engine's run."""
+        if self._reward_windows is None:
+            self._reward_windows = reward_window_index()
+        return self._reward_windows
+
+    def rate_table(self, cards: List[CreditCard]) -> list:
+        """load_rate_table() as of the engine's date.
+
+        Rates don't depend on spending, so the optimizer's many trial
+        portfolios and what-if spending variants all share the index's rows."""
+        return load_rate_table(cards, self.engine.today, self.reward_windows())
+
+    def active_reward_categories(self, card: CreditCard) -> tuple:
+        """`card.reward_categories.active_on(engine.today)`, without a query."""
+        return self.reward_windows().active(card, self.engine.today)
+
     def calculate_portfolio_allocation(self, portfolio_cards: List[CreditCard]) -> list:
         """Allocate the user's annual spending across the portfolio."""
-        seen_ids = set()
-        cards = []
-        for card in portfolio_cards:
-            if card.id not in seen_ids:
-                seen_ids.add(card.id)
-                cards.append(card)
-
-        category_rewards = []
-        base_rewards = []
-        for card in cards:
-            active = card.reward_categories.active_on(self.engine.today).select_related(
-                'category', 'category__parent')
-            for reward_cat in active:
-                if reward_cat.category.slug in self.BASE_CATEGORY_SLUGS:
-                    base_rewards.append((card, reward_cat))
-                else:
-                    category_rewards.append((card, reward_cat))
-
-        cap_room = {}
-        for _, reward_cat in category_rewards + base_rewards:
-            if reward_cat.max_annual_spend:
-                cap_room[reward_cat.id] = float(reward_cat.max_annual_spend)
-
-        base_rewards.sort(key=lambda cr: float(cr[1].reward_rate), reverse=True)
-
-        allocation = []
-
-        def allocate(spending_slug, category_name, amount, candidates):
-            remaining = amount
-            for card, reward_cat in candidates:
-                if remaining <= 0:
-                    return
-                take = remaining
-                if reward_cat.id in cap_room:
-                    take = min(take, cap_room[reward_cat.id])
-                    if take <= 0:
-                        continue
-                    cap_room[reward_cat.id] -= take
-                allocation.append({
-                    'category_slug': spending_slug,
-                    'category_name': category_name,
-                    'card': card,
-                    'rate': float(reward_cat.reward_rate),
-                    'annual_spend': take,
-                    'max_spend': float(reward_cat.max_annual_spend) if reward_cat.max_annual_spend else None,
-                    'reward_category_id': reward_cat.id,
-                    'is_base_rate': reward_cat.category.slug in self.BASE_CATEGORY_SLUGS,
-                })
-                remaining -= take
-            if remaining > 0:
-                allocation.append({
-                    'category_slug': spending_slug,
-                    'category_name': category_name,
-                    'card': None,
-                    'rate': 0.0,
-                    'annual_spend': remaining,
-                    'max_spend': None,
-                    'reward_category_id': None,
-                    'is_base_rate': False,
-                })
-
-        for spending_slug, monthly_amount in self.engine.spending_amounts.items():
-            annual_spend = float(monthly_amount) * 12
-            if annual_spend <= 0:
-                continue
-
-            parent_slug = None
-            try:
-                spend_category = SpendingCategory.objects.select_related('parent').get(slug=spending_slug)
-                category_name = spend_category.display_name or spend_category.name
-                if spend_category.parent:
-                    parent_slug = spend_category.parent.slug
-            except SpendingCategory.DoesNotExist:
-                category_name = spending_slug.replace('_', ' ').title()
-
-            matches = [
-                (card, reward_cat) for card, reward_cat in category_rewards
-                if reward_cat.category.slug == spending_slug
-                or (parent_slug and reward_cat.category.slug == parent_slug)
-            ]
-            candidates = sorted(matches + base_rewards, key=lambda cr: float(cr[1].reward_rate), reverse=True)
-            allocate(spending_slug, category_name, annual_spend, candidates)
-
-        return allocation
+        rate_table = self.rate_table(portfolio_cards)
+        return allocate_spending(self.engine.spending_amounts, rate_table, self.category_index())
 
     def calculate_card_annual_rewards(self, card: CreditCard) -> float:
         """Calculate annual rewards for a card based on user spending."""
@@ -198,21 +247,11 @@ class RewardsCalculator:
             if annual_spend <= 0:
                 continue
             rate = entry['rate']
-            points_earned = annual_spend * rate
-            category_rewards = points_earned * reward_value_multiplier
+            category_rewards = annual_spend * rate * reward_value_multiplier
             total_rewards += category_rewards
-
-            breakdown_details.append({
-                'category_name': f"{entry['category_name']} ({rate:.1f}x)",
-                'monthly_spend': annual_spend / 12,
-                'annual_spend': annual_spend,
-                'reward_rate': rate,
-                'reward_multiplier': reward_value_multiplier,
-                'points_earned': points_earned,
-                'category_rewards': category_rewards,
-                'calculation': f"${annual_spend:,.0f} × {rate:.1f}x × {reward_value_multiplier:.3f} = ${category_rewards:.2f}",
-                'type': 'reward_category',
-            })
+            breakdown_details.append(reward_line(
+                entry['category_name'], annual_spend, rate, reward_value_multiplier,
+                category_rewards))
 
         credits_value, credit_items = credit_allocation.get(card.id, (0.0, []))
         total_rewards += credits_value
@@ -243,7 +282,7 @@ class RewardsCalculator:
         parent_category_spending = self.build_parent_category_spending()
         allocated_spending = 0.0
 
-        for reward_category in card.reward_categories.active_on(self.engine.today):
+        for reward_category in self.active_reward_categories(card):
             category_slug = reward_category.category.slug
             annual_spend = parent_category_spending.get(category_slug, 0.0)
 
@@ -253,24 +292,11 @@ class RewardsCalculator:
 
                 allocated_spending += annual_spend
                 reward_rate = float(reward_category.reward_rate)
-                points_earned = annual_spend * reward_rate
-                category_rewards = points_earned * float(reward_value_multiplier)
+                category_rewards = annual_spend * reward_rate * float(reward_value_multiplier)
                 total_rewards += category_rewards
-
-                category_display_name = reward_category.category.display_name or reward_category.category.name
-                category_with_multiplier = f"{category_display_name} ({reward_rate:.1f}x)"
-
-                breakdown_details.append({
-                    'category_name': category_with_multiplier,
-                    'monthly_spend': annual_spend / 12,
-                    'annual_spend': annual_spend,
-                    'reward_rate': reward_rate,
-                    'reward_multiplier': float(reward_value_multiplier),
-                    'points_earned': points_earned,
-                    'category_rewards': category_rewards,
-                    'calculation': f"${annual_spend:,.0f} × {reward_rate:.1f}x × {float(reward_value_multiplier):.3f} = ${category_rewards:.2f}",
-                    'type': 'reward_category'
-                })
+                breakdown_details.append(reward_line(
+                    reward_category.category.display_name or reward_category.category.name,
+                    annual_spend, reward_rate, float(reward_value_multiplier), category_rewards))
 
         unallocated_spending = sum(parent_category_spending.values()) - allocated_spending
         if unallocated_spending > 0:
@@ -281,23 +307,11 @@ class RewardsCalculator:
 
             if general_category:
                 reward_rate = float(general_category.reward_rate)
-                points_earned = unallocated_spending * reward_rate
-                category_rewards = points_earned * float(reward_value_multiplier)
+                category_rewards = unallocated_spending * reward_rate * float(reward_value_multiplier)
                 total_rewards += category_rewards
-
-                other_category_with_multiplier = f"Other Spending ({reward_rate:.1f}x)"
-
-                breakdown_details.append({
-                    'category_name': other_category_with_multiplier,
-                    'monthly_spend': unallocated_spending / 12,
-                    'annual_spend': unallocated_spending,
-                    'reward_rate': reward_rate,
-                    'reward_multiplier': float(reward_value_multiplier),
-                    'points_earned': points_earned,
-                    'category_rewards': category_rewards,
-                    'calculation': f"${unallocated_spending:,.0f} × {reward_rate:.1f}x × {float(reward_value_multiplier):.3f} = ${category_rewards:.2f}",
-                    'type': 'reward_category'
-                })
+                breakdown_details.append(reward_line(
+                    'Other Spending', unallocated_spending, reward_rate,
+                    float(reward_value_multiplier), category_rewards))
 
         credits_value, credits_breakdown = self.engine._calculate_card_credits_value(card)
         total_rewards += credits_value
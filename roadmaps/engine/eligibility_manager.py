@@ -14,21 +14,33 @@ class EligibilityManager:
         self.engine = engine
         self.entity_eligibility_cache = {}
         self.bonus_notes = {}
+        self.planned_entities = {}
+
+    def candidate_entities(self, card: CreditCard) -> list:
+        """Entities that may apply for `card`, in preference order."""
+        if card.card_type == 'business':
+            return [e for e in self.engine.entities if e.kind == 'business'] \
+                or [self.engine._primary_entity]
+        return [e for e in self.engine.entities if e.kind != 'business'] \
+            or [self.engine._primary_entity]
+
+    def set_planned_entities(self, planned: dict):
+        """Pin {card id: entity} from the household plan, so attribution and
+        bonus notes follow the joint assignment instead of the first
+        individually-eligible entity."""
+        for card_id in set(self.planned_entities) | set(planned):
+            self.bonus_notes.pop(card_id, None)
+        self.planned_entities = dict(planned)
 
     def eligible_entity_for_card(self, card: CreditCard):
         """Which household entity (if any) could apply for `card`."""
+        if card.id in self.planned_entities:
+            return self.planned_entities[card.id]
         if card.id in self.entity_eligibility_cache:
             return self.entity_eligibility_cache[card.id]
 
-        if card.card_type == 'business':
-            candidates = [e for e in self.engine.entities if e.kind == 'business'] \
-                or [self.engine._primary_entity]
-        else:
-            candidates = [e for e in self.engine.entities if e.kind != 'business'] \
-                or [self.engine._primary_entity]
-
         result = None
-        for entity in candidates:
+        for entity in self.candidate_entities(card):
             history = self.engine.entity_histories.get(entity.id, [])
             already_holds = any(
                 uc.card.id == card.id for uc in history if uc.closed_date is None)
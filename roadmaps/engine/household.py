@@ -0,0 +1,203 @@
+import logging
+from types import SimpleNamespace
+from typing import List
+
+from cards.models import CreditCard
+from ..eligibility import application_block, applications_interact, bonus_ineligibility
+
+logger = logging.getLogger(__name__)
+
+
+class HouseholdPlanner:
+    """
+    Phase K follow-up: decides WHICH household entity applies for each card
+    in a selected portfolio, jointly rather than one card at a time.
+
+    `EligibilityManager.eligible_entity_for_card` answers per card against
+    each entity's existing history, so two Chase picks can both land on an
+    entity with one 5/24 slot left, and a second copy of a kept card is
+    attributed without regard to what else that entity is applying for.
+    Here every application placed on an entity is added to that entity's
+    history (opened today) before the next card is checked, so 5/24,
+    issuer caps and family rules are enforced across the whole plan.
+
+    The search is branch-and-bound over {card: entity or dropped},
+    maximizing, in order: selected cards kept in the plan, signup bonus
+    value earned (bonus rules are per entity too), second copies placed,
+    then preference order of entities (primary first) — so an
+    unconstrained household gets exactly the old first-eligible
+    attribution. Cards whose rules can't interact (`applications_interact`)
+    form independent groups, each searched on its own. A group that
+    exceeds SEARCH_NODE_BUDGET keeps the best plan found so far; the first
+    plan tried is always the first-eligible one.
+
+    Spending and points programs stay household-wide: allocation and
+    program multipliers already pool every held card regardless of owner.
+    """
+
+    SEARCH_NODE_BUDGET = 20_000
+    # Objective weights — a kept selection outranks any bonus, a bonus any
+    # second copy, and entity order only breaks exact ties.
+    SELECTED_WEIGHT = 1_000_000.0
+    COPY_WEIGHT = 0.001
+    ORDER_WEIGHT = 1e-6
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._base_blocks = {}
+        self._group_count = 0
+        self.last_plan = None
+
+    def plan_applications(self, portfolio: List[dict], program_multipliers: dict = None) -> List[dict]:
+        """Assign every 'apply' in `portfolio` to an entity, drop the ones
+        the household can't fit, and pin the assignment on the eligibility
+        manager. Returns the surviving portfolio."""
+        applies = [ca for ca in portfolio if ca['action'] == 'apply']
+        assignment, exhaustive = self.assign(applies, program_multipliers)
+        self.last_plan = {'exhaustive': exhaustive, 'groups': self._group_count}
+
+        planned = {}
+        dropped = set()
+        for index, card_action in enumerate(applies):
+            entity = assignment[index]
+            if entity is None:
+                dropped.add(id(card_action))
+                logger.debug(f"Household plan: no entity can fit {card_action['card'].name}")
+            else:
+                planned[card_action['card'].id] = entity
+        self.engine.eligibility_manager.set_planned_entities(planned)
+        return [ca for ca in portfolio if id(ca) not in dropped]
+
+    def assign(self, applies: List[dict], program_multipliers: dict = None) -> tuple:
+        """([entity or None per apply], whether every group was searched exhaustively)."""
+        groups = self._independent_groups([ca['card'] for ca in applies])
+        self._group_count = len(groups)
+        assignment = [None] * len(applies)
+        exhaustive = True
+        for group in groups:
+            picks, complete = self._search(
+                [applies[i] for i in group], program_multipliers)
+            exhaustive = exhaustive and complete
+            for i, entity in zip(group, picks):
+                assignment[i] = entity
+        return assignment, exhaustive
+
+    def _independent_groups(self, cards: List[CreditCard]) -> List[List[int]]:
+        parent = list(range(len(cards)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i in range(len(cards)):
+            for j in range(i + 1, len(cards)):
+                if (applications_interact(cards[i], cards[j])
+                        or applications_interact(cards[j], cards[i])):
+                    parent[find(i)] = find(j)
+
+        groups = {}
+        for i in range(len(cards)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def _history(self, entity) -> list:
+        return self.engine.entity_histories.get(entity.id, [])
+
+    def _base_block(self, entity, card: CreditCard):
+        """Block reason against the entity's existing history alone — the
+        precomputed per-entity index every plan starts from."""
+        key = (entity.id, card.id)
+        if key not in self._base_blocks:
+            history = self._history(entity)
+            if any(uc.card.id == card.id and uc.closed_date is None for uc in history):
+                self._base_blocks[key] = 'already holds this card'
+            else:
+                self._base_blocks[key] = application_block(card, history, self.engine.today)
+        return self._base_blocks[key]
+
+    def _planned_entry(self, card: CreditCard):
+        return SimpleNamespace(card=card, opened_date=self.engine.today, closed_date=None,
+                               bonus_earned_date=None, bonus_override=None)
+
+    def _options(self, card_action: dict, planned_on: dict, program_multipliers: dict) -> list:
+        """[(entity, position, bonus value)] for every entity that could
+        take this application given what is already planned on it."""
+        card = card_action['card']
+        options = []
+        for position, entity in enumerate(
+                self.engine.eligibility_manager.candidate_entities(card)):
+            if self._base_block(entity, card) is not None:
+                continue
+            planned = planned_on.get(entity.id, [])
+            if any(other.id == card.id for other in planned):
+                continue
+            history = self._history(entity)
+            if planned:
+                history = history + [self._planned_entry(other) for other in planned]
+                if (any(applications_interact(card, other) for other in planned)
+                        and application_block(card, history, self.engine.today) is not None):
+                    continue
+            bonus = 0.0
+            if bonus_ineligibility(card, history, self.engine.today) is None:
+                bonus = self._bonus_value(card, program_multipliers)
+            options.append((entity, position, bonus))
+        return options
+
+    def _bonus_value(self, card: CreditCard, program_multipliers: dict) -> float:
+        manager = self.engine.bonus_capacity_manager
+        if not manager.can_meet_signup_requirement(card):
+            return 0.0
+        return manager.signup_bonus_face_value(card, program_multipliers)
+
+    def _search(self, applies: List[dict], program_multipliers: dict) -> tuple:
+        # Selected cards first, in portfolio order; second copies last.
+        order = sorted(range(len(applies)),
+                       key=lambda i: bool(applies[i].get('duplicate_copy')))
+        ceilings = []
+        for i in order:
+            best_bonus = max((bonus for _, _, bonus in
+                              self._options(applies[i], {}, program_multipliers)), default=0.0)
+            weight = self.COPY_WEIGHT if applies[i].get('duplicate_copy') else self.SELECTED_WEIGHT
+            ceilings.append(weight + best_bonus)
+        remaining_ceiling = [0.0] * (len(order) + 1)
+        for k in range(len(order) - 1, -1, -1):
+            remaining_ceiling[k] = remaining_ceiling[k + 1] + ceilings[k]
+
+        best = {'score': float('-inf'), 'picks': None}
+        picks = [None] * len(applies)
+        planned_on = {}
+        nodes = 0
+
+        def descend(k, score):
+            nonlocal nodes
+            nodes += 1
+            if k == len(order):
+                if score > best['score']:
+                    best['score'] = score
+                    best['picks'] = list(picks)
+                return
+            if nodes > self.SEARCH_NODE_BUDGET and best['picks'] is not None:
+                return
+            if score + remaining_ceiling[k] <= best['score']:
+                return
+
+            card_action = applies[order[k]]
+            weight = (self.COPY_WEIGHT if card_action.get('duplicate_copy')
+                      else self.SELECTED_WEIGHT)
+            for entity, position, bonus in self._options(
+                    card_action, planned_on, program_multipliers):
+                picks[order[k]] = entity
+                planned_on.setdefault(entity.id, []).append(card_action['card'])
+                descend(k + 1, score + weight + bonus - self.ORDER_WEIGHT * position)
+                planned_on[entity.id].pop()
+            picks[order[k]] = None
+            descend(k + 1, score)
+
+        descend(0, 0.0)
+        exhaustive = nodes <= self.SEARCH_NODE_BUDGET
+        if not exhaustive:
+            logger.debug(f"Household plan: search budget hit after {nodes} nodes, "
+                         f"keeping best plan found")
+        return best['picks'], exhaustive
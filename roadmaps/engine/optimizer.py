@@ -3,6 +3,7 @@ from typing import List, Dict
 from cards.models import CreditCard
 from collections import defaultdict
 from itertools import combinations
+from creditcard_guru.metrics import optimizer_iterations
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +11,11 @@ class PortfolioOptimizer:
     """
     Manages portfolio search combinations, scenario evaluations, greedy card selection,
     and efficiency calculations to select the optimal portfolio.
+
+    Scenario actions are compact numeric records ({'card', 'action',
+    'priority'} plus the values they were scored on); the orchestrator
+    writes the user-facing reasoning for the portfolio it keeps.
+    `generate_card_reasoning` renders text for a card on demand.
     """
 
     def __init__(self, engine):
@@ -18,12 +24,15 @@ class PortfolioOptimizer:
     def find_optimal_portfolio(self, current_cards: List[CreditCard], available_cards: List[CreditCard], max_cards: int) -> List[dict]:
         """Find the optimal combination of cards for maximum portfolio value."""
         scenarios = []
+        # Both scenarios score the same cards: value them all in one pass.
+        valuations = self.engine.valuations
+        valuations.prime(list(current_cards) + list(available_cards))
 
         # Scenario 1: Keep profitable ones, add best new cards
         profitable_current_cards = []
         unprofitable_current_cards = []
         for card in current_cards:
-            rewards_breakdown = self.engine._calculate_card_rewards_breakdown(card)
+            rewards_breakdown = valuations.rewards_breakdown(card)
             annual_rewards = rewards_breakdown['total_rewards']
             annual_fee = float(card.annual_fee)
             net_value = annual_rewards - annual_fee
@@ -44,7 +53,7 @@ class PortfolioOptimizer:
             scenario1['actions'].append({
                 'card': card,
                 'action': 'cancel',
-                'reasoning': f"Cancel - losing money: ${annual_rewards:.0f} rewards vs ${annual_fee} fee (net: ${annual_rewards - annual_fee:.0f})",
+                'annual_rewards': annual_rewards,
                 'priority': 1
             })
 
@@ -59,16 +68,16 @@ class PortfolioOptimizer:
         )
         scenarios.append(("full_optimization", scenario2))
 
-        logger.debug(f"Scenario comparison:")
-        for name, scenario in scenarios:
-            actions_summary = {}
-            for action in scenario['actions']:
-                action_type = action['action']
-                actions_summary[action_type] = actions_summary.get(action_type, 0) + 1
-            logger.debug(f"  {name}: value=${scenario['net_portfolio_value']:.2f}, actions={actions_summary}")
-
         best_scenario = max(scenarios, key=lambda x: x[1]['net_portfolio_value'])
-        logger.debug(f"Selected scenario: {best_scenario[0]} with value ${best_scenario[1]['net_portfolio_value']:.2f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Scenario comparison:")
+            for name, scenario in scenarios:
+                actions_summary = {}
+                for action in scenario['actions']:
+                    action_type = action['action']
+                    actions_summary[action_type] = actions_summary.get(action_type, 0) + 1
+                logger.debug(f"  {name}: value=${scenario['net_portfolio_value']:.2f}, actions={actions_summary}")
+            logger.debug(f"Selected scenario: {best_scenario[0]} with value ${best_scenario[1]['net_portfolio_value']:.2f}")
         return best_scenario[1]['actions']
 
     def evaluate_portfolio_scenario(self, cards_to_keep: List[CreditCard], cards_to_apply: List[CreditCard],
@@ -79,25 +88,16 @@ class PortfolioOptimizer:
         else:
             actions = []
             for card in cards_to_keep:
-                rewards_breakdown = self.engine._calculate_card_rewards_breakdown(card)
+                rewards_breakdown = self.engine.valuations.rewards_breakdown(card)
                 annual_rewards = rewards_breakdown['total_rewards']
                 annual_fee = float(card.annual_fee)
-                net_value = annual_rewards - annual_fee
-
-                if net_value >= 0 or annual_fee == 0:
-                    actions.append({
-                        'card': card,
-                        'action': 'keep',
-                        'reasoning': f"Keep - earning ${annual_rewards:.0f} annually vs ${annual_fee} fee",
-                        'priority': 2
-                    })
-                else:
-                    actions.append({
-                        'card': card,
-                        'action': 'cancel',
-                        'reasoning': f"Cancel - provides no additional portfolio value (${annual_rewards:.0f} rewards vs ${annual_fee} fee)",
-                        'priority': 1
-                    })
+                keep = annual_rewards - annual_fee >= 0 or annual_fee == 0
+                actions.append({
+                    'card': card,
+                    'action': 'keep' if keep else 'cancel',
+                    'annual_rewards': annual_rewards,
+                    'priority': 2 if keep else 1
+                })
 
             remaining_slots = max_total_cards - len(cards_to_keep)
             if remaining_slots > 0 and available_cards:
@@ -128,6 +128,7 @@ class PortfolioOptimizer:
     def select_optimal_card_combination(self, all_cards: List[CreditCard], max_cards: int) -> dict:
         """Select optimal combination of cards from all available."""
         current_card_ids = {uc.card.id for uc in self.engine.user_cards}
+        valuations = self.engine.valuations
         card_scores = []
         for card in all_cards:
             if card.id in current_card_ids:
@@ -140,9 +141,9 @@ class PortfolioOptimizer:
                 if not self.engine._is_eligible_for_card(card):
                     continue
                 annual_rewards = self.calculate_smart_card_value(card, signup_bonus=False)
-                signup_bonus_value = self.engine._get_signup_bonus_value(card)
+                signup_bonus_value = valuations.bonus_value(card)
 
-                if self.engine._bonus_months_needed(card) > self.engine.BONUS_CAPACITY_MONTHS:
+                if valuations.months_needed(card) > self.engine.BONUS_CAPACITY_MONTHS:
                     signup_bonus_value = 0
                 annual_fee_waived = card.metadata.get('annual_fee_waived_first_year', False)
                 effective_fee = 0 if annual_fee_waived else float(card.annual_fee)
@@ -176,11 +177,11 @@ class PortfolioOptimizer:
 
         actions = []
         for i, card_data in enumerate(optimal_cards):
-            reasoning = self.generate_card_reasoning(card_data)
             actions.append({
                 'card': card_data['card'],
                 'action': card_data['action'],
-                'reasoning': reasoning,
+                'annual_rewards': card_data['annual_rewards'],
+                'signup_bonus': card_data['signup_bonus'],
                 'priority': i + 1
             })
 
@@ -197,22 +198,15 @@ class PortfolioOptimizer:
                     uc.card, portfolio_allocation, credit_allocation, program_multipliers)
                 annual_rewards = rewards_breakdown['total_rewards']
 
-                if annual_fee == 0:
-                    logger.debug(f"Keeping $0 fee card instead of canceling: {uc.card.name}")
-                    actions.append({
-                        'card': uc.card,
-                        'action': 'keep',
-                        'reasoning': f"Keep - no annual fee card (${annual_rewards:.0f} rewards, $0 fee)",
-                        'priority': 60
-                    })
-                else:
-                    logger.debug(f"Recommending cancel for fee card: {uc.card.name} (${annual_fee} fee)")
-                    actions.append({
-                        'card': uc.card,
-                        'action': 'cancel',
-                        'reasoning': f"Cancel - provides no additional portfolio value (${annual_rewards:.0f} rewards vs ${annual_fee:.0f} fee)",
-                        'priority': 50
-                    })
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"{'Keeping $0 fee' if annual_fee == 0 else 'Recommending cancel for fee'} "
+                                 f"card: {uc.card.name} (${annual_fee} fee)")
+                actions.append({
+                    'card': uc.card,
+                    'action': 'keep' if annual_fee == 0 else 'cancel',
+                    'annual_rewards': annual_rewards,
+                    'priority': 60 if annual_fee == 0 else 50
+                })
 
         portfolio_value = self.calculate_scenario_portfolio_value(actions)
         return {
@@ -253,7 +247,7 @@ class PortfolioOptimizer:
                     if entry and entry['counted']:
                         total_value += entry['bonus_value'] * self.engine.weights['signup_bonus_weight']
 
-                for reward_cat in card.reward_categories.active_on(self.engine.today):
+                for reward_cat in self.engine.rewards_calculator.active_reward_categories(card):
                     category_slug = reward_cat.category.slug
                     rate = float(reward_cat.reward_rate)
                     max_spend = reward_cat.max_annual_spend
@@ -312,6 +306,7 @@ class PortfolioOptimizer:
 
         available_cards = cards_to_test.copy()
 
+        iterations = 0
         while len(current_combination) < max_cards and available_cards:
             best_addition = None
             best_addition_value = current_value
@@ -320,6 +315,7 @@ class PortfolioOptimizer:
                 test_combination = current_combination + [card_to_add]
                 test_actions = [{'card': cd['card'], 'action': cd['action']} for cd in test_combination]
                 test_value = self.calculate_scenario_portfolio_value(test_actions)
+                iterations += 1
 
                 if test_value > best_addition_value:
                     best_addition_value = test_value
@@ -335,6 +331,7 @@ class PortfolioOptimizer:
                     best_combination = current_combination.copy()
             else:
                 break
+        optimizer_iterations.observe(iterations)
 
         if best_value <= 0:
             return []
@@ -346,10 +343,11 @@ class PortfolioOptimizer:
         card = card_data['card']
         action = card_data['action']
 
+        valuations = self.engine.valuations
         if action == 'apply':
-            rewards_breakdown = self.engine._calculate_card_rewards_breakdown(card)
+            rewards_breakdown = valuations.rewards_breakdown(card)
             annual_rewards = rewards_breakdown['total_rewards']
-            signup_bonus = self.engine._get_signup_bonus_value(card)
+            signup_bonus = valuations.bonus_value(card)
             annual_fee_waived = card.metadata.get('annual_fee_waived_first_year', False)
             effective_fee = 0 if annual_fee_waived else float(card.annual_fee)
             total_estimated_value = annual_rewards - effective_fee + signup_bonus
@@ -359,7 +357,7 @@ class PortfolioOptimizer:
             else:
                 return f"Total estimated value: ${total_estimated_value:.0f} (${annual_rewards:.0f} annual rewards - ${effective_fee} fee)"
         elif action == 'keep':
-            rewards_breakdown = self.engine._calculate_card_rewards_breakdown(card)
+            rewards_breakdown = valuations.rewards_breakdown(card)
             annual_rewards = rewards_breakdown['total_rewards']
             annual_fee = float(card.annual_fee)
             net_value = annual_rewards - annual_fee
@@ -371,14 +369,15 @@ class PortfolioOptimizer:
         """Select best new cards to apply for."""
         actions = []
         card_scores = []
+        valuations = self.engine.valuations
 
         for card in available_cards:
             if not self.engine._is_eligible_for_card(card):
                 continue
 
-            rewards_breakdown = self.engine._calculate_card_rewards_breakdown(card)
+            rewards_breakdown = valuations.rewards_breakdown(card)
             annual_rewards = rewards_breakdown['total_rewards']
-            signup_bonus_value = self.engine._get_signup_bonus_value(card)
+            signup_bonus_value = valuations.bonus_value(card)
             annual_fee = float(card.annual_fee)
             annual_fee_waived_first_year = card.metadata.get('annual_fee_waived_first_year', False)
             effective_annual_fee = 0 if annual_fee_waived_first_year else annual_fee
@@ -391,19 +390,18 @@ class PortfolioOptimizer:
                     'card': card,
                     'total_value': total_value,
                     'net_annual_value': net_annual_value,
+                    'annual_rewards': annual_rewards,
                     'signup_bonus': signup_bonus_value,
-                    'rewards_breakdown': rewards_breakdown['breakdown'],
-                    'total_spending_on_card': rewards_breakdown.get('total_spending_on_card', 0)
                 })
 
         card_scores.sort(key=lambda x: x['total_value'], reverse=True)
 
         for i, card_data in enumerate(card_scores[:max_new_cards]):
-            reasoning = f"Apply - ${card_data['total_value']:.0f} total value (${card_data['net_annual_value']:.0f} annual + ${card_data['signup_bonus']:.0f} signup bonus)"
             actions.append({
                 'card': card_data['card'],
                 'action': 'apply',
-                'reasoning': reasoning,
+                'annual_rewards': card_data['annual_rewards'],
+                'signup_bonus': card_data['signup_bonus'],
                 'priority': i + 10
             })
 
@@ -443,19 +441,14 @@ class PortfolioOptimizer:
             [action['card'] for action in portfolio_cards])
         total_credits_value = sum(value for value, _ in credit_allocation.values())
 
-        if not hasattr(self.engine, '_cached_parent_spending'):
-            self.engine._cached_parent_spending = self.engine._build_parent_category_spending()
-
-        parent_category_spending = self.engine._cached_parent_spending
+        valuations = self.engine.valuations
+        parent_category_spending = valuations.parent_spending
 
         category_best_rates = {}
 
         for action in portfolio_cards:
             card = action['card']
-            if not hasattr(card, '_cached_reward_categories'):
-                card._cached_reward_categories = list(card.reward_categories.active_on(self.engine.today).select_related('category'))
-
-            for reward_category in card._cached_reward_categories:
+            for reward_category in valuations.reward_categories(card):
                 category_slug = reward_category.category.slug
                 reward_rate = float(reward_category.reward_rate)
 
@@ -487,8 +480,7 @@ class PortfolioOptimizer:
                 category_rewards = points_earned * reward_value_multiplier
                 total_portfolio_rewards += category_rewards
 
-        total_parent_spending = sum(parent_category_spending.values())
-        unallocated_spending = total_parent_spending - allocated_spending
+        unallocated_spending = valuations.total_spending - allocated_spending
 
         if unallocated_spending > 0:
             best_general_rate = 1.0
@@ -496,7 +488,7 @@ class PortfolioOptimizer:
 
             for action in portfolio_cards:
                 card = action['card']
-                for reward_category in card._cached_reward_categories:
+                for reward_category in valuations.reward_categories(card):
                     if reward_category.category.slug in ['general', 'other', 'everything-else']:
                         rate = float(reward_category.reward_rate)
                         if rate > best_general_rate:
@@ -513,10 +505,10 @@ class PortfolioOptimizer:
         total_efficiency_boost = 0
         for action in portfolio_cards:
             card = action['card']
-            efficiency_score = self.calculate_spending_efficiency(card)
+            efficiency_score = valuations.efficiency(card)
 
             if efficiency_score > 0.1:
-                card_annual_value = self.calculate_smart_card_value(card, signup_bonus=False) - float(card.annual_fee)
+                card_annual_value = valuations.standalone_value(card) - float(card.annual_fee)
                 if action['action'] == 'apply':
                     entry = capacity_plan['by_card_id'].get(card.id)
                     card_signup_value = ((entry['bonus_value'] * self.engine.weights['signup_bonus_weight'])
@@ -534,81 +526,12 @@ class PortfolioOptimizer:
 
     def calculate_smart_card_value(self, card: CreditCard, signup_bonus: bool = True) -> float:
         """Calculate card value considering actual user spending and category competition."""
-        if not hasattr(self.engine, '_cached_parent_spending'):
-            self.engine._cached_parent_spending = self.engine._build_parent_category_spending()
-
-        parent_category_spending = self.engine._cached_parent_spending
-        total_rewards = 0
-
-        if not hasattr(card, '_cached_reward_categories'):
-            card._cached_reward_categories = list(card.reward_categories.active_on(self.engine.today).select_related('category'))
-
-        for reward_category in card._cached_reward_categories:
-            category_slug = reward_category.category.slug
-            annual_spend = parent_category_spending.get(category_slug, 0.0)
-
-            if annual_spend == 0:
-                for orig_category_slug, monthly_amount in self.engine.spending_amounts.items():
-                    if orig_category_slug == category_slug:
-                        annual_spend = float(monthly_amount) * 12
-                        break
-
-            if annual_spend > 0:
-                reward_rate = float(reward_category.reward_rate)
-                effective_spend = annual_spend
-                if reward_category.max_annual_spend:
-                    effective_spend = min(annual_spend, float(reward_category.max_annual_spend))
-
-                reward_value_multiplier = self.engine._own_multiplier(card)
-                category_rewards = effective_spend * reward_rate * reward_value_multiplier
-                total_rewards += category_rewards
-
-        # Add single-card credits value
-        credits_value, _ = self.engine._calculate_card_credits_value(card)
-        total_rewards += credits_value
-
+        valuations = self.engine.valuations
+        total_rewards = valuations.standalone_value(card)
         if signup_bonus:
-            signup_value = self.engine._get_signup_bonus_value(card)
-            total_rewards += signup_value
-
+            total_rewards += valuations.bonus_value(card)
         return total_rewards
 
     def calculate_spending_efficiency(self, card: CreditCard) -> float:
         """Calculate how efficiently a card matches user's actual spending pattern."""
-        if not hasattr(self.engine, '_cached_parent_spending'):
-            self.engine._cached_parent_spending = self.engine._build_parent_category_spending()
-
-        parent_category_spending = self.engine._cached_parent_spending
-        total_user_spending = sum(parent_category_spending.values())
-
-        if total_user_spending == 0:
-            return 0.0
-
-        if not hasattr(card, '_cached_reward_categories'):
-            card._cached_reward_categories = list(card.reward_categories.active_on(self.engine.today).select_related('category'))
-
-        relevant_spending = 0.0
-        weighted_efficiency = 0.0
-
-        for reward_category in card._cached_reward_categories:
-            category_slug = reward_category.category.slug
-            annual_spend = parent_category_spending.get(category_slug, 0.0)
-
-            if annual_spend == 0:
-                for orig_category_slug, monthly_amount in self.engine.spending_amounts.items():
-                    if orig_category_slug == category_slug:
-                        annual_spend = float(monthly_amount) * 12
-                        break
-
-            if annual_spend > 0:
-                reward_rate = float(reward_category.reward_rate)
-                spending_weight = annual_spend / total_user_spending
-                efficiency = max(0, (reward_rate - 1.0) / 4.0)
-                efficiency = min(1.0, efficiency)
-
-                weighted_efficiency += efficiency * spending_weight
-                relevant_spending += annual_spend
-
-        coverage_ratio = relevant_spending / total_user_spending
-        final_score = (weighted_efficiency * 0.7) + (coverage_ratio * 0.3)
-        return min(1.0, final_score)
+        return self.engine.valuations.efficiency(card)
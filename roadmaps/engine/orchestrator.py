@@ -1,9 +1,13 @@
 import logging
+import time
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import List, Dict
 from cards.models import CreditCard, UserSpendingProfile, UserCard
 from roadmaps.models import Roadmap
+from roadmaps.engine.utils import render_breakdown
+from roadmaps.profiling import record_engine_inputs
+from creditcard_guru.metrics import candidates_label, engine_duration
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +24,16 @@ class RecommendationEngineOrchestrator:
     # months of the user's total spending (see _bonus_months_needed).
     BONUS_CAPACITY_MONTHS = 12.0
 
-    def __init__(self, profile: UserSpendingProfile, user_cards_data=None, strategy=None):
+    def __init__(self, profile: UserSpendingProfile, user_cards_data=None, strategy=None,
+                 as_of: date = None):
         from roadmaps.strategies import strategy_weights
         self.profile = profile
         self.strategy = strategy
         self.weights = strategy_weights(strategy)
-        self.today = date.today()
+        # The date the plan is evaluated on: which rotating/seasonal
+        # categories are in effect and where issuer eligibility windows
+        # fall. Defaults to today; a later date plans e.g. next quarter.
+        self.today = as_of or date.today()
 
         if profile.user:
             self.card_history = list(
@@ -84,6 +92,7 @@ class RecommendationEngineOrchestrator:
         self._card_credits_cache = {}
         self._credit_prefs = None
         self._credit_spending_categories = None
+        self._valuations = None
 
         from roadmaps.engine.eligibility_manager import EligibilityManager
         self.eligibility_manager = EligibilityManager(self)
@@ -103,18 +112,49 @@ class RecommendationEngineOrchestrator:
         from roadmaps.engine.calculators.expense import ExpenseRecommender
         self.expense_recommender = ExpenseRecommender(self)
 
-    def generate_quick_recommendations(self, roadmap: Roadmap) -> List[dict]:
-        """Generate recommendations without saving to database (includes breakdowns)"""
-        self.spending_amounts = {
-            sa.category.slug: sa.monthly_amount
-            for sa in self.profile.spending_amounts.all()
-        }
-        self._card_credits_cache = {}
-        self._credit_prefs = None
-        self._credit_spending_categories = None
-        logger.debug(f"Reloaded spending_amounts: {dict(self.spending_amounts)}")
-        
-        eligible_cards = self._get_filtered_cards(roadmap)
+        from roadmaps.engine.household import HouseholdPlanner
+        self.household = HouseholdPlanner(self)
+
+        from roadmaps.engine.what_if import WhatIfEvaluator
+        self.what_if = WhatIfEvaluator(self)
+
+    def generate_quick_recommendations(self, roadmap: Roadmap, spending_amounts: dict = None,
+                                       eligible_cards: List[CreditCard] = None) -> dict:
+        """Generate recommendations without saving to database (includes breakdowns).
+
+        Returns {'recommendations': [...], 'portfolio_summary': {...}}, the
+        input RoadmapRecommendationResponseSerializer expects: the summary
+        covers the whole portfolio, so it is not repeated per recommendation.
+
+        By default spending is reloaded from the profile and the catalog from
+        the roadmap's filters. evaluate_spending_variants() passes both in,
+        so repeated runs reuse the cards, their rate rows and eligibility.
+        """
+        selection = self.select_quick_recommendations(roadmap, spending_amounts, eligible_cards)
+        return self.complete_quick_recommendations(roadmap, selection)
+
+    def select_quick_recommendations(self, roadmap: Roadmap, spending_amounts: dict = None,
+                                     eligible_cards: List[CreditCard] = None) -> dict:
+        """First stage of generate_quick_recommendations: which cards, in
+        what order and month, with their values. Breakdowns are still
+        numeric and there is no portfolio summary yet; the streaming
+        endpoint sends this before complete_quick_recommendations runs."""
+        started = time.perf_counter()
+        if spending_amounts is None:
+            self.spending_amounts = {
+                sa.category.slug: sa.monthly_amount
+                for sa in self.profile.spending_amounts.all()
+            }
+            self._card_credits_cache = {}
+            self._credit_prefs = None
+            self._credit_spending_categories = None
+            logger.debug(f"Reloaded spending_amounts: {dict(self.spending_amounts)}")
+        else:
+            self._use_spending(spending_amounts)
+        self._valuations = None
+
+        if eligible_cards is None:
+            eligible_cards = self._get_filtered_cards(roadmap)
         recommendations = self._generate_portfolio_optimized_recommendations(eligible_cards, roadmap)
         
         apply_recommendations = [rec for rec in recommendations if rec['action'] == 'apply']
@@ -127,9 +167,10 @@ class RecommendationEngineOrchestrator:
                 recommendations.append(fallback_rec)
                 logger.debug(f"Added fallback recommendation: APPLY {fallback_rec['card'].name}")
         
-        logger.debug(f"Generated {len(recommendations)} recommendations before filtering:")
-        for rec in recommendations:
-            logger.debug(f"  - {rec['action'].upper()}: {rec['card'].name} (priority: {rec['priority']})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Generated {len(recommendations)} recommendations before filtering:")
+            for rec in recommendations:
+                logger.debug(f"  - {rec['action'].upper()}: {rec['card'].name} (priority: {rec['priority']})")
         
         keeps_and_applies = [rec for rec in recommendations if rec['action'] in ['keep', 'apply', 'upgrade', 'downgrade']]
         cancels = [rec for rec in recommendations if rec['action'] == 'cancel']
@@ -161,7 +202,7 @@ class RecommendationEngineOrchestrator:
             for rec in new_card_actions:
                 if len(selected_applies) >= max_new_card_applications:
                     break
-                months = (self._bonus_months_needed(rec['card'])
+                months = (self.valuations.months_needed(rec['card'])
                           if float(rec.get('signup_bonus_value', 0)) > 0 else 0.0)
                 if months_committed + months <= self.BONUS_CAPACITY_MONTHS:
                     months_committed += months
@@ -248,38 +289,82 @@ class RecommendationEngineOrchestrator:
                     rec['action'] = 'cancel'
                     rec['reasoning'] = f"Cancel - losing money: ${estimated_value + annual_fee:.0f} rewards vs ${annual_fee:.0f} fee (net: ${estimated_value:.0f})"
         
-        logger.debug(f"Smart filtering breakdown:")
-        logger.debug(f"  - Other keeps/applies: {len(filtered_other_keeps_applies)}")
-        logger.debug(f"  - Zero fee keeps: {len(zero_fee_keeps)}")
-        actual_cancels = [rec for rec in recommendations if rec['action'] == 'cancel']
-        logger.debug(f"  - Cancels: {len(actual_cancels)}")
-        logger.debug(f"Final {len(recommendations)} recommendations after smart filtering:")
-        for rec in recommendations:
-            fee_info = f" (${rec['card'].annual_fee} fee)" if rec['action'] in ['keep', 'cancel'] else ""
-            logger.debug(f"  - {rec['action'].upper()}: {rec['card'].name}{fee_info} (priority: {rec['priority']})")
-        
-        portfolio_summary = self._calculate_portfolio_summary(recommendations)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Smart filtering breakdown:")
+            logger.debug(f"  - Other keeps/applies: {len(filtered_other_keeps_applies)}")
+            logger.debug(f"  - Zero fee keeps: {len(zero_fee_keeps)}")
+            actual_cancels = [rec for rec in recommendations if rec['action'] == 'cancel']
+            logger.debug(f"  - Cancels: {len(actual_cancels)}")
+            logger.debug(f"Final {len(recommendations)} recommendations after smart filtering:")
+            for rec in recommendations:
+                fee_info = f" (${rec['card'].annual_fee} fee)" if rec['action'] in ['keep', 'cancel'] else ""
+                logger.debug(f"  - {rec['action'].upper()}: {rec['card'].name}{fee_info} (priority: {rec['priority']})")
 
-        portfolio_summary['bonus_capacity'] = {
-            'total_monthly_spending': self._total_monthly_spending(),
-            'months_committed': round(months_committed, 1),
-            'capacity_months': self.BONUS_CAPACITY_MONTHS,
-            'deferred_applies': [rec['card'].name for rec in deferred_applies],
-            'timeline': timeline,
-            'bonus_less_applies': bonus_less_applies,
+        return {
+            'recommendations': recommendations,
+            'bonus_capacity': {
+                'total_monthly_spending': self._total_monthly_spending(),
+                'months_committed': round(months_committed, 1),
+                'capacity_months': self.BONUS_CAPACITY_MONTHS,
+                'deferred_applies': [rec['card'].name for rec in deferred_applies],
+                'timeline': timeline,
+                'bonus_less_applies': bonus_less_applies,
+            },
+            'candidates': len(eligible_cards),
+            'started': started,
         }
-        
+
+    @staticmethod
+    def render_recommendation(rec: dict) -> dict:
+        """Give a selected recommendation its breakdown display text.
+        Breakdown lines are numeric until here: only the recommendations
+        actually returned are rendered. Idempotent."""
+        rec['rewards_breakdown'] = render_breakdown(rec['rewards_breakdown'])
+        return rec
+
+    def complete_quick_recommendations(self, roadmap: Roadmap, selection: dict) -> dict:
+        """Second stage of generate_quick_recommendations: render any
+        breakdowns not yet rendered and compute the portfolio summary."""
+        recommendations = selection['recommendations']
         for rec in recommendations:
-            rec['portfolio_summary'] = portfolio_summary
+            self.render_recommendation(rec)
 
-        return recommendations
+        portfolio_summary = self._calculate_portfolio_summary(recommendations)
+        portfolio_summary['bonus_capacity'] = selection['bonus_capacity']
+
+        engine_duration.observe(
+            time.perf_counter() - selection['started'],
+            strategy=self.strategy['key'] if self.strategy else 'default',
+            candidates=candidates_label(selection['candidates']))
+        record_engine_inputs(self, roadmap)
+        return {'recommendations': recommendations, 'portfolio_summary': portfolio_summary}
     
+    def _use_spending(self, spending_amounts: dict):
+        """Swap in a spending dict, dropping only the caches it invalidates:
+        counted credits depend on which categories have spending at all."""
+        positive = {slug for slug, amount in spending_amounts.items() if amount > 0}
+        if positive != self._credit_spending_categories:
+            self._card_credits_cache = {}
+            self._credit_spending_categories = None
+        self.spending_amounts = dict(spending_amounts)
+
+    @property
+    def valuations(self):
+        """This run's ValuationTable, built on first use after spending is set."""
+        if self._valuations is None:
+            from roadmaps.engine.valuation import ValuationTable
+            self._valuations = ValuationTable(self)
+        return self._valuations
+
+    def evaluate_spending_variants(self, roadmap: Roadmap, variants: List[dict]) -> dict:
+        return self.what_if.evaluate_spending_variants(roadmap, variants)
+
     def generate_roadmap(self, roadmap: Roadmap) -> List[dict]:
         """Generate recommendations and save them to the database"""
         from roadmaps.models import RoadmapRecommendation, RoadmapCalculation
         
         roadmap.recommendations.all().delete()
-        recommendations = self.generate_quick_recommendations(roadmap)
+        recommendations = self.generate_quick_recommendations(roadmap)['recommendations']
         
         saved_recommendations = []
         for rec in recommendations:
@@ -357,13 +442,14 @@ class RecommendationEngineOrchestrator:
         current_cards = [uc.card for uc in self.user_cards]
         available_new_cards = [c for c in eligible_cards if c.id not in {card.id for card in current_cards}]
         
-        logger.debug(f"User has {len(current_cards)} current cards:")
-        for card in current_cards:
-            logger.debug(f"  - {card.name}")
-        logger.debug(f"Found {len(available_new_cards)} available new cards")
-        logger.debug(f"Max recommendations allowed: {roadmap.max_recommendations}")
-        logger.debug(f"Will scenario 1 use optimization? {len(current_cards) == 0}")
-        logger.debug(f"Will scenario 2 use optimization? {True}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"User has {len(current_cards)} current cards:")
+            for card in current_cards:
+                logger.debug(f"  - {card.name}")
+            logger.debug(f"Found {len(available_new_cards)} available new cards")
+            logger.debug(f"Max recommendations allowed: {roadmap.max_recommendations}")
+            logger.debug(f"Will scenario 1 use optimization? {len(current_cards) == 0}")
+            logger.debug(f"Will scenario 2 use optimization? {True}")
         
         max_total_cards = len(current_cards) + roadmap.max_recommendations
         best_portfolio = self._find_optimal_portfolio(current_cards, available_new_cards, max_total_cards)
@@ -377,6 +463,8 @@ class RecommendationEngineOrchestrator:
                 actions_by_card[key] = card_action
         best_portfolio = list(actions_by_card.values())
 
+        if len(self.entities) > 1:
+            self.eligibility_manager.set_planned_entities({})
         for card_action in list(best_portfolio):
             if card_action['action'] != 'keep':
                 continue
@@ -392,6 +480,14 @@ class RecommendationEngineOrchestrator:
                 'duplicate_copy_owner': self._holding_entity_for_card(card),
             })
 
+        # Multi-player households: decide jointly which entity applies for
+        # what, so per-entity 5/24 and issuer caps hold across the plan.
+        if len(self.entities) > 1:
+            planned_holdings = [ca['card'] for ca in best_portfolio
+                                if ca['action'] in ('keep', 'apply') and not ca.get('duplicate_copy')]
+            best_portfolio = self.household.plan_applications(
+                best_portfolio, self._program_multipliers(planned_holdings))
+
         held_cards = [ca['card'] for ca in best_portfolio
                       if ca['action'] in ('keep', 'apply') and not ca.get('duplicate_copy')]
         portfolio_allocation = self._calculate_portfolio_allocation(held_cards)
@@ -725,6 +821,14 @@ class RecommendationEngineOrchestrator:
         return self.expense_recommender.recommend_for_expense(
             amount, category_slug, eligible_cards, max_results=roadmap.max_recommendations)
 
+    def _plan_expenses(self, expenses: List[dict], roadmap: Roadmap) -> dict:
+        """Several dated one-off expenses planned jointly, with up to
+        `roadmap.max_recommendations` new cards. See
+        `ExpenseRecommender.plan_expenses`."""
+        eligible_cards = self._get_filtered_cards(roadmap)
+        return self.expense_recommender.plan_expenses(
+            expenses, eligible_cards, max_new_cards=roadmap.max_recommendations)
+
     def _counted_card_credits(self, card: CreditCard) -> list:
         """Credits on this card that count for THIS user."""
         return self.credits_calculator.counted_card_credits(card)
@@ -793,10 +897,11 @@ class RecommendationEngineOrchestrator:
         category_optimization = {}
         category_allocation = []
 
-        logger.debug(f"self.spending_amounts in portfolio summary: {dict(self.spending_amounts)}")
-        for category_slug, monthly_amount in self.spending_amounts.items():
-            annual_spend = float(monthly_amount) * 12
-            logger.debug(f"{category_slug}: ${monthly_amount}/month -> ${annual_spend}/year")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"self.spending_amounts in portfolio summary: {dict(self.spending_amounts)}")
+            for category_slug, monthly_amount in self.spending_amounts.items():
+                annual_spend = float(monthly_amount) * 12
+                logger.debug(f"{category_slug}: ${monthly_amount}/month -> ${annual_spend}/year")
 
         for entry in portfolio_allocation:
             card = entry['card']
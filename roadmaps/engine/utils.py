@@ -5,3 +5,81 @@ def info_item(name, text):
         'reward_rate': 0, 'reward_multiplier': 0, 'points_earned': 0,
         'category_rewards': 0, 'calculation': text, 'type': 'info',
     }
+
+
+def reward_line(label, annual_spend, rate, multiplier, category_rewards):
+    """Numeric record for a reward-category breakdown line. Scoring paths
+    only ever sum `category_rewards`; the text is added by render_breakdown()."""
+    return {
+        'label': label, 'monthly_spend': annual_spend / 12, 'annual_spend': annual_spend,
+        'reward_rate': rate, 'reward_multiplier': multiplier,
+        'points_earned': annual_spend * rate, 'category_rewards': category_rewards,
+        'type': 'reward_category',
+    }
+
+
+def credit_line(credit):
+    """Numeric record for a counted credit (same shape as reward lines)."""
+    return {
+        'monthly_spend': 0, 'annual_spend': 0, 'reward_rate': 0, 'reward_multiplier': 1.0,
+        'points_earned': credit['annual_value'], 'category_rewards': credit['annual_value'],
+        'type': 'credit', 'credit_detail': credit,
+    }
+
+
+def credit_text(credit):
+    """(display name, calculation) for a counted credit.
+
+    USD credits render the face `$` value throughout. Points-denominated
+    credits (non-USD `currency`) render the point amount and per-point
+    rate alongside the discounted dollar total, so the line item still
+    reconciles to the dollars that flow into totals (trustworthy math)."""
+    if credit.get('is_usd', True):
+        if credit['times_per_year'] > 1:
+            display = f"{credit['name']} (${credit['value']:.0f}×{credit['times_per_year']})"
+        else:
+            display = f"{credit['name']} (${credit['value']:.0f})"
+        return display, f"Card benefit: ${credit['annual_value']:.0f} annually"
+
+    currency = credit['currency']
+    qty_text = f"{credit['value']:,.0f} {currency} pts"
+    if credit['times_per_year'] > 1:
+        qty_text += f" × {credit['times_per_year']}/year"
+        display = f"{credit['name']} ({credit['value']:,.0f} {currency} pts×{credit['times_per_year']} → ${credit['annual_value']:.0f})"
+    else:
+        display = f"{credit['name']} ({credit['value']:,.0f} {currency} pts → ${credit['annual_value']:.0f})"
+    return display, f"Card benefit: {qty_text} × ${credit['rate']:.4f}/pt → ${credit['annual_value']:.0f} annually"
+
+
+def render_breakdown_item(item):
+    """Presentation form of one breakdown record: adds `category_name` and
+    `calculation`. Info lines (and already-rendered lines) pass through."""
+    if 'calculation' in item:
+        return item
+    if item['type'] == 'credit':
+        name, calculation = credit_text(item['credit_detail'])
+    else:
+        rate = item['reward_rate']
+        name = f"{item['label']} ({rate:.1f}x)"
+        calculation = (f"${item['annual_spend']:,.0f} × {rate:.1f}x × "
+                       f"{item['reward_multiplier']:.3f} = ${item['category_rewards']:.2f}")
+    rendered = {
+        'category_name': name,
+        'monthly_spend': item['monthly_spend'],
+        'annual_spend': item['annual_spend'],
+        'reward_rate': item['reward_rate'],
+        'reward_multiplier': item['reward_multiplier'],
+        'points_earned': item['points_earned'],
+        'category_rewards': item['category_rewards'],
+        'calculation': calculation,
+        'type': item['type'],
+    }
+    if 'credit_detail' in item:
+        rendered['credit_detail'] = item['credit_detail']
+    return rendered
+
+
+def render_breakdown(items):
+    """Render a recommendation's breakdown for display — run once on the
+    final recommendations, never inside scoring."""
+    return [render_breakdown_item(item) for item in items]
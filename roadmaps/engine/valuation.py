@@ -0,0 +1,115 @@
+import logging
+from typing import List
+
+from cards.models import CreditCard
+
+logger = logging.getLogger(__name__)
+
+
+class ValuationTable:
+    """
+    Per-run table of card-level valuations that depend only on the card and
+    the current spending — never on which other cards share the portfolio.
+
+    For each card id it holds the standalone annual value (category rewards
+    at the card's own multiplier plus single-card credits, no bonus), the
+    spending-efficiency score, the signup bonus value, the months of
+    spending its bonus needs and, on demand, the standalone rewards
+    breakdown. `prime()` fills the table for a whole candidate pool in one
+    pass; both optimizer scenarios, the sequencing step and
+    `ExpenseRecommender` then read from it instead of recomputing per call.
+
+    Owned by the engine and rebuilt whenever spending changes (see
+    `RecommendationEngine.valuations`). Reward-category rows come from the
+    engine's rate table, so no ORM instance is ever annotated.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.parent_spending = engine._build_parent_category_spending()
+        self.total_spending = sum(self.parent_spending.values())
+        self._entries = {}
+        self._breakdowns = {}
+
+    def prime(self, cards: List[CreditCard]):
+        """Value every card in `cards` not yet in the table, fetching their
+        reward categories in one query."""
+        missing = [card for card in cards if card.id not in self._entries]
+        if not missing:
+            return
+        self.engine.rewards_calculator.rate_table(missing)
+        for card in missing:
+            self._entries[card.id] = self._value(card)
+        logger.debug(f"Valuation table: primed {len(missing)} cards")
+
+    def entry(self, card: CreditCard) -> dict:
+        if card.id not in self._entries:
+            self.prime([card])
+        return self._entries[card.id]
+
+    def reward_categories(self, card: CreditCard) -> list:
+        """The card's reward categories active today."""
+        return [rc for _, rc in self.engine.rewards_calculator.rate_table([card])]
+
+    def standalone_value(self, card: CreditCard) -> float:
+        return self.entry(card)['standalone_value']
+
+    def efficiency(self, card: CreditCard) -> float:
+        return self.entry(card)['efficiency']
+
+    def bonus_value(self, card: CreditCard) -> float:
+        return self.entry(card)['bonus_value']
+
+    def months_needed(self, card: CreditCard) -> float:
+        return self.entry(card)['months_needed']
+
+    def rewards_breakdown(self, card: CreditCard) -> dict:
+        """`RewardsCalculator.calculate_card_rewards_breakdown`, once per card.
+        Callers must treat the result as read-only."""
+        if card.id not in self._breakdowns:
+            self._breakdowns[card.id] = \
+                self.engine.rewards_calculator.calculate_card_rewards_breakdown(card)
+        return self._breakdowns[card.id]
+
+    def _annual_spend(self, category_slug: str) -> float:
+        annual_spend = self.parent_spending.get(category_slug, 0.0)
+        if annual_spend == 0 and category_slug in self.engine.spending_amounts:
+            annual_spend = float(self.engine.spending_amounts[category_slug]) * 12
+        return annual_spend
+
+    def _value(self, card: CreditCard) -> dict:
+        multiplier = self.engine._own_multiplier(card)
+        standalone = 0.0
+        relevant_spending = 0.0
+        weighted_efficiency = 0.0
+        for reward_category in self.reward_categories(card):
+            annual_spend = self._annual_spend(reward_category.category.slug)
+            if annual_spend <= 0:
+                continue
+            reward_rate = float(reward_category.reward_rate)
+
+            effective_spend = annual_spend
+            if reward_category.max_annual_spend:
+                effective_spend = min(annual_spend, float(reward_category.max_annual_spend))
+            standalone += effective_spend * reward_rate * multiplier
+
+            if self.total_spending:
+                efficiency = min(1.0, max(0, (reward_rate - 1.0) / 4.0))
+                weighted_efficiency += efficiency * (annual_spend / self.total_spending)
+                relevant_spending += annual_spend
+
+        credits_value, _ = self.engine._calculate_card_credits_value(card)
+        standalone += credits_value
+
+        efficiency = 0.0
+        if self.total_spending:
+            coverage_ratio = relevant_spending / self.total_spending
+            efficiency = min(1.0, (weighted_efficiency * 0.7) + (coverage_ratio * 0.3))
+
+        bonus_manager = self.engine.bonus_capacity_manager
+        return {
+            'standalone_value': standalone,
+            'efficiency': efficiency,
+            'bonus_value': bonus_manager.get_signup_bonus_value(card),
+            'months_needed': bonus_manager.bonus_months_needed(card),
+        }
@@ -0,0 +1,76 @@
+import logging
+from decimal import Decimal
+from typing import List
+
+from roadmaps.models import Roadmap
+
+logger = logging.getLogger(__name__)
+
+
+class WhatIfEvaluator:
+    """
+    Spending sensitivity sweeps: re-run the quick-recommendation pipeline
+    for many spending variants against ONE engine. The filtered catalog is
+    loaded once and the card objects are reused, so every per-card cache —
+    rate rows (`RewardsCalculator.rate_table`), reward categories, entity
+    eligibility, counted credits while the set of spent-in categories is
+    unchanged — is paid for once across the whole sweep instead of once per
+    variant.
+
+    Results are deliberately compact (chosen cards, net value, change from
+    the base) — a slider UI wants dozens of these per interaction, not
+    dozens of full breakdowns.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    @staticmethod
+    def _summarize(recommendations: List[dict]) -> dict:
+        net_value = sum(float(rec['estimated_rewards']) for rec in recommendations)
+        return {
+            'cards': [
+                {'id': rec['card'].id, 'name': rec['card'].name, 'action': rec['action']}
+                for rec in recommendations
+            ],
+            'net_value': round(net_value, 2),
+        }
+
+    def evaluate_spending_variants(self, roadmap: Roadmap, variants: List[dict]) -> dict:
+        """Evaluate the profile's current spending, then each variant.
+
+        `variants` are {category slug: monthly amount} overrides applied on
+        top of the base spending; an amount of 0 removes the category.
+        Returns {'base': summary, 'variants': [summary + 'spending',
+        'delta', 'cards_changed']}.
+        """
+        engine = self.engine
+        eligible_cards = engine._get_filtered_cards(roadmap)
+
+        base = self._summarize(
+            engine.generate_quick_recommendations(
+                roadmap, eligible_cards=eligible_cards)['recommendations'])
+        base_spending = dict(engine.spending_amounts)
+        base_actions = {(c['id'], c['action']) for c in base['cards']}
+
+        results = []
+        for overrides in variants:
+            spending = dict(base_spending)
+            for slug, amount in overrides.items():
+                if amount > 0:
+                    spending[slug] = Decimal(str(amount))
+                else:
+                    spending.pop(slug, None)
+
+            summary = self._summarize(engine.generate_quick_recommendations(
+                roadmap, spending_amounts=spending,
+                eligible_cards=eligible_cards)['recommendations'])
+            summary['spending'] = overrides
+            summary['delta'] = round(summary['net_value'] - base['net_value'], 2)
+            summary['cards_changed'] = (
+                {(c['id'], c['action']) for c in summary['cards']} != base_actions)
+            results.append(summary)
+
+        logger.debug(f"What-if: evaluated {len(results)} variants against base "
+                     f"${base['net_value']:.0f}")
+        return {'base': base, 'variants': results}
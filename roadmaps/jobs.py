@@ -0,0 +1,127 @@
+"""DB-backed job queue for roadmap generation.
+
+generate_roadmap can take seconds for `maximizer` on a large catalog, so
+the generate endpoint enqueues a RoadmapGenerationJob and returns 202; the
+`run_roadmap_jobs` management command claims and runs jobs outside the
+web workers. Claiming is a conditional UPDATE (pending -> running), which
+is atomic on every backend this project runs on, so any number of worker
+threads or processes can poll the same table.
+
+A deployment with no worker running leaves ROADMAP_JOBS_INLINE on, and the
+endpoint runs the job itself (`generate_inline`) through the same claim,
+so jobs queued before a worker was switched off are still picked up.
+"""
+import logging
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RoadmapGenerationJob
+
+logger = logging.getLogger(__name__)
+
+# How many pending rows a claim attempt looks at before giving up; only
+# matters when several workers race for the same head of the queue.
+CLAIM_WINDOW = 10
+
+
+def enqueue_generation(roadmap):
+    """Queue a generation for `roadmap`, or return the one already waiting.
+
+    Returns (job, created).
+    """
+    existing = RoadmapGenerationJob.objects.filter(
+        roadmap=roadmap, status=RoadmapGenerationJob.STATUS_PENDING).first()
+    if existing:
+        return existing, False
+    try:
+        with transaction.atomic():
+            return RoadmapGenerationJob.objects.create(roadmap=roadmap), True
+    except IntegrityError:
+        # Lost a race with a concurrent enqueue for the same roadmap.
+        return RoadmapGenerationJob.objects.get(
+            roadmap=roadmap, status=RoadmapGenerationJob.STATUS_PENDING), False
+
+
+def claim_next_job():
+    """Mark the oldest claimable pending job running and return it, or None.
+
+    Roadmaps with a job already running are skipped: two generations of the
+    same roadmap would race on its recommendation rows.
+    """
+    busy = RoadmapGenerationJob.objects.filter(
+        status=RoadmapGenerationJob.STATUS_RUNNING).values('roadmap_id')
+    candidates = (
+        RoadmapGenerationJob.objects
+        .filter(status=RoadmapGenerationJob.STATUS_PENDING)
+        .exclude(roadmap_id__in=busy)
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:CLAIM_WINDOW]
+    )
+    for job_id in list(candidates):
+        job = claim_job(job_id)
+        if job is not None:
+            return job
+    return None
+
+
+def claim_job(job_id):
+    """Mark this pending job running and return it, or None if someone else
+    claimed it first."""
+    claimed = RoadmapGenerationJob.objects.filter(
+        pk=job_id, status=RoadmapGenerationJob.STATUS_PENDING,
+    ).update(
+        status=RoadmapGenerationJob.STATUS_RUNNING,
+        started_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    if claimed:
+        return RoadmapGenerationJob.objects.select_related('roadmap__profile').get(pk=job_id)
+    return None
+
+
+def generate_inline(roadmap):
+    """Run a generation for `roadmap` on the calling thread (ROADMAP_JOBS_INLINE).
+
+    Returns the finished job, or, when another request is already
+    generating this roadmap, that request's running job to poll.
+    """
+    running = RoadmapGenerationJob.objects.filter(
+        roadmap=roadmap, status=RoadmapGenerationJob.STATUS_RUNNING).first()
+    if running:
+        return running
+    job, _ = enqueue_generation(roadmap)
+    claimed = claim_job(job.pk)
+    if claimed is None:
+        return RoadmapGenerationJob.objects.get(pk=job.pk)
+    return run_job(claimed)
+
+
+def run_job(job):
+    """Run a claimed job to completion, recording success or the error."""
+    from .recommendation_engine import RecommendationEngine
+
+    try:
+        RecommendationEngine(job.roadmap.profile).generate_roadmap(job.roadmap)
+    except Exception as e:
+        logger.exception('Roadmap generation job %s failed', job.pk)
+        job.status = RoadmapGenerationJob.STATUS_FAILED
+        job.error = f'Failed to generate roadmap: {e}'
+    else:
+        job.status = RoadmapGenerationJob.STATUS_SUCCEEDED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def fail_stale_jobs(older_than):
+    """Fail running jobs whose worker died mid-run (started more than
+    `older_than` ago), so the roadmap can be queued again. Returns the count."""
+    return RoadmapGenerationJob.objects.filter(
+        status=RoadmapGenerationJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - older_than,
+    ).update(
+        status=RoadmapGenerationJob.STATUS_FAILED,
+        error='Worker stopped before the job finished',
+        finished_at=timezone.now(),
+    )
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-19 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roadmaps', '0004_roadmapgenerationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartnerAPIKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('prefix', models.CharField(help_text='First characters of the key, to tell keys apart', max_length=8)),
+                ('key_digest', models.CharField(max_length=64, unique=True)),
+                ('max_concurrency', models.PositiveSmallIntegerField(default=2)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
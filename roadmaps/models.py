@@ -103,6 +103,92 @@ class RoadmapCalculation(models.Model):
         return f"Calculation for {self.roadmap}"
 
 
+class RoadmapGenerationJob(models.Model):
+    """A queued run of the engine's generate_roadmap for one roadmap.
+
+    POST .../generate/ enqueues one of these and returns 202; the
+    `run_roadmap_jobs` worker claims and runs it. At most one job per
+    roadmap is pending at a time — re-posting while one waits returns the
+    waiting job rather than queueing a duplicate.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    roadmap = models.ForeignKey(Roadmap, on_delete=models.CASCADE, related_name='generation_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['roadmap'],
+                condition=models.Q(status='pending'),
+                name='uniq_pending_roadmap_generation_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='roadmap_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Generate {self.roadmap} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+
+class PartnerAPIKey(models.Model):
+    """An API key for the partner batch endpoint (roadmaps/partner.py).
+
+    Only a SHA-256 digest is stored; the key itself is shown once, by
+    `manage.py issue_partner_key`. `max_concurrency` caps how many of the
+    key's batch items are evaluated at once, per server process.
+    """
+    name = models.CharField(max_length=100)
+    prefix = models.CharField(max_length=8, help_text="First characters of the key, to tell keys apart")
+    key_digest = models.CharField(max_length=64, unique=True)
+    max_concurrency = models.PositiveSmallIntegerField(default=2)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.prefix}…)"
+
+    @staticmethod
+    def digest(key):
+        import hashlib
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def issue(cls, name, max_concurrency=2):
+        """Create a key; returns (PartnerAPIKey, the key itself)."""
+        import secrets
+        key = secrets.token_urlsafe(32)
+        api_key = cls.objects.create(
+            name=name, prefix=key[:8], key_digest=cls.digest(key),
+            max_concurrency=max_concurrency)
+        return api_key, key
+
+    @classmethod
+    def authenticate(cls, key):
+        """The active PartnerAPIKey for `key`, or None."""
+        return cls.objects.filter(key_digest=cls.digest(key), is_active=True).first()
+
+
 CURRENT_ROADMAP_NAME = "Current Roadmap"
 
 
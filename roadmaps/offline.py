@@ -0,0 +1,185 @@
+"""Run the engine on a profile document instead of a stored user.
+
+A profile document is the user half of a scenario file, so any scenario
+(cards/scenarios) is also a valid document:
+
+    {"id": "optional, for the caller",
+     "user_profile": {"spending": {"dining": 400, "groceries": 600},
+                      "spending_credit_preferences": ["airport-lounge"]},
+     "owned_cards": ["chase-freedom-unlimited",
+                     {"card": "amex-gold", "opened_date": "2024-03-01",
+                      "closed_days_ago": 30, "bonus_override": true}],
+     "entities": [{"name": "Sam", "kind": "business"}],
+     "strategy": "travel", "max_recommendations": 3, "as_of": "2026-10-01"}
+
+`recommend()` writes the document as a throwaway user, runs the engine and
+builds the quick-recommendation response inside a transaction that is
+always rolled back, the same scratch pattern GenerateRoadmapSerializer
+uses. In DB-free mode (CATALOG_ARTIFACT, see cards/catalog_artifact.py)
+the database is an in-memory copy of the compiled catalog, so nothing
+reaches a real one either way.
+"""
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from cards.models import (
+    CreditCard, ProfileEntity, SpendingAmount, SpendingCategory, SpendingCredit,
+    UserCard, UserSpendingCreditPreference, UserSpendingProfile,
+)
+
+from .models import Roadmap
+from .recommendation_engine import RecommendationEngine
+from .responses import build_recommendation_response
+from .strategies import apply_strategy_to_roadmap, resolve_scenario_strategy
+
+# Scenario spending keys that aren't category slugs (see run_scenario).
+CATEGORY_ALIASES = {'general': 'other'}
+
+
+class ProfileDocumentError(ValueError):
+    """The document can't be evaluated; the message says which field."""
+
+
+class DocumentCatalog:
+    """Slug/name -> id lookups for documents, loaded in three queries.
+    Load once per process (or catalog version) when evaluating many."""
+
+    def __init__(self):
+        self.categories = {}
+        for category_id, slug, name, display_name in SpendingCategory.objects.values_list(
+                'id', 'slug', 'name', 'display_name'):
+            for key in (display_name, name, slug):
+                if key:
+                    self.categories[key] = category_id
+        self.cards = dict(CreditCard.objects.values_list('slug', 'id'))
+        self.credits = dict(SpendingCredit.objects.values_list('slug', 'id'))
+
+    def category_id(self, key):
+        category_id = self.categories.get(key) or self.categories.get(CATEGORY_ALIASES.get(key))
+        if category_id is None:
+            raise ProfileDocumentError(f"Unknown spending category '{key}'")
+        return category_id
+
+    def card_id(self, slug):
+        if slug not in self.cards:
+            raise ProfileDocumentError(f"Unknown card '{slug}'")
+        return self.cards[slug]
+
+    def credit_id(self, slug):
+        if slug not in self.credits:
+            raise ProfileDocumentError(f"Unknown spending credit '{slug}'")
+        return self.credits[slug]
+
+
+def recommend(document, catalog=None):
+    """The quick-recommendation response for one profile document."""
+    if not isinstance(document, dict):
+        raise ProfileDocumentError('A profile document must be a JSON object')
+    catalog = catalog or DocumentCatalog()
+    try:
+        strategy = resolve_scenario_strategy(document)
+    except ValueError as e:
+        raise ProfileDocumentError(str(e))
+    as_of = _date(document, 'as_of') or date.today()
+
+    with transaction.atomic():
+        try:
+            user, profile = _scratch_profile(document, catalog, as_of)
+        except IntegrityError:
+            raise ProfileDocumentError('owned_cards holds the same open card twice for one owner')
+        if 'max_recommendations' in document:
+            max_recommendations = _int(document, 'max_recommendations')
+        elif strategy:
+            max_recommendations = strategy['max_recommendations']
+        else:
+            max_recommendations = Roadmap._meta.get_field('max_recommendations').default
+        roadmap = Roadmap.objects.create(
+            profile=profile, name='Offline recommendation',
+            max_recommendations=max_recommendations)
+        apply_strategy_to_roadmap(roadmap, strategy)
+
+        engine = RecommendationEngine(profile, strategy=strategy, as_of=as_of)
+        response = build_recommendation_response(
+            engine.generate_quick_recommendations(roadmap), user=user)
+        transaction.set_rollback(True)
+    return response
+
+
+def _scratch_profile(document, catalog, as_of):
+    user_profile = document.get('user_profile') or {}
+    spending = user_profile.get('spending') or {}
+    if not isinstance(spending, dict):
+        raise ProfileDocumentError('user_profile.spending must be an object')
+
+    user = User.objects.create_user(username=f'offline-{uuid.uuid4().hex}')
+    profile = UserSpendingProfile.objects.create(user=user)
+    primary = ProfileEntity.objects.create(
+        profile=profile, name=document.get('primary_name', 'Player 1'),
+        kind='personal', is_primary=True)
+    entities = {primary.name: primary}
+    for entity in document.get('entities', []):
+        if not isinstance(entity, dict) or not entity.get('name'):
+            raise ProfileDocumentError('Every entity needs a name')
+        entities[entity['name']] = ProfileEntity.objects.create(
+            profile=profile, name=entity['name'], kind=entity.get('kind', 'personal'))
+
+    amounts = {}
+    for key, amount in spending.items():
+        category_id = catalog.category_id(key)
+        try:
+            amounts[category_id] = amounts.get(category_id, Decimal(0)) + Decimal(str(amount))
+        except InvalidOperation:
+            raise ProfileDocumentError(f"Spending for '{key}' must be a number")
+    SpendingAmount.objects.bulk_create([
+        SpendingAmount(profile=profile, category_id=category_id, monthly_amount=amount)
+        for category_id, amount in amounts.items()
+    ])
+    UserSpendingCreditPreference.objects.bulk_create([
+        UserSpendingCreditPreference(
+            profile=profile, spending_credit_id=catalog.credit_id(slug), values_credit=True)
+        for slug in dict.fromkeys(user_profile.get('spending_credit_preferences', []))
+    ])
+
+    user_cards = []
+    for entry in document.get('owned_cards', []):
+        if not isinstance(entry, dict):
+            entry = {'card': entry}
+        owner = entities.get(entry.get('owner', primary.name))
+        if owner is None:
+            raise ProfileDocumentError(f"Owned card owner '{entry['owner']}' is not an entity")
+
+        def when(key):
+            if entry.get(f'{key}_days_ago') is not None:
+                return as_of - timedelta(days=_int(entry, f'{key}_days_ago'))
+            return _date(entry, f'{key}_date')
+
+        user_cards.append(UserCard(
+            user=user, card_id=catalog.card_id(entry.get('card')), owner=owner,
+            opened_date=when('opened') or as_of - timedelta(days=180),
+            closed_date=when('closed'),
+            bonus_earned_date=when('bonus_earned'),
+            bonus_override=entry.get('bonus_override'),
+        ))
+    UserCard.objects.bulk_create(user_cards)
+    return user, profile
+
+
+def _date(data, key):
+    value = data.get(key)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ProfileDocumentError(f"{key} must be a YYYY-MM-DD date")
+
+
+def _int(data, key):
+    try:
+        return int(data[key])
+    except (TypeError, ValueError):
+        raise ProfileDocumentError(f"{key} must be an integer")
@@ -0,0 +1,156 @@
+"""Batch quick recommendations for partner integrations.
+
+POST /api/roadmaps/partner/batch/ with `Authorization: Api-Key <key>` and
+{"items": [<profile document>, ...]} (the roadmaps/offline.py format, up to
+PARTNER_BATCH_MAX_ITEMS) returns one entry per item, in order:
+{"index", "id", "result"} or {"index", "id", "error"}. A bad item never
+fails the batch.
+
+Compared with one quick-recommendation POST per end user, a batch pays for
+authentication, parsing and rendering once, never touches a session, and
+resolves every item against one DocumentCatalog snapshot for the current
+catalog version. Items are split into as many slices as the key has free
+(max_concurrency per process, see KeySlots; at most PARTNER_BATCH_WORKERS):
+one runs on the request thread, the rest on the shared `batch_pool`, each
+with its own database connection. The engine is pure Python, so threads
+overlap its queries rather than its arithmetic; add server processes for
+more CPU. On an SQLite file database every batch runs as one slice: the
+threads would only queue on its lock (the same guard as recommend_batch).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.permissions import BasePermission
+
+from cards.caching import catalog_version
+from creditcard_guru.metrics import cache_requests
+
+from .coalescing import with_fresh_connections
+from .models import PartnerAPIKey
+from .offline import DocumentCatalog, ProfileDocumentError, recommend
+
+
+class PartnerAPIKeyAuthentication(BaseAuthentication):
+    """`Authorization: Api-Key <key>`; request.auth is the PartnerAPIKey."""
+    keyword = 'Api-Key'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid Api-Key header.')
+        try:
+            key = auth[1].decode('ascii')
+        except UnicodeDecodeError:
+            raise exceptions.AuthenticationFailed('Invalid Api-Key header.')
+        api_key = PartnerAPIKey.authenticate(key)
+        if api_key is None:
+            raise exceptions.AuthenticationFailed('Invalid or revoked API key.')
+        return AnonymousUser(), api_key
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class HasPartnerAPIKey(BasePermission):
+    def has_permission(self, request, view):
+        return isinstance(request.auth, PartnerAPIKey)
+
+
+class KeySlots:
+    """How many batch slices each API key has running in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_use = {}
+
+    def acquire(self, api_key, wanted):
+        """Take up to `wanted` of the key's free slots and return how many
+        were taken; 0 means the key is at its max_concurrency."""
+        with self._lock:
+            in_use = self._in_use.get(api_key.pk, 0)
+            taken = max(0, min(wanted, api_key.max_concurrency - in_use))
+            if taken:
+                self._in_use[api_key.pk] = in_use + taken
+            return taken
+
+    def release(self, api_key, count):
+        with self._lock:
+            remaining = self._in_use.get(api_key.pk, 0) - count
+            if remaining > 0:
+                self._in_use[api_key.pk] = remaining
+            else:
+                self._in_use.pop(api_key.pk, None)
+
+
+key_slots = KeySlots()
+
+# Threads for the second and later slices of every batch in this process.
+batch_pool = ThreadPoolExecutor(
+    max_workers=settings.PARTNER_BATCH_WORKERS, thread_name_prefix='partner-batch')
+
+
+_catalog = None
+_catalog_version = None
+
+
+def document_catalog():
+    """This process's DocumentCatalog for the current catalog version."""
+    global _catalog, _catalog_version
+
+    version = catalog_version().version
+    if _catalog is None or _catalog_version != version:
+        _catalog = DocumentCatalog()
+        _catalog_version = version
+        cache_requests.inc(cache='partner_document_catalog', result='miss')
+    else:
+        cache_requests.inc(cache='partner_document_catalog', result='hit')
+    return _catalog
+
+
+def evaluate_item(index, document, catalog):
+    entry = {'index': index}
+    if isinstance(document, dict) and 'id' in document:
+        entry['id'] = document['id']
+    try:
+        entry['result'] = recommend(document, catalog)
+    except ProfileDocumentError as e:
+        entry['error'] = str(e)
+    except Exception as e:
+        entry['error'] = f'Failed to generate recommendations: {str(e)}'
+    return entry
+
+
+def evaluate_batch(items, api_key):
+    """Per-item entries for `items`, in order. Raises Throttled (429) when
+    the key already has max_concurrency slices running here."""
+    wanted = min(len(items), settings.PARTNER_BATCH_WORKERS)
+    if connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+        wanted = 1
+    slices = key_slots.acquire(api_key, wanted)
+    if not slices:
+        raise exceptions.Throttled(
+            wait=1, detail=f'API key is at its concurrency limit ({api_key.max_concurrency}).')
+    try:
+        catalog = document_catalog()
+        indexed = list(enumerate(items))
+        parts = [indexed[start::slices] for start in range(slices)]
+
+        def run(part):
+            return [evaluate_item(index, document, catalog) for index, document in part]
+
+        futures = [batch_pool.submit(with_fresh_connections(lambda part=part: run(part)))
+                   for part in parts[1:]]
+        entries = run(parts[0])
+        for future in futures:
+            entries.extend(future.result())
+    finally:
+        key_slots.release(api_key, slices)
+    entries.sort(key=lambda entry: entry['index'])
+    return entries
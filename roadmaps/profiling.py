@@ -0,0 +1,328 @@
+"""Sampling profiler for slow quick-recommendation requests.
+
+SlowRequestProfilerMiddleware watches requests under PROFILER_PATHS while
+PROFILER_DIR is set. Each watched request's thread is sampled by one
+shared StackSampler thread every PROFILER_INTERVAL seconds (a stack walk,
+no tracing hooks, so the cost doesn't grow with the engine's call count).
+When the engine runs, the orchestrator hands its inputs to the request's
+Capture (see `record_engine_inputs`). After the response, the request is
+kept if it took PROFILER_SLOW_THRESHOLD seconds or more, or at random with
+probability PROFILER_SAMPLE_RATE; anything else is dropped.
+
+A kept capture is one JSON file in PROFILER_DIR, the newest
+PROFILER_MAX_CAPTURES kept:
+  - `stacks`: collapsed stacks ("frame;frame;frame": samples) from the
+    middleware down, the input format of flamegraph.pl and speedscope.
+  - `payload`: the request body, reduced to the engine's input fields.
+  - `scenario`: what the engine actually read (spending, card history,
+    credit preferences, strategy, as_of) as a profile document, which is
+    also a scenario (roadmaps/offline.py). Stored state is included, so a
+    signed-in user's slow case replays without their account; entities
+    are renamed and nicknames dropped. Roadmap filters are not replayed.
+
+`manage.py engine_profiles` lists, views and replays captures. The async
+endpoint runs the engine on a pool thread, so it is not profiled.
+"""
+import contextvars
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+# Request fields the engine reads (GenerateRoadmapSerializer); anything
+# else in a body is dropped before it is written to disk.
+PAYLOAD_FIELDS = (
+    'spending_amounts', 'user_cards', 'filters', 'max_recommendations',
+    'spending_credit_preferences', 'strategy', 'expense', 'easy_mode_spending', 'as_of',
+)
+USER_CARD_FIELDS = ('card_id', 'opened_date', 'is_active', 'bonus_earned_date', 'bonus_override')
+
+
+class Capture:
+    """What one watched request recorded besides its stacks."""
+
+    def __init__(self):
+        self.scenario = None
+
+
+_capture = contextvars.ContextVar('engine_profile_capture', default=None)
+
+
+def record_engine_inputs(engine, roadmap):
+    """Called by the orchestrator after a quick-recommendation run. Only
+    the first run of a watched request is recorded (what-if evaluates many
+    variants on one engine)."""
+    capture = _capture.get()
+    if capture is not None and capture.scenario is None:
+        capture.scenario = scenario_document(engine, roadmap)
+
+
+def scenario_document(engine, roadmap):
+    """The engine's inputs as a profile document. Runs inside the request's
+    scratch transaction, where the payload's rows are still visible."""
+    primary = engine._primary_entity
+    names = {primary.id: 'Player 1'}
+    entities = []
+    for entity in engine.entities:
+        if entity.id not in names:
+            names[entity.id] = f'Player {len(names) + 1}'
+            entities.append({'name': names[entity.id], 'kind': entity.kind})
+
+    owned_cards = []
+    for user_card in engine.card_history:
+        entry = {'card': user_card.card.slug}
+        for field in ('opened_date', 'closed_date', 'bonus_earned_date'):
+            value = getattr(user_card, field, None)
+            if value:
+                entry[field] = value.isoformat()
+        if getattr(user_card, 'bonus_override', None) is not None:
+            entry['bonus_override'] = user_card.bonus_override
+        owner_id = getattr(user_card, 'owner_id', None)
+        if owner_id is not None and owner_id != primary.id and owner_id in names:
+            entry['owner'] = names[owner_id]
+        owned_cards.append(entry)
+
+    credit_preferences = engine._credit_prefs
+    if credit_preferences is None:
+        credit_preferences = engine.profile.spending_credit_preferences.filter(
+            values_credit=True).values_list('spending_credit__slug', flat=True)
+
+    document = {
+        'user_profile': {
+            'spending': {slug: float(amount) for slug, amount in engine.spending_amounts.items() if amount},
+            'spending_credit_preferences': sorted(credit_preferences),
+        },
+        'owned_cards': owned_cards,
+        'primary_name': 'Player 1',
+        'max_recommendations': roadmap.max_recommendations,
+        'as_of': engine.today.isoformat(),
+    }
+    if entities:
+        document['entities'] = entities
+    if engine.strategy:
+        document['strategy'] = engine.strategy['key']
+    return document
+
+
+def sanitize_payload(body):
+    """The engine-relevant fields of a JSON request body, or None."""
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    payload = {field: data[field] for field in PAYLOAD_FIELDS if field in data}
+    if isinstance(payload.get('user_cards'), list):
+        payload['user_cards'] = [
+            {field: card[field] for field in USER_CARD_FIELDS if field in card}
+            for card in payload['user_cards'] if isinstance(card, dict)
+        ]
+    return payload
+
+
+class StackSampler:
+    """One daemon thread sampling the stacks of registered threads.
+
+    Each registered thread has a Counter of collapsed stacks and a root
+    code object: frames above the root (the server and middleware chain)
+    are left out. The thread sleeps while nothing is registered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._active = threading.Event()
+        self._thread = None
+        self._labels = {}
+
+    def start(self, thread_id, stacks, root):
+        with self._lock:
+            self._targets[thread_id] = (stacks, root)
+            self._active.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='engine-profiler', daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id):
+        """Unregister a thread; no sample is added to its stacks after this
+        returns."""
+        with self._lock:
+            self._targets.pop(thread_id, None)
+            if not self._targets:
+                self._active.clear()
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(settings.PROFILER_INTERVAL)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, (stacks, root) in self._targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._collapse(frame, root)] += 1
+            del frames
+
+    def _collapse(self, frame, root):
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            if frame.f_code is root:
+                break
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            base_dir = str(settings.BASE_DIR)
+            if filename.startswith(base_dir):
+                filename = os.path.relpath(filename, base_dir)
+            elif 'site-packages' in filename:
+                filename = filename.split('site-packages' + os.sep, 1)[1]
+            label = self._labels[code] = f'{filename}:{code.co_name}'
+        return label
+
+
+sampler = StackSampler()
+
+
+def profile_call(fn, root=None):
+    """(fn(), collapsed stacks) with the calling thread sampled meanwhile;
+    how `engine_profiles replay` profiles the current code."""
+    stacks = Counter()
+    thread_id = threading.get_ident()
+    sampler.start(thread_id, stacks, root or fn.__code__)
+    try:
+        result = fn()
+    finally:
+        sampler.stop(thread_id)
+    return result, dict(stacks)
+
+
+# On-disk store.
+
+def _capture_path(capture_id):
+    return os.path.join(settings.PROFILER_DIR, f'{capture_id}.json')
+
+
+def write_capture(record):
+    """Store a capture and drop the oldest beyond PROFILER_MAX_CAPTURES.
+    Ids start with a UTC timestamp, so they sort oldest first."""
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    now = datetime.now(timezone.utc)
+    capture_id = f'{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}'
+    record = {'id': capture_id, 'captured_at': now.isoformat(timespec='seconds'), **record}
+    path = _capture_path(capture_id)
+    partial = f'{path}.partial'
+    with open(partial, 'w') as f:
+        json.dump(record, f)
+    os.replace(partial, path)
+
+    paths = sorted(glob.glob(os.path.join(settings.PROFILER_DIR, '*.json')))
+    for old in paths[:max(0, len(paths) - settings.PROFILER_MAX_CAPTURES)]:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+    return capture_id
+
+
+def list_captures():
+    """Stored captures, newest first."""
+    if not settings.PROFILER_DIR:
+        return []
+    records = []
+    for path in sorted(glob.glob(os.path.join(settings.PROFILER_DIR, '*.json')), reverse=True):
+        try:
+            with open(path) as f:
+                records.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return records
+
+
+def load_capture(capture_id):
+    """The capture with this id or unique id prefix; KeyError otherwise."""
+    if not settings.PROFILER_DIR:
+        raise KeyError(capture_id)
+    matches = sorted(glob.glob(os.path.join(settings.PROFILER_DIR, f'{glob.escape(capture_id)}*.json')))
+    if len(matches) != 1:
+        raise KeyError(capture_id)
+    with open(matches[0]) as f:
+        return json.load(f)
+
+
+def top_frames(stacks, limit=15):
+    """([(frame, self samples)], [(frame, inclusive samples)]), largest first."""
+    self_counts = Counter()
+    inclusive = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+    return self_counts.most_common(limit), inclusive.most_common(limit)
+
+
+class SlowRequestProfilerMiddleware:
+    """Samples watched requests and stores the slow (or randomly chosen)
+    ones that ran the engine. A no-op unless PROFILER_DIR is set."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILER_DIR or not request.path.startswith(tuple(settings.PROFILER_PATHS)):
+            return self.get_response(request)
+
+        # Read before the view: DRF consumes the stream otherwise.
+        payload = sanitize_payload(request.body) if request.method == 'POST' else None
+        capture = Capture()
+        stacks = Counter()
+        token = _capture.set(capture)
+        thread_id = threading.get_ident()
+        sampler.start(thread_id, stacks, SlowRequestProfilerMiddleware.__call__.__code__)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.stop(thread_id)
+            _capture.reset(token)
+
+        if elapsed >= settings.PROFILER_SLOW_THRESHOLD:
+            reason = 'slow'
+        elif random.random() < settings.PROFILER_SAMPLE_RATE:
+            reason = 'random'
+        else:
+            return response
+        if capture.scenario is None:
+            return response
+
+        from cards.caching import catalog_version
+        write_capture({
+            'reason': reason,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 1),
+            'catalog_version': catalog_version().version,
+            'sample_interval_ms': settings.PROFILER_INTERVAL * 1000,
+            'samples': sum(stacks.values()),
+            'payload': payload,
+            'scenario': capture.scenario,
+            'stacks': dict(stacks),
+        })
+        return response
@@ -4,6 +4,8 @@ Display-only — nothing here feeds engine math or the reconciliation guard
 (line items + signup bonus - fee = headline).
 """
 
+from django.db.models import Q
+
 from cards.models import PointsProgram, PointsValuation
 
 _CASHBACK_NOTE = ('Redeem as a statement credit or direct deposit — no transfer step, '
@@ -104,6 +106,68 @@ def redemption_guidance_for(card, user=None):
         if program_slug:
             points_program = PointsProgram.objects.filter(slug=program_slug).first()
 
+    val = None
+    if points_program:
+        # Look up valuation (custom user override vs system-default)
+        if user and user.is_authenticated:
+            val = PointsValuation.objects.filter(points_program=points_program, user=user).first()
+        if not val:
+            val = PointsValuation.objects.filter(points_program=points_program, user=None).first()
+
+    return _guidance(card, points_program, val)
+
+
+def redemption_guidance_by_card(cards, user=None):
+    """`redemption_guidance_for` for every card in `cards`, keyed by card id.
+
+    Loads the cards' points programs and valuations up front (at most three
+    queries however many cards), so building a whole response costs the same
+    as building one recommendation.
+    """
+    cards = list(cards)
+    program_ids = {card.points_program_id for card in cards if card.points_program_id}
+    metadata_slugs = {
+        card.metadata['points_program'] for card in cards
+        if not card.points_program_id and card.metadata and card.metadata.get('points_program')
+    }
+    programs_by_id = {}
+    programs_by_slug = {}
+    if program_ids or metadata_slugs:
+        programs = PointsProgram.objects.filter(
+            Q(pk__in=program_ids) | Q(slug__in=metadata_slugs))
+        for program in programs:
+            programs_by_id[program.pk] = program
+            programs_by_slug[program.slug] = program
+
+    # Lowest pk wins, as .first() does on the single-card path.
+    defaults = {}
+    overrides = {}
+    if programs_by_id:
+        valuations = PointsValuation.objects.filter(points_program__in=list(programs_by_id))
+        if user and user.is_authenticated:
+            valuations = valuations.filter(Q(user=None) | Q(user=user))
+        else:
+            valuations = valuations.filter(user=None)
+        for val in valuations.order_by('pk'):
+            target = defaults if val.user_id is None else overrides
+            target.setdefault(val.points_program_id, val)
+
+    guidance = {}
+    for card in cards:
+        if card.id in guidance:
+            continue
+        if card.points_program_id:
+            points_program = programs_by_id.get(card.points_program_id)
+        else:
+            points_program = programs_by_slug.get((card.metadata or {}).get('points_program'))
+        val = None
+        if points_program:
+            val = overrides.get(points_program.pk) or defaults.get(points_program.pk)
+        guidance[card.id] = _guidance(card, points_program, val)
+    return guidance
+
+
+def _guidance(card, points_program, val):
     if points_program:
         fallback = None
         if points_program.slug == 'chase_ultimate_rewards':
@@ -111,20 +175,13 @@ def redemption_guidance_for(card, user=None):
         elif points_program.slug == 'amex_membership_rewards':
             fallback = _AMEX_MR_FALLBACK
 
-        # 1. Look up valuation (custom user override vs system-default)
-        val = None
-        if user and user.is_authenticated:
-            val = PointsValuation.objects.filter(points_program=points_program, user=user).first()
-        if not val:
-            val = PointsValuation.objects.filter(points_program=points_program, user=None).first()
-        
-        # 2. Get value_per_point
+        # Get value_per_point
         if val:
             value_per_point = float(val.value)
         else:
             value_per_point = fallback['value_per_point'] if fallback else 0.01
 
-        # 3. Get transfer partners and notes (prefer DB if non-empty, otherwise fallback)
+        # Get transfer partners and notes (prefer DB if non-empty, otherwise fallback)
         transfer_partners = points_program.transfer_partners
         if not transfer_partners and fallback:
             transfer_partners = fallback['transfer_partners']
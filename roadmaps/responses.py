@@ -0,0 +1,129 @@
+"""Dict-building fast path for the quick-recommendation response.
+
+Builds exactly what `RoadmapRecommendationResponseSerializer` (and the
+streamed `RecommendationHeadlineSerializer` / `RecommendationItemSerializer`
+stages) produce, without DRF's per-field machinery: the serializers stay
+the schema of record, and `cards/test_base.py` checks the two render to
+identical JSON on every scenario it runs. A change to one of those
+serializers must be mirrored here.
+
+Redemption guidance for every card in the response is loaded up front by
+`redemption_guidance_by_card`, instead of per recommendation.
+"""
+from .redemption import redemption_guidance_by_card
+from .serializers import RESPONSE_FORMAT_VERSION
+
+# PortfolioSummarySerializer's leading float fields, in declaration order.
+_SUMMARY_FLOATS = ('total_annual_fees', 'total_portfolio_rewards',
+                   'total_annual_rewards', 'net_portfolio_value')
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _dicts(items):
+    return [None if item is None else dict(item) for item in items]
+
+
+def _card(rec):
+    card = rec['card']
+    metadata = card.metadata
+    signup_bonus = metadata.get('signup_bonus') or {}
+    annual_fee = float(card.annual_fee)
+    waived = metadata.get('annual_fee_waived_first_year', False)
+    return {
+        'id': card.id,
+        'name': _str(card.name),
+        'card_type': _str(card.card_type),
+        'issuer': _str(card.issuer.name),
+        'annual_fee': annual_fee,
+        'effective_annual_fee': 0.0 if rec['action'] == 'apply' and waived else annual_fee,
+        'annual_fee_waived_first_year': waived,
+        'signup_bonus_amount': card.signup_bonus_amount,
+        'signup_bonus_type': card.signup_bonus_type.name if card.signup_bonus_type else 'points',
+        'signup_spending_requirement': float(signup_bonus.get('spending_requirement') or 0),
+        'signup_time_limit_months': signup_bonus.get('time_limit_months'),
+        'apply_url': _str(card.apply_url),
+    }
+
+
+def recommendation_headline(rec):
+    """`RecommendationHeadlineSerializer(rec).data`."""
+    return _item(rec, _card(rec), breakdown=False)
+
+
+def recommendation_item(rec, guidance):
+    """`RecommendationItemSerializer(rec).data`, with the card's redemption
+    guidance taken from `guidance` (see `redemption_guidance_by_card`)."""
+    card = _card(rec)
+    card['redemption'] = guidance[rec['card'].id]
+    return _item(rec, card, breakdown=True)
+
+
+def _item(rec, card, breakdown):
+    item = {
+        'card': card,
+        'action': _str(rec['action']),
+        'estimated_rewards': _float(rec['estimated_rewards']),
+        'first_year_value': float(rec.get('first_year_value', rec['estimated_rewards'])),
+        'ongoing_value': float(rec.get('ongoing_value', rec['estimated_rewards'])),
+        'reward_value_multiplier': float(rec.get('reward_value_multiplier', 0.01)),
+        'valuation_note': _str(rec.get('valuation_note', '')),
+        'reasoning': _str(rec['reasoning']),
+    }
+    if breakdown:
+        rewards_breakdown = rec.get('rewards_breakdown', [])
+        item['rewards_breakdown'] = None if rewards_breakdown is None else _dicts(rewards_breakdown)
+    bonus_deferred = rec.get('bonus_deferred', False)
+    pays_for_itself = rec.get('pays_for_itself', False)
+    recommended_month = rec.get('recommended_month')
+    item.update({
+        'total_spending_on_card': float(rec.get('total_spending_on_card', 0)),
+        'signup_bonus_value': float(rec.get('signup_bonus_value', 0)),
+        'eligibility_note': _str(rec.get('eligibility_note', '')),
+        'bonus_deferred': None if bonus_deferred is None else bool(bonus_deferred),
+        'pays_for_itself': None if pays_for_itself is None else bool(pays_for_itself),
+        'recommended_month': None if recommended_month is None else int(recommended_month),
+        'bonus_months_needed': _float(rec.get('bonus_months_needed')),
+        'priority': None if rec['priority'] is None else int(rec['priority']),
+    })
+    if 'apply_as' in rec:
+        item['apply_as'] = None if rec['apply_as'] is None else dict(rec['apply_as'])
+    return item
+
+
+def portfolio_summary(summary):
+    """`RoadmapRecommendationResponseSerializer.get_portfolio_summary`."""
+    data = {key: _float(summary.get(key, 0.0)) for key in _SUMMARY_FLOATS}
+    category_optimization = summary.get('category_optimization', {})
+    category_allocation = summary.get('category_allocation', [])
+    card_count = summary.get('card_count', 0)
+    bonus_capacity = summary.get('bonus_capacity', {})
+    data.update({
+        'category_optimization': None if category_optimization is None else dict(category_optimization),
+        'category_allocation': None if category_allocation is None else _dicts(category_allocation),
+        'card_count': None if card_count is None else int(card_count),
+        'total_credits_value': _float(summary.get('total_credits_value', 0.0)),
+        'total_annual_spending': _float(summary.get('total_annual_spending', 0.0)),
+        'bonus_capacity': None if bonus_capacity is None else dict(bonus_capacity),
+    })
+    return data
+
+
+def build_recommendation_response(result, user=None):
+    """`RoadmapRecommendationResponseSerializer(result).data`, for a
+    `generate_quick_recommendations` result."""
+    recommendations = result['recommendations']
+    guidance = redemption_guidance_by_card(
+        [rec['card'] for rec in recommendations], user=user)
+    return {
+        'recommendations': [recommendation_item(rec, guidance) for rec in recommendations],
+        'total_estimated_rewards': sum(float(rec['estimated_rewards']) for rec in recommendations),
+        'portfolio_summary': portfolio_summary(result.get('portfolio_summary', {})),
+        'format_version': RESPONSE_FORMAT_VERSION,
+    }
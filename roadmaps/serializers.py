@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from cards.serializers import CreditCardListSerializer, UserSpendingProfileSerializer
-from .models import RoadmapFilter, Roadmap, RoadmapRecommendation, RoadmapCalculation
+from .models import RoadmapFilter, Roadmap, RoadmapRecommendation, RoadmapCalculation, RoadmapGenerationJob
 
 
 class RoadmapFilterSerializer(serializers.ModelSerializer):
@@ -40,6 +40,21 @@ class RoadmapSerializer(serializers.ModelSerializer):
         ]
 
 
+class RoadmapGenerationJobSerializer(serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RoadmapGenerationJob
+        fields = [
+            'id', 'roadmap', 'status', 'error', 'created_at', 'started_at',
+            'finished_at', 'status_url'
+        ]
+
+    def get_status_url(self, obj):
+        from django.urls import reverse
+        return reverse('roadmaps:roadmap-job', kwargs={'job_id': obj.pk})
+
+
 class CreateRoadmapSerializer(serializers.Serializer):
     """Serializer for creating roadmaps with filters"""
     name = serializers.CharField(max_length=200)
@@ -123,6 +138,9 @@ class GenerateRoadmapSerializer(serializers.Serializer):
     # Phase O: category-less "easy mode" spending.
     # Handled by mapping a single flat amount at base/uncategorized rates.
     easy_mode_spending = serializers.DictField(required=False, allow_null=True)
+    # Evaluate the plan as of this date instead of today, e.g. the first day
+    # of next quarter to see the roadmap under its rotating categories.
+    as_of = serializers.DateField(required=False)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -131,8 +149,8 @@ class GenerateRoadmapSerializer(serializers.Serializer):
         # generate_recommendations(), cards/views.py's preview endpoint,
         # which never sets 'expense'). A separate attribute rather than a
         # second return value from generate_recommendations() so that
-        # existing caller's `recommendations = serializer.generate_recommendations()`
-        # unpacking keeps working unchanged.
+        # existing callers' `result = serializer.generate_recommendations()`
+        # keeps working unchanged.
         self.expense_recommendation = None
 
     def validate_strategy(self, value):
@@ -196,16 +214,44 @@ class GenerateRoadmapSerializer(serializers.Serializer):
         from django.db import transaction
 
         with transaction.atomic():
-            recommendations = self._generate_with_scratch_data()
+            result = self._generate_with_scratch_data()
             # Computation only — undo every write (spending amounts, user
             # cards, credit prefs, the temporary roadmap).
             transaction.set_rollback(True)
-        return recommendations
+        return result
 
     def _generate_with_scratch_data(self):
         """Write the payload into the profile tables and generate
         recommendations. Only ever called inside the rolled-back
         transaction above."""
+        engine, roadmap = self._scratch_engine()
+        result = engine.generate_quick_recommendations(roadmap)
+        self._recommend_expense(engine, roadmap)
+
+        # Clean up temporary roadmap
+        roadmap.delete()
+
+        return result
+
+    def _recommend_expense(self, engine, roadmap):
+        # Phase N: one-off upcoming expense — a parallel, read-only
+        # computation, not part of the portfolio roadmap above. Runs before
+        # the temp roadmap is deleted since it reuses the same filters.
+        if 'expense' in self.validated_data:
+            expense_data = self.validated_data['expense']
+            category_slug = None
+            category_id = expense_data.get('category_id')
+            if category_id:
+                from cards.models import SpendingCategory
+                category_slug = SpendingCategory.objects.filter(
+                    id=category_id).values_list('slug', flat=True).first()
+            self.expense_recommendation = engine._recommend_for_expense(
+                expense_data['amount'], category_slug, roadmap)
+
+    def _scratch_engine(self):
+        """Write the payload into the profile tables and return (engine,
+        temporary roadmap) ready to generate. Inside the rolled-back
+        transaction only."""
         from .recommendation_engine import RecommendationEngine
         from cards.models import UserSpendingProfile, SpendingAmount, UserCard
 
@@ -347,27 +393,150 @@ class GenerateRoadmapSerializer(serializers.Serializer):
         # Generate recommendations using quick method (includes breakdowns)
         # Pass user_cards data directly for session-based users
         user_cards_data = validated_data.get('user_cards', []) if not profile.user else None
-        engine = RecommendationEngine(profile, user_cards_data=user_cards_data, strategy=strategy)
-        recommendations = engine.generate_quick_recommendations(roadmap)
+        engine = RecommendationEngine(profile, user_cards_data=user_cards_data, strategy=strategy,
+                                      as_of=validated_data.get('as_of'))
+        return engine, roadmap
 
-        # Phase N: one-off upcoming expense — a parallel, read-only
-        # computation, not part of the portfolio roadmap above. Runs before
-        # the temp roadmap is deleted since it reuses the same filters.
-        if 'expense' in validated_data:
-            expense_data = validated_data['expense']
-            category_slug = None
-            category_id = expense_data.get('category_id')
-            if category_id:
-                from cards.models import SpendingCategory
-                category_slug = SpendingCategory.objects.filter(
-                    id=category_id).values_list('slug', flat=True).first()
-            self.expense_recommendation = engine._recommend_for_expense(
-                expense_data['amount'], category_slug, roadmap)
 
-        # Clean up temporary roadmap
-        roadmap.delete()
+class WhatIfSerializer(GenerateRoadmapSerializer):
+    """A quick-recommendation payload plus spending variations to sweep.
+
+    Each entry in `variations` is either a sweep of one category —
+    {"category_id": 3, "from": 200, "to": 1000, "step": 100} — or one
+    explicit variant, {"spending_amounts": {"3": 400, "7": 0}}. Amounts are
+    monthly and override the base spending; 0 removes the category.
+    """
+    MAX_VARIANTS = 100
 
-        return recommendations
+    variations = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_variations(self, value):
+        from cards.models import SpendingCategory
+        slugs = dict(SpendingCategory.objects.values_list('id', 'slug'))
+
+        def category_slug(category_id):
+            try:
+                return slugs[int(category_id)]
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError(f"Unknown category_id {category_id}")
+
+        def amount(raw):
+            try:
+                parsed = float(raw)
+            except (TypeError, ValueError):
+                raise serializers.ValidationError(f"Amount {raw!r} must be a number")
+            if parsed < 0:
+                raise serializers.ValidationError("Amounts must be non-negative")
+            return parsed
+
+        # [(slug overrides for the engine, {category_id: amount} for the response)]
+        variants = []
+        for variation in value:
+            if 'spending_amounts' in variation:
+                overrides = variation['spending_amounts']
+                if not isinstance(overrides, dict) or not overrides:
+                    raise serializers.ValidationError(
+                        "spending_amounts must be a non-empty {category_id: amount} object")
+                parsed = {str(cid): amount(raw) for cid, raw in overrides.items()}
+                variants.append((
+                    {category_slug(cid): amt for cid, amt in parsed.items()}, parsed))
+            elif 'category_id' in variation:
+                slug = category_slug(variation['category_id'])
+                start, stop = amount(variation.get('from')), amount(variation.get('to'))
+                step = amount(variation.get('step'))
+                if step <= 0 or stop < start:
+                    raise serializers.ValidationError(
+                        "A sweep needs step > 0 and to >= from")
+                if (stop - start) / step + 1 > self.MAX_VARIANTS:
+                    raise serializers.ValidationError(
+                        f"At most {self.MAX_VARIANTS} variants per request")
+                steps = int(round((stop - start) / step, 9)) + 1
+                for i in range(steps):
+                    monthly = round(start + i * step, 2)
+                    variants.append(({slug: monthly}, {str(variation['category_id']): monthly}))
+            else:
+                raise serializers.ValidationError(
+                    "Each variation needs either category_id/from/to/step or spending_amounts")
+
+        if len(variants) > self.MAX_VARIANTS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_VARIANTS} variants per request")
+        return variants
+
+    def evaluate(self):
+        """Run the base payload and every variant against one engine, in
+        the same always-rolled-back transaction as generate_recommendations()."""
+        from django.db import transaction
+
+        variants = self.validated_data['variations']
+        with transaction.atomic():
+            engine, roadmap = self._scratch_engine()
+            result = engine.evaluate_spending_variants(
+                roadmap, [overrides for overrides, _ in variants])
+            transaction.set_rollback(True)
+
+        for summary, (_, by_id) in zip(result['variants'], variants):
+            summary['spending'] = by_id
+        return result
+
+
+class PlanExpensesSerializer(GenerateRoadmapSerializer):
+    """A quick-recommendation payload plus a list of upcoming one-off
+    expenses — [{"amount": 2400, "category_id": 3, "date": "2026-11-01"}] —
+    to plan jointly. category_id and date are optional (general purchase,
+    today)."""
+    MAX_EXPENSES = 50
+
+    expenses = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_expenses(self, value):
+        if len(value) > self.MAX_EXPENSES:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_EXPENSES} expenses per request")
+        from cards.models import SpendingCategory
+        slugs = dict(SpendingCategory.objects.values_list('id', 'slug'))
+        date_field = serializers.DateField()
+
+        expenses = []
+        for expense in value:
+            try:
+                amount = float(expense.get('amount'))
+            except (TypeError, ValueError):
+                raise serializers.ValidationError("Each expense needs a numeric amount")
+            if amount <= 0:
+                raise serializers.ValidationError("Expense amounts must be greater than 0")
+            category_id = expense.get('category_id')
+            if category_id is not None:
+                try:
+                    category_id = int(category_id)
+                except (TypeError, ValueError):
+                    pass
+            if category_id is not None and category_id not in slugs:
+                raise serializers.ValidationError(f"Unknown category_id {category_id}")
+            expense_date = None
+            if expense.get('date'):
+                try:
+                    expense_date = date_field.to_internal_value(expense['date'])
+                except serializers.ValidationError:
+                    raise serializers.ValidationError(
+                        f"Invalid date {expense['date']!r}; use YYYY-MM-DD")
+            expenses.append({
+                'amount': amount,
+                'category_slug': slugs[category_id] if category_id is not None else None,
+                'date': expense_date,
+            })
+        return expenses
+
+    def plan(self):
+        """Plan the expenses in the same always-rolled-back transaction as
+        generate_recommendations()."""
+        from django.db import transaction
+
+        with transaction.atomic():
+            engine, roadmap = self._scratch_engine()
+            plan = engine._plan_expenses(self.validated_data['expenses'], roadmap)
+            transaction.set_rollback(True)
+        return plan
 
 
 class RecommendationItemCardSerializer(serializers.Serializer):
@@ -462,6 +631,20 @@ class RecommendationItemSerializer(serializers.Serializer):
         return ret
 
 
+class RecommendationHeadlineCardSerializer(RecommendationItemCardSerializer):
+    """The card without its redemption guidance (the costly part)."""
+    redemption = None
+
+
+class RecommendationHeadlineSerializer(RecommendationItemSerializer):
+    """First stage of the streamed quick-recommendation response: enough
+    to draw each card's row and value before its breakdown arrives."""
+    rewards_breakdown = None
+
+    def get_card(self, obj):
+        return RecommendationHeadlineCardSerializer(obj).data
+
+
 class PortfolioSummarySerializer(serializers.Serializer):
     total_annual_fees = serializers.FloatField(required=False, default=0.0)
     total_portfolio_rewards = serializers.FloatField(required=False, default=0.0)
@@ -502,16 +685,72 @@ class ExpenseRecommendationSerializer(serializers.Serializer):
     best_owned = ExpenseCardResultSerializer(allow_null=True)
 
 
+class ExpensePlanItemSerializer(serializers.Serializer):
+    """Where one planned expense goes. `card` is null when no held or
+    newly-applied card earns anything on it."""
+    amount = serializers.FloatField()
+    category_slug = serializers.CharField(allow_null=True)
+    category_name = serializers.CharField()
+    date = serializers.DateField()
+    card = serializers.SerializerMethodField()
+    action = serializers.CharField(allow_null=True)
+    rewards = serializers.FloatField()
+    counts_toward_bonus = serializers.BooleanField()
+
+    def get_card(self, obj):
+        if obj['card'] is None:
+            return None
+        return RecommendationItemCardSerializer(obj).data
+
+
+class ExpensePlanApplicationSerializer(serializers.Serializer):
+    """A new card in the plan. net_value = signup_bonus_value +
+    category_rewards - effective_annual_fee, where category_rewards covers
+    every planned expense assigned to this card."""
+    card = serializers.SerializerMethodField()
+    action = serializers.CharField()
+    apply_by = serializers.DateField()
+    bonus_deadline = serializers.DateField(allow_null=True)
+    required_amount = serializers.FloatField()
+    time_months = serializers.FloatField()
+    expense_spend = serializers.FloatField()
+    organic_spend = serializers.FloatField()
+    signup_bonus_value = serializers.FloatField()
+    category_rewards = serializers.FloatField()
+    effective_annual_fee = serializers.FloatField()
+    net_value = serializers.FloatField()
+
+    def get_card(self, obj):
+        return RecommendationItemCardSerializer(obj).data
+
+
+class ExpensePlanSerializer(serializers.Serializer):
+    expenses = ExpensePlanItemSerializer(many=True)
+    applications = ExpensePlanApplicationSerializer(many=True)
+    total_rewards = serializers.FloatField()
+    total_signup_bonus = serializers.FloatField()
+    total_fees = serializers.FloatField()
+    net_value = serializers.FloatField()
+
+
+# Bumped when the response shape changes. Version 2: the engine no longer
+# attaches portfolio_summary to every recommendation; it appears once, at
+# the top level.
+RESPONSE_FORMAT_VERSION = 2
+
+
 class RoadmapRecommendationResponseSerializer(serializers.Serializer):
     recommendations = RecommendationItemSerializer(many=True)
     total_estimated_rewards = serializers.SerializerMethodField()
     portfolio_summary = serializers.SerializerMethodField()
+    format_version = serializers.SerializerMethodField()
 
     def get_total_estimated_rewards(self, obj):
         recommendations = obj.get('recommendations', [])
         return sum(float(rec['estimated_rewards']) for rec in recommendations)
 
     def get_portfolio_summary(self, obj):
-        recommendations = obj.get('recommendations', [])
-        portfolio_summary = recommendations[0].get('portfolio_summary', {}) if recommendations else {}
-        return PortfolioSummarySerializer(portfolio_summary).data
\ No newline at end of file
+        return PortfolioSummarySerializer(obj.get('portfolio_summary', {})).data
+
+    def get_format_version(self, obj):
+        return RESPONSE_FORMAT_VERSION
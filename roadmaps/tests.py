@@ -1,10 +1,41 @@
-from django.test import TestCase
+import json
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from django.contrib.auth.models import User
 from decimal import Decimal
-from .models import Roadmap, RoadmapFilter, RoadmapRecommendation, RoadmapCalculation
+from .models import Roadmap, RoadmapFilter, RoadmapRecommendation, RoadmapCalculation, RoadmapGenerationJob
 from cards.models import UserSpendingProfile, CreditCard, Issuer, RewardType
 
 
+class CatalogFixtures:
+    """A one-issuer, one-reward-type catalog for the endpoint and engine
+    tests: call _catalog() in setUp, then add categories and cards."""
+
+    def _catalog(self, reward_type='Cashback', issuer='Generic Bank'):
+        from django.utils.text import slugify
+        self.reward_type = RewardType.objects.create(name=reward_type, slug=slugify(reward_type))
+        self.issuer = Issuer.objects.create(name=issuer, slug=slugify(issuer))
+
+    def _category(self, name, slug=None):
+        from django.utils.text import slugify
+        from cards.models import SpendingCategory
+        return SpendingCategory.objects.create(name=name, slug=slug or slugify(name))
+
+    def _card(self, name, earns=(), **fields):
+        """A card earning `earns`: (category, rate) pairs, or (category,
+        rate, start_date, end_date) for a dated window."""
+        from django.utils.text import slugify
+        from cards.models import RewardCategory
+        card = CreditCard.objects.create(
+            name=name, slug=slugify(name), issuer=self.issuer,
+            signup_bonus_type=self.reward_type, primary_reward_type=self.reward_type, **fields)
+        for category, rate, *window in earns:
+            start_date, end_date = window or (None, None)
+            RewardCategory.objects.create(
+                card=card, category=category, reward_rate=Decimal(rate),
+                reward_type=self.reward_type, start_date=start_date, end_date=end_date)
+        return card
+
+
 class RoadmapModelTests(TestCase):
     """Test suite for roadmap models"""
     
@@ -452,7 +483,7 @@ class MultiEntityEligibilityTests(TestCase):
 
         roadmap = Roadmap.objects.create(profile=self.profile, name='Test', max_recommendations=1)
         engine = RecommendationEngine(self.profile)
-        recommendations = engine.generate_quick_recommendations(roadmap)
+        recommendations = engine.generate_quick_recommendations(roadmap)['recommendations']
 
         applies = [r for r in recommendations if r['action'] == 'apply'
                    and r['card'].id == candidate.id]
@@ -486,11 +517,86 @@ class MultiEntityEligibilityTests(TestCase):
 
         roadmap = Roadmap.objects.create(profile=self.profile, name='Test2', max_recommendations=1)
         engine = RecommendationEngine(self.profile)
-        recommendations = engine.generate_quick_recommendations(roadmap)
+        recommendations = engine.generate_quick_recommendations(roadmap)['recommendations']
 
         for rec in recommendations:
             self.assertNotIn('apply_as', rec)
 
+    def _open_cards(self, owner, count):
+        from datetime import timedelta
+        from cards.models import UserCard
+        for i in range(count):
+            UserCard.objects.create(
+                user=self.user, card=self._card(f'{owner.name} Card {i}'), owner=owner,
+                opened_date=self.today - timedelta(days=100))
+
+    def test_household_plan_spends_a_524_slot_once(self):
+        """Primary at 5/24, Sam at 4/24: Sam can take ONE of two Chase
+        picks — per-card eligibility alone would hand Sam both."""
+        self._open_cards(self.primary, 5)
+        self._open_cards(self.sam, 4)
+        first = self._card('Chase One', issuer=self.chase)
+        second = self._card('Chase Two', issuer=self.chase)
+
+        engine = self._engine()
+        self.assertEqual(engine._eligible_entity_for_card(first).id, self.sam.id)
+        self.assertEqual(engine._eligible_entity_for_card(second).id, self.sam.id)
+
+        assignment, exhaustive = engine.household.assign(
+            [{'card': first, 'action': 'apply'}, {'card': second, 'action': 'apply'}])
+        self.assertTrue(exhaustive)
+        self.assertEqual([e.id if e else None for e in assignment], [self.sam.id, None])
+
+    def test_household_plan_spreads_applications_across_entities(self):
+        self._open_cards(self.primary, 4)
+        self._open_cards(self.sam, 4)
+        first = self._card('Chase One', issuer=self.chase)
+        second = self._card('Chase Two', issuer=self.chase)
+
+        engine = self._engine()
+        assignment, _ = engine.household.assign(
+            [{'card': first, 'action': 'apply'}, {'card': second, 'action': 'apply'}])
+        self.assertEqual([e.id for e in assignment], [self.primary.id, self.sam.id])
+
+    def test_household_plan_prefers_the_entity_that_earns_the_bonus(self):
+        """Either entity can open the Amex card, but only Sam gets the
+        bonus (primary held it before); the plan picks Sam even though
+        primary comes first."""
+        from datetime import timedelta
+        from cards.models import UserCard
+        card = self._card('Amex Bonus Card', issuer=self.amex)
+        card.signup_bonus_amount = 500
+        card.save()
+        UserCard.objects.create(
+            user=self.user, card=card, owner=self.primary,
+            opened_date=self.today - timedelta(days=2000),
+            closed_date=self.today - timedelta(days=1000))
+        from cards.models import SpendingAmount, SpendingCategory
+        SpendingAmount.objects.create(
+            profile=self.profile, monthly_amount=Decimal('3000'),
+            category=SpendingCategory.objects.create(name='Other', slug='other'))
+
+        engine = self._engine()
+        assignment, _ = engine.household.assign([{'card': card, 'action': 'apply'}])
+        self.assertEqual(assignment[0].id, self.sam.id)
+
+    def test_household_plan_splits_unrelated_applications(self):
+        """Chase 5/24 counts every personal card, so a Chase pick couples
+        with anything personal; two rule-free cards don't couple at all."""
+        chase_card = self._card('Chase Solo', issuer=self.chase)
+        first = self._card('Generic One')
+        second = self._card('Generic Two')
+        engine = self._engine()
+
+        engine.household.plan_applications(
+            [{'card': first, 'action': 'apply'}, {'card': second, 'action': 'apply'}])
+        self.assertEqual(engine.household.last_plan, {'exhaustive': True, 'groups': 2})
+
+        engine.household.plan_applications(
+            [{'card': chase_card, 'action': 'apply'}, {'card': first, 'action': 'apply'}])
+        self.assertEqual(engine.household.last_plan, {'exhaustive': True, 'groups': 1})
+        self.assertEqual(engine._eligible_entity_for_card(chase_card).id, self.primary.id)
+
 
 class SecondCopyApplyTests(TestCase):
     """Phase K2c: another household entity can apply for a card someone
@@ -533,7 +639,7 @@ class SecondCopyApplyTests(TestCase):
         roadmap = Roadmap.objects.create(
             profile=self.profile, name='Test', max_recommendations=max_recommendations)
         engine = RecommendationEngine(self.profile)
-        return engine.generate_quick_recommendations(roadmap)
+        return engine.generate_quick_recommendations(roadmap)['recommendations']
 
     def test_single_entity_household_never_gets_second_copy(self):
         """Explicit no-op-equivalence guard: a lone entity is always the
@@ -621,14 +727,14 @@ class BonusVelocityTests(TestCase):
         SpendingAmount.objects.create(profile=self.profile, category=other,
                                       monthly_amount=Decimal('2000'))
 
-    def _card(self, name, requirement):
+    def _card(self, name, requirement, bonus=500):
         from django.utils.text import slugify
         return CreditCard.objects.create(
             name=name, slug=slugify(name), issuer=self.issuer,
             signup_bonus_type=self.points, primary_reward_type=self.points,
-            signup_bonus_amount=500,
+            signup_bonus_amount=bonus,
             metadata={'reward_value_multiplier': 0.01,
-                      'signup_bonus': {'bonus_amount': 500,
+                      'signup_bonus': {'bonus_amount': bonus,
                                        'spending_requirement': requirement,
                                        'time_limit_months': 6}})
 
@@ -650,6 +756,49 @@ class BonusVelocityTests(TestCase):
         self.assertEqual(
             engine._bonus_months_needed(self._card('Any', 5000)), float('inf'))
 
+    def test_capacity_plan_is_exact_where_greedy_falls_short(self):
+        """At $2K/mo: A needs 7 months for $800, B and C 6 months for $600
+        each. Value-per-month greedy takes A and strands 5 months; B + C
+        fill the 12 exactly for $1,200."""
+        from .recommendation_engine import RecommendationEngine
+        engine = RecommendationEngine(self.profile)
+        a = self._card('Card A', 14000, bonus=800)
+        b = self._card('Card B', 12000, bonus=600)
+        c = self._card('Card C', 12000, bonus=600)
+
+        plan = engine._bonus_capacity_plan([a, b, c])
+        counted = {cid for cid, e in plan['by_card_id'].items() if e['counted']}
+        self.assertEqual(counted, {b.id, c.id})
+        self.assertAlmostEqual(plan['months_committed'], 12.0)
+        self.assertEqual(plan['sequence'], [b.id, c.id])
+        self.assertEqual([plan['by_card_id'][cid]['start_month'] for cid in plan['sequence']],
+                         [0.0, 6.0])
+
+    def test_capacity_plan_falls_back_to_greedy_over_budget(self):
+        from .recommendation_engine import RecommendationEngine
+        engine = RecommendationEngine(self.profile)
+        engine.bonus_capacity_manager.MAX_DP_CELLS = 0
+        a = self._card('Card A', 14000, bonus=800)
+        b = self._card('Card B', 12000, bonus=600)
+        c = self._card('Card C', 12000, bonus=600)
+        plan = engine._bonus_capacity_plan([a, b, c])
+        self.assertEqual(plan['sequence'], [a.id])
+
+    def test_capacity_plan_is_memoized_by_apply_set(self):
+        from .recommendation_engine import RecommendationEngine
+        engine = RecommendationEngine(self.profile)
+        a = self._card('Card A', 4000)
+        b = self._card('Card B', 6000)
+        plan = engine._bonus_capacity_plan([a, b])
+        self.assertIs(engine._bonus_capacity_plan([b, a]), plan)
+        self.assertIsNot(engine._bonus_capacity_plan([a]), plan)
+
+        # Spending meters the months, so a different spend is a different plan.
+        engine.spending_amounts = {'other': Decimal('4000')}
+        replanned = engine._bonus_capacity_plan([a, b])
+        self.assertIsNot(replanned, plan)
+        self.assertAlmostEqual(replanned['months_committed'], 2.5)
+
 
 class CreditAllocationTests(TestCase):
     """A5: _allocate_portfolio_credits is the single dedup authority for
@@ -860,7 +1009,7 @@ class CreditAllocationTests(TestCase):
 
         roadmap = Roadmap.objects.create(profile=self.profile, max_recommendations=5)
         engine = self._engine()
-        recs = engine.generate_quick_recommendations(roadmap)
+        recs = engine.generate_quick_recommendations(roadmap)['recommendations']
 
         rec_pays = next((r for r in recs if r['card'].id == card_pays.id), None)
         rec_not_pays = next((r for r in recs if r['card'].id == card_not_pays.id), None)
@@ -988,6 +1137,28 @@ class RoadmapPersistenceTests(TestCase):
         response = self.client.get('/api/roadmaps/current/')
         self.assertEqual(response.status_code, 404)
 
+    def _earn_on_dining(self):
+        from cards.models import RewardCategory
+        RewardCategory.objects.create(card=self.card, category=self.dining,
+                                      reward_rate=Decimal('3'), reward_type=self.cashback)
+
+    def test_summary_appears_once_in_response_and_storage(self):
+        self._earn_on_dining()
+        self.client.force_login(self.user)
+        data = self.client.post(
+            '/api/roadmaps/quick-recommendation/', self._payload(),
+            content_type='application/json').json()
+        self.assertEqual(data['format_version'], 2)
+        self.assertIn('bonus_capacity', data['portfolio_summary'])
+        self.assertTrue(data['recommendations'])
+        for rec in data['recommendations']:
+            self.assertNotIn('portfolio_summary', rec)
+
+        stored = RoadmapCalculation.objects.get(
+            roadmap__profile__user=self.user).calculation_data['response']
+        self.assertEqual(stored['format_version'], 2)
+        self.assertFalse(any('portfolio_summary' in rec for rec in stored['recommendations']))
+
     def test_regenerate_overwrites_rather_than_duplicates(self):
         self.client.force_login(self.user)
         self.client.post(
@@ -1307,6 +1478,35 @@ class RoadmapSharingTests(TestCase):
         self.assertEqual(data_response.status_code, 200)
         self.assertEqual(data_response.json()['owner_display_name'], 'A Credit Card Guru user')
 
+    def _public_share_uuid(self):
+        self.client.force_login(self.user)
+        self._generate(self.client)
+        return self.client.post(
+            '/api/roadmaps/current/share/', {'privacy_setting': 'public'},
+            content_type='application/json').json()['share_uuid']
+
+    def test_shared_data_negotiates_messagepack(self):
+        from cards.renderers import packb
+        share_uuid = self._public_share_uuid()
+        url = f'/api/roadmaps/shared/{share_uuid}/'
+
+        as_json = self.client.get(url).json()
+        response = self.client.get(url, HTTP_ACCEPT='application/x-msgpack')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-msgpack')
+        self.assertEqual(response.content, packb(as_json))
+
+    def test_large_roadmap_bodies_are_gzipped_on_request(self):
+        import gzip
+        share_uuid = self._public_share_uuid()
+        url = f'/api/roadmaps/shared/{share_uuid}/'
+
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
 
 class LandingRedirectTests(TestCase):
     """Phase D: `/` skips the landing page and redirects straight to
@@ -1577,6 +1777,33 @@ class RedemptionGuidanceTests(TestCase):
         guidance_user = redemption_guidance_for(card, user=user)
         self.assertEqual(guidance_user['value_per_point'], 0.020)
 
+    def test_guidance_by_card_matches_per_card_lookup_in_bounded_queries(self):
+        from .redemption import redemption_guidance_by_card, redemption_guidance_for
+        from django.contrib.auth.models import User
+        from cards.models import PointsProgram, PointsValuation
+
+        user = User.objects.create_user(username='batch', password='x')
+        cards = [
+            self._card('Batch Chase Card', self.points,
+                       metadata={'points_program': 'chase_ultimate_rewards'}),
+            self._card('Batch Amex Card', self.points,
+                       metadata={'points_program': 'amex_membership_rewards'}),
+            self._card('Batch Cashback Card', self.cashback),
+        ]
+        chase = PointsProgram.objects.get(slug='chase_ultimate_rewards')
+        PointsValuation.objects.create(points_program=chase, user=None, value=0.0170)
+        PointsValuation.objects.create(points_program=chase, user=user, value=0.0210)
+        # Cards as the engine holds them: related rows already loaded.
+        cards = list(CreditCard.objects.filter(pk__in=[c.pk for c in cards])
+                     .select_related('primary_reward_type', 'points_program'))
+
+        for who in (None, user):
+            with self.assertNumQueries(2):
+                guidance = redemption_guidance_by_card(cards, user=who)
+            for card in cards:
+                self.assertEqual(guidance[card.id], redemption_guidance_for(card, user=who))
+        self.assertEqual(guidance[cards[0].id]['value_per_point'], 0.021)
+
 
 class RedemptionLadderTests(TestCase):
     """Story 12: the best/worst endpoints the per-card line renders.
@@ -1831,6 +2058,96 @@ class ExpenseRecommenderTests(TestCase):
         self.assertEqual(rate, 2.0)
         self.assertAlmostEqual(rewards, 1000 * 2 * 0.01)
 
+    # plan_expenses: several dated expenses assigned jointly so signup
+    # minimums are met inside each card's window.
+
+    def _plan(self, expenses, max_new_cards=1):
+        engine = self._engine()
+        return engine.expense_recommender.plan_expenses(
+            expenses, list(CreditCard.objects.all()), max_new_cards=max_new_cards)
+
+    def test_expenses_combine_to_reach_a_minimum_inside_the_window(self):
+        from datetime import date
+        card = self._card('Combo Card', requirement=4000, time_months=3)
+        plan = self._plan([
+            {'amount': 2000, 'category_slug': 'travel', 'date': date(2026, 1, 10)},
+            {'amount': 2500, 'category_slug': 'travel', 'date': date(2026, 2, 20)},
+        ])
+        self.assertEqual(len(plan['applications']), 1)
+        app = plan['applications'][0]
+        self.assertEqual(app['card'].id, card.id)
+        self.assertGreater(app['signup_bonus_value'], 0)
+        self.assertEqual(app['apply_by'], date(2026, 1, 10))
+        self.assertEqual(app['bonus_deadline'], date(2026, 4, 10))
+        self.assertEqual(app['expense_spend'], 4500.0)
+        self.assertTrue(all(e['counts_toward_bonus'] for e in plan['expenses']))
+        self.assertAlmostEqual(
+            app['net_value'],
+            app['signup_bonus_value'] + app['category_rewards'] - app['effective_annual_fee'])
+        self.assertAlmostEqual(
+            plan['net_value'],
+            plan['total_rewards'] + plan['total_signup_bonus'] - plan['total_fees'])
+
+    def test_expenses_outside_the_window_do_not_count(self):
+        from datetime import date
+        self._card('Window Card', requirement=4000, time_months=3)
+        plan = self._plan([
+            {'amount': 2000, 'category_slug': 'travel', 'date': date(2026, 1, 10)},
+            {'amount': 2500, 'category_slug': 'travel', 'date': date(2026, 6, 1)},
+        ])
+        self.assertEqual(plan['total_signup_bonus'], 0.0)
+        self.assertFalse(any(e['counts_toward_bonus'] for e in plan['expenses']))
+
+    def test_two_new_cards_split_the_expenses(self):
+        from datetime import date
+        first = self._card('First Card', requirement=3000)
+        second = self._card('Second Card', requirement=3000)
+        day = date(2026, 3, 1)
+        plan = self._plan([
+            {'amount': 3000, 'category_slug': 'travel', 'date': day},
+            {'amount': 3000, 'category_slug': 'travel', 'date': day},
+        ], max_new_cards=2)
+        self.assertEqual({app['card'].id for app in plan['applications']},
+                         {first.id, second.id})
+        self.assertTrue(all(app['signup_bonus_value'] > 0 for app in plan['applications']))
+        self.assertEqual(len({e['card'].id for e in plan['expenses']}), 2)
+
+    def test_minimum_is_met_with_the_cheapest_expense_to_move(self):
+        """The dining expense earns 5x on an owned card; the travel one
+        earns nothing anywhere. Only travel should go toward the bonus."""
+        from datetime import date
+        from cards.models import SpendingCategory, UserCard
+        dining = SpendingCategory.objects.create(name='Dining', slug='dining')
+        owned = self._card('Dining Card', rate=Decimal('5.00'), category=dining)
+        UserCard.objects.create(user=self.user, card=owned, opened_date=date(2023, 1, 1))
+        new = self._card('Base Card', requirement=1000, rate=Decimal('1.00'), category=self.other)
+
+        plan = self._plan([
+            {'amount': 1000, 'category_slug': 'dining', 'date': date(2026, 5, 1)},
+            {'amount': 1000, 'category_slug': 'travel', 'date': date(2026, 5, 1)},
+        ])
+        dining_item, travel_item = plan['expenses']
+        self.assertEqual(dining_item['card'].id, owned.id)
+        self.assertFalse(dining_item['counts_toward_bonus'])
+        self.assertEqual(travel_item['card'].id, new.id)
+        self.assertTrue(travel_item['counts_toward_bonus'])
+
+    def test_plan_endpoint(self):
+        response = self.client.post('/api/roadmaps/expense-plan/', {
+            'spending_amounts': {},
+            'user_cards': [],
+            'expenses': [{'amount': 5000, 'category_id': self.travel.id, 'date': '2026-01-10'}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('applications', response.json())
+
+        response = self.client.post('/api/roadmaps/expense-plan/', {
+            'spending_amounts': {}, 'user_cards': [],
+            'expenses': [{'amount': 5000, 'date': 'soon'}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expenses', response.json())
+
 
 class ExpenseRecommendationResponseTests(TestCase):
     """The API surface for Phase N: expense_recommendation is present only
@@ -1955,3 +2272,817 @@ class EasyModeSpendingTests(TestCase):
         self.assertEqual(len(data['recommendations']), 1)
         rec = data['recommendations'][0]
         self.assertAlmostEqual(float(rec['estimated_rewards']), 960.00, places=2)
+
+
+class AsOfQuickRecommendationTests(CatalogFixtures, TestCase):
+    """`as_of` evaluates the plan on another day: a rotating 5% category
+    counts only inside its quarter."""
+
+    def setUp(self):
+        from datetime import date
+        self._catalog('Points', 'Rotating Bank')
+        self.amazon = self._category('Amazon')
+        other = self._category('Other Spending', 'other')
+        self._card('Rotating Card', [
+            (other, '1.00'),
+            (self.amazon, '5.00', date(2026, 4, 1), date(2026, 6, 30)),
+        ], metadata={'reward_value_multiplier': 0.01})
+
+    def rewards_as_of(self, as_of):
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/',
+            {'spending_amounts': {str(self.amazon.id): '100.00'}, 'user_cards': [],
+             'as_of': as_of},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return float(response.json()['recommendations'][0]['estimated_rewards'])
+
+    def test_rotating_category_counts_only_in_its_quarter(self):
+        self.assertAlmostEqual(self.rewards_as_of('2026-05-01'), 60.0, places=2)
+        self.assertAlmostEqual(self.rewards_as_of('2026-07-01'), 12.0, places=2)
+
+    def test_invalid_as_of_rejected(self):
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/',
+            {'spending_amounts': {str(self.amazon.id): '100.00'}, 'as_of': 'next quarter'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('as_of', response.json())
+
+
+class OfflineRecommendTests(CatalogFixtures, TestCase):
+    """roadmaps.offline.recommend: a profile document in, the
+    quick-recommendation response out, nothing stored."""
+
+    def setUp(self):
+        self._catalog('Points', 'Offline Bank')
+        self.dining = self._category('Dining')
+        other = self._category('Other Spending', 'other')
+        self.owned = self._card(
+            'Owned Card', [(other, '1.00')], metadata={'reward_value_multiplier': 0.01})
+        self.dining_card = self._card(
+            'Dining Card', [(self.dining, '4.00')], metadata={'reward_value_multiplier': 0.01})
+
+    def test_document_evaluated_without_storing_anything(self):
+        from cards.models import UserCard
+        from .offline import recommend
+
+        users = User.objects.count()
+        response = recommend({
+            'user_profile': {'spending': {'dining': 500, 'general': 1000}},
+            'owned_cards': [{'card': 'owned-card', 'opened_days_ago': 400}],
+            'max_recommendations': 2,
+        })
+        cards = {(rec['action'], rec['card']['name']) for rec in response['recommendations']}
+        self.assertIn(('apply', 'Dining Card'), cards)
+        self.assertIn(('keep', 'Owned Card'), cards)
+        self.assertIn('portfolio_summary', response)
+        self.assertEqual(User.objects.count(), users)
+        self.assertFalse(UserCard.objects.exists())
+        self.assertFalse(Roadmap.objects.exists())
+
+    def test_bad_documents_name_the_field(self):
+        from .offline import DocumentCatalog, ProfileDocumentError, recommend
+
+        catalog = DocumentCatalog()
+        for document, message in [
+            ({'user_profile': {'spending': {'dining': 1}}, 'owned_cards': ['nope']}, "card 'nope'"),
+            ({'user_profile': {'spending': {'bowling': 1}}}, "category 'bowling'"),
+            ({'user_profile': {'spending': {}}, 'strategy': 'nope'}, 'strategy'),
+            ({'user_profile': {'spending': {}}, 'as_of': 'soon'}, 'as_of'),
+            ({'user_profile': {'spending': {}},
+              'owned_cards': ['owned-card', 'owned-card']}, 'same open card'),
+        ]:
+            with self.assertRaisesMessage(ProfileDocumentError, message):
+                recommend(document, catalog)
+
+    def test_recommend_batch_streams_one_line_per_document(self):
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        documents = [
+            json.dumps({'id': 'a', 'user_profile': {'spending': {'dining': 500}}}),
+            '',
+            '{not json',
+            json.dumps({'id': 'b', 'owned_cards': ['nope']}),
+            json.dumps({'id': 'c', 'user_profile': {'spending': {'general': 900}},
+                        'owned_cards': ['owned-card']}),
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as input_file:
+            input_file.write('\n'.join(documents) + '\n')
+            input_file.flush()
+            out, err = StringIO(), StringIO()
+            call_command('recommend_batch', input_file.name, '--chunk-size', '2',
+                         stdout=out, stderr=err)
+
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r['line'] for r in results], [1, 3, 4, 5])
+        self.assertEqual([r.get('id') for r in results], ['a', None, 'b', 'c'])
+        self.assertIn('recommendations', results[0]['result'])
+        self.assertTrue(results[1]['error'].startswith('Invalid JSON'))
+        self.assertEqual(results[2]['error'], "Unknown card 'nope'")
+        self.assertIn('recommendations', results[3]['result'])
+        self.assertIn('4 profiles, 2 errors', err.getvalue())
+        self.assertFalse(User.objects.exists())
+
+
+class PartnerBatchTests(CatalogFixtures, TestCase):
+    """/api/roadmaps/partner/batch/: API-key auth, per-item results and
+    errors, and the per-key concurrency limit."""
+
+    URL = '/api/roadmaps/partner/batch/'
+
+    def setUp(self):
+        from .models import PartnerAPIKey
+        self._catalog('Points', 'Partner Bank')
+        self._card('Dining Card', [(self._category('Dining'), '4.00')],
+                   metadata={'reward_value_multiplier': 0.01})
+        # One slot keeps evaluation on the request thread, where the test
+        # transaction's rows are visible.
+        self.api_key, self.key = PartnerAPIKey.issue('Acme', max_concurrency=1)
+
+    def _post(self, data, key=None):
+        return self.client.post(
+            self.URL, data, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Api-Key {key or self.key}')
+
+    def test_requires_a_valid_active_key(self):
+        response = self.client.post(self.URL, {'items': [{}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self._post({'items': [{}]}, key='wrong').status_code, 401)
+        self.api_key.is_active = False
+        self.api_key.save()
+        self.assertEqual(self._post({'items': [{}]}).status_code, 401)
+
+    def test_results_in_order_with_per_item_errors(self):
+        response = self._post({'items': [
+            {'id': 'a', 'user_profile': {'spending': {'dining': 500}}},
+            {'id': 'b', 'owned_cards': ['nope']},
+            'not a document',
+        ]})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([entry['index'] for entry in data['results']], [0, 1, 2])
+        self.assertEqual(data['results'][0]['id'], 'a')
+        self.assertEqual(data['results'][0]['result']['recommendations'][0]['card']['name'],
+                         'Dining Card')
+        self.assertEqual(data['results'][1]['error'], "Unknown card 'nope'")
+        self.assertIn('JSON object', data['results'][2]['error'])
+        self.assertEqual(data['errors'], 2)
+        self.assertFalse(User.objects.exists())
+
+    def test_malformed_batches_are_rejected(self):
+        self.assertEqual(self._post({'items': []}).status_code, 400)
+        self.assertEqual(self._post({'items': {'id': 'a'}}).status_code, 400)
+        with override_settings(PARTNER_BATCH_MAX_ITEMS=2):
+            self.assertEqual(self._post({'items': [{}, {}, {}]}).status_code, 400)
+
+    def test_key_at_its_concurrency_limit_gets_429(self):
+        from .partner import key_slots
+        self.assertEqual(key_slots.acquire(self.api_key, 5), 1)
+        try:
+            response = self._post({'items': [{}]})
+        finally:
+            key_slots.release(self.api_key, 1)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self._post({'items': [{}]}).status_code, 200)
+
+    def test_sqlite_file_database_runs_one_slice(self):
+        from unittest import mock
+        from django.db import connection
+        from . import partner
+        self.api_key.max_concurrency = 4
+        self.api_key.save()
+        with mock.patch.object(connection, 'is_in_memory_db', return_value=False), \
+                mock.patch.object(partner.batch_pool, 'submit') as submit:
+            response = self._post({'items': [{}, {}, {}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+        submit.assert_not_called()
+
+
+class SlowRequestProfilerTests(CatalogFixtures, TestCase):
+    """With PROFILER_DIR set, slow quick-recommendation requests are stored
+    with their stacks and engine inputs, and replay through engine_profiles."""
+
+    def setUp(self):
+        import tempfile
+        self._catalog('Points', 'Profiled Bank')
+        self.dining = self._category('Dining')
+        self.owned = self._card('Owned Card', metadata={'reward_value_multiplier': 0.01})
+        self._card('Dining Card', [(self.dining, '4.00')],
+                   metadata={'reward_value_multiplier': 0.01})
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profiler_dir = directory.name
+        settings = override_settings(
+            PROFILER_DIR=self.profiler_dir, PROFILER_SLOW_THRESHOLD=0, PROFILER_INTERVAL=0.001)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _post(self, path='/api/roadmaps/quick-recommendation/'):
+        return self.client.post(
+            path,
+            {'spending_amounts': {str(self.dining.id): '500.00'},
+             'user_cards': [{'card_id': self.owned.id, 'opened_date': '2024-03-01',
+                             'nickname': 'My card'}],
+             'strategy': 'maximizer', 'email': 'someone@example.com'},
+            content_type='application/json')
+
+    def test_slow_request_stored_with_inputs_and_stacks(self):
+        from .profiling import list_captures
+        self.assertEqual(self._post().status_code, 200)
+
+        [record] = list_captures()
+        self.assertEqual(record['reason'], 'slow')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(set(record['payload']),
+                         {'spending_amounts', 'user_cards', 'strategy'})
+        self.assertNotIn('nickname', record['payload']['user_cards'][0])
+        scenario = record['scenario']
+        self.assertEqual(scenario['user_profile']['spending'], {'dining': 500.0})
+        self.assertEqual(scenario['owned_cards'],
+                         [{'card': 'owned-card', 'opened_date': '2024-03-01'}])
+        self.assertEqual(scenario['strategy'], 'maximizer')
+        self.assertEqual(record['samples'], sum(record['stacks'].values()))
+        self.assertTrue(all(stack.startswith('roadmaps/profiling.py:__call__')
+                            for stack in record['stacks']))
+
+    def test_unwatched_paths_and_fast_requests_are_not_stored(self):
+        from .profiling import list_captures
+        self.client.get('/api/')
+        with override_settings(PROFILER_SLOW_THRESHOLD=60):
+            self._post()
+        self.assertEqual(list_captures(), [])
+
+    def test_oldest_captures_rotated_out(self):
+        from .profiling import list_captures
+        with override_settings(PROFILER_MAX_CAPTURES=2):
+            for _ in range(3):
+                self._post()
+        self.assertEqual(len(list_captures()), 2)
+
+    def test_export_and_replay(self):
+        import os
+        from io import StringIO
+        from django.core.management import call_command
+        from .profiling import list_captures
+        self._post()
+        capture_id = list_captures()[0]['id']
+
+        out = StringIO()
+        call_command('engine_profiles', 'replay', capture_id[:20], '--repeat', '1', stdout=out)
+        self.assertIn(f'captured-{capture_id}: median', out.getvalue())
+
+        path = os.path.join(self.profiler_dir, 'case.scenario')
+        call_command('engine_profiles', 'replay', capture_id, '--export', path, stdout=StringIO())
+        with open(path) as f:
+            exported = json.load(f)
+        self.assertEqual(exported['category'], 'captured')
+        self.assertEqual(exported['scenarios'][0]['owned_cards'][0]['card'], 'owned-card')
+
+        out = StringIO()
+        call_command('engine_profiles', 'replay', path, '--repeat', '1', stdout=out)
+        self.assertIn('Self:', out.getvalue())
+
+
+class SingleFlightTests(SimpleTestCase):
+    """roadmaps.coalescing.SingleFlight: identical keys share a run, and an
+    owner's newer request supersedes its older one."""
+
+    def _run(self, coroutine):
+        import asyncio
+        return asyncio.run(coroutine)
+
+    def test_identical_keys_share_one_computation(self):
+        import asyncio
+        import threading
+        from .coalescing import SingleFlight
+
+        flights = SingleFlight(max_workers=2)
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'result'
+
+        async def scenario():
+            waiters = [asyncio.ensure_future(flights.run('same', compute)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*waiters)
+
+        self.assertEqual(self._run(scenario()), ['result'] * 3)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_newer_request_from_same_owner_supersedes(self):
+        import asyncio
+        import threading
+        from .coalescing import SingleFlight, Superseded
+
+        flights = SingleFlight(max_workers=1)
+        release = threading.Event()
+        ran = []
+
+        def blocker():
+            release.wait(5)
+            return 'blocker'
+
+        def slow():
+            ran.append('slow')
+            return 'slow'
+
+        async def scenario():
+            # Occupy the single worker so 'slow' stays queued.
+            blocking = asyncio.ensure_future(flights.run('block', blocker))
+            stale = asyncio.ensure_future(flights.run('v1', slow, owner='session-a'))
+            await asyncio.sleep(0.05)
+            fresh = asyncio.ensure_future(flights.run('v2', lambda: 'fresh', owner='session-a'))
+            with self.assertRaises(Superseded):
+                await stale
+            release.set()
+            return await blocking, await fresh
+
+        self.assertEqual(self._run(scenario()), ('blocker', 'fresh'))
+        # The superseded job never started: its only waiter left while queued.
+        self.assertEqual(ran, [])
+
+    def test_errors_reach_every_waiter(self):
+        import asyncio
+        from .coalescing import SingleFlight
+
+        def fail():
+            raise ValueError('boom')
+
+        async def scenario():
+            return await asyncio.gather(
+                SingleFlight(max_workers=1).run('k', fail), return_exceptions=True)
+
+        [error] = self._run(scenario())
+        self.assertIsInstance(error, ValueError)
+
+
+class AsyncQuickRecommendationTests(CatalogFixtures, TransactionTestCase):
+    """The async endpoint runs the engine on a pool thread, which has its own
+    DB connection — hence TransactionTestCase, so the fixtures are committed
+    and visible to it."""
+
+    def setUp(self):
+        self._catalog()
+        self.dining = self._category('Dining')
+        self._card('Async Card')
+        self.payload = {
+            'spending_amounts': {str(self.dining.id): '500.00'},
+            'user_cards': [],
+            'max_recommendations': 1,
+            'persist': False,
+        }
+
+    def test_matches_sync_endpoint(self):
+        sync = self.client.post(
+            '/api/roadmaps/quick-recommendation/', self.payload,
+            content_type='application/json').json()
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/async/', self.payload,
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        sync.pop('generated_at')
+        data.pop('generated_at')
+        self.assertEqual(data, sync)
+
+    def test_persists_current_roadmap(self):
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/async/', {**self.payload, 'persist': True},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        profile = UserSpendingProfile.objects.get(session_key=self.client.session.session_key)
+        self.assertTrue(Roadmap.objects.filter(profile=profile, name='Current Roadmap').exists())
+
+    def test_invalid_payload_is_400(self):
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/async/', {'strategy': 'nope'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('strategy', response.json())
+
+    def test_canonical_key_ignores_formatting(self):
+        from .views import _quick_rec_key
+        from .serializers import GenerateRoadmapSerializer
+
+        def key(amount):
+            serializer = GenerateRoadmapSerializer(data={**self.payload, 'spending_amounts': {
+                str(self.dining.id): amount}})
+            serializer.is_valid(raise_exception=True)
+            return _quick_rec_key(serializer, 'anonymous')
+
+        self.assertEqual(key('500'), key(500.0))
+        self.assertNotEqual(key('500'), key('501'))
+
+
+@override_settings(ROADMAP_JOBS_INLINE=False)
+class RoadmapGenerationJobTests(CatalogFixtures, TestCase):
+    """With a worker, POST .../generate/ queues a job (202) that run_job
+    completes; the status endpoint reports it and is scoped to the
+    roadmap's owner. Without one, the request runs the job itself."""
+
+    def setUp(self):
+        from cards.models import SpendingAmount
+        self.user = User.objects.create_user(username='jobs', password='x')
+        self._catalog()
+        dining = self._category('Dining')
+        self._card('Job Card')
+        self.profile = UserSpendingProfile.objects.create(user=self.user)
+        SpendingAmount.objects.create(profile=self.profile, category=dining, monthly_amount=500)
+        self.roadmap = Roadmap.objects.create(profile=self.profile, name='Plan')
+        self.client.force_login(self.user)
+
+    def generate(self):
+        return self.client.post(f'/api/roadmaps/{self.roadmap.id}/generate/')
+
+    def test_generate_returns_202_and_dedupes_pending(self):
+        first = self.generate()
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.json()['status'], 'pending')
+        self.assertEqual(first['Location'], first.json()['status_url'])
+
+        second = self.generate()
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        self.assertEqual(RoadmapGenerationJob.objects.count(), 1)
+
+    def test_worker_runs_job_and_status_includes_roadmap(self):
+        from .jobs import claim_next_job, run_job
+        job_id = self.generate().json()['id']
+
+        job = claim_next_job()
+        self.assertEqual(job.pk, job_id)
+        self.assertEqual(job.status, 'running')
+        self.assertIsNone(claim_next_job())
+        # A re-post while running queues a fresh job, but it can't be
+        # claimed until the running one finishes.
+        self.assertNotEqual(self.generate().json()['id'], job_id)
+        self.assertIsNone(claim_next_job())
+
+        run_job(job)
+        data = self.client.get(f'/api/roadmaps/jobs/{job_id}/').json()
+        self.assertEqual(data['status'], 'succeeded')
+        self.assertEqual(data['roadmap']['id'], self.roadmap.id)
+        self.assertIsNotNone(claim_next_job())
+
+    def test_failure_is_recorded(self):
+        from unittest import mock
+        from .jobs import claim_next_job, run_job
+        self.generate()
+        with mock.patch('roadmaps.recommendation_engine.RecommendationEngine.generate_roadmap',
+                        side_effect=RuntimeError('engine exploded')), \
+                self.assertLogs('roadmaps.jobs', 'ERROR'):
+            job = run_job(claim_next_job())
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('engine exploded', job.error)
+
+    def test_status_is_owner_scoped(self):
+        job_id = self.generate().json()['id']
+        other = User.objects.create_user(username='other', password='x')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(f'/api/roadmaps/jobs/{job_id}/').status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(f'/api/roadmaps/jobs/{job_id}/').status_code, 404)
+
+    @override_settings(ROADMAP_JOBS_INLINE=True)
+    def test_without_a_worker_the_request_runs_the_job(self):
+        stale = RoadmapGenerationJob.objects.create(roadmap=self.roadmap)
+        response = self.generate()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # A job left pending by a stopped worker is the one run.
+        self.assertEqual(data['id'], stale.id)
+        self.assertEqual(data['status'], 'succeeded')
+        self.assertEqual(data['roadmap']['id'], self.roadmap.id)
+
+        # Another request mid-generation: poll its job rather than race it.
+        RoadmapGenerationJob.objects.filter(pk=stale.pk).update(status='running')
+        response = self.generate()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['id'], stale.id)
+
+    def test_stale_running_jobs_are_failed(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .jobs import fail_stale_jobs
+        job = RoadmapGenerationJob.objects.create(
+            roadmap=self.roadmap, status='running',
+            started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(fail_stale_jobs(timedelta(minutes=10)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+
+class RunRoadmapJobsCommandTests(TransactionTestCase):
+    """The worker command drains the queue from its own pool thread.
+
+    Concurrency 1: the shared-cache in-memory SQLite test DB takes table
+    locks without a busy timeout, so concurrent engine writes would fail
+    here for reasons that don't apply to a real database.
+    """
+
+    def test_once_drains_queue(self):
+        from io import StringIO
+        from django.core.management import call_command
+        profile = UserSpendingProfile.objects.create(session_key='worker-test')
+        for name in ('A', 'B', 'C'):
+            RoadmapGenerationJob.objects.create(
+                roadmap=Roadmap.objects.create(profile=profile, name=name))
+
+        out = StringIO()
+        call_command('run_roadmap_jobs', '--once', '--concurrency', '1', stdout=out)
+
+        self.assertEqual(
+            set(RoadmapGenerationJob.objects.values_list('status', flat=True)), {'succeeded'},
+            list(RoadmapGenerationJob.objects.values_list('error', flat=True)))
+        self.assertIn('3 succeeded, 0 failed', out.getvalue())
+
+
+class StreamingQuickRecommendationTests(CatalogFixtures, TestCase):
+    """quick-recommendation/stream/ sends selection, card, summary and done
+    events that add up to exactly the plain endpoint's payload."""
+
+    def setUp(self):
+        self._catalog()
+        self.dining = self._category('Dining')
+        for name, rate in [('Stream-A', '3'), ('Stream-B', '2')]:
+            self._card(
+                name, [(self.dining, rate)], signup_bonus_amount=200,
+                metadata={'signup_bonus': {'spending_requirement': 500, 'time_limit_months': 3}})
+        self.payload = {
+            'spending_amounts': {str(self.dining.id): '800.00'},
+            'user_cards': [],
+            'max_recommendations': 2,
+        }
+
+    def events(self, response):
+        body = b''.join(response.streaming_content).decode()
+        events = []
+        for frame in filter(None, body.split('\n\n')):
+            lines = dict(line.split(': ', 1) for line in frame.split('\n'))
+            events.append((lines['event'], json.loads(lines['data'])))
+        return events
+
+    def test_stages_reassemble_plain_response(self):
+        plain = self.client.post(
+            '/api/roadmaps/quick-recommendation/', {**self.payload, 'persist': False},
+            content_type='application/json').json()
+
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/stream/', self.payload,
+            content_type='application/json')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = self.events(response)
+        names = [name for name, _ in events]
+        self.assertEqual(names, ['selection'] + ['card'] * len(plain['recommendations'])
+                         + ['summary', 'done'])
+        self.assertGreater(len(plain['recommendations']), 0)
+
+        selection = events[0][1]
+        self.assertEqual(selection['total_estimated_rewards'], plain['total_estimated_rewards'])
+        self.assertNotIn('rewards_breakdown', selection['recommendations'][0])
+        self.assertNotIn('redemption', selection['recommendations'][0]['card'])
+
+        assembled = {
+            'recommendations': [data['recommendation'] for name, data in events if name == 'card'],
+            'total_estimated_rewards': selection['total_estimated_rewards'],
+            'portfolio_summary': events[-2][1]['portfolio_summary'],
+            'format_version': events[-1][1]['format_version'],
+        }
+        self.assertIn('timeline', assembled['portfolio_summary']['bonus_capacity'])
+        plain.pop('generated_at')
+        self.assertEqual(assembled, plain)
+
+        # What got persisted is the same payload the stream carried.
+        profile = UserSpendingProfile.objects.get(session_key=self.client.session.session_key)
+        stored = Roadmap.objects.get(profile=profile, name='Current Roadmap').calculation
+        self.assertEqual(stored.calculation_data['response']['generated_at'], events[-1][1]['generated_at'])
+        self.assertEqual(stored.calculation_data['response']['recommendations'], assembled['recommendations'])
+
+    def test_scratch_writes_rolled_back_before_first_event(self):
+        from django.db import connection
+        from cards.models import SpendingAmount
+        savepoints = len(connection.savepoint_ids)
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/stream/', self.payload,
+            content_type='application/json')
+        chunks = iter(response.streaming_content)
+        first = next(chunks).decode()
+        self.assertTrue(first.startswith('event: selection'))
+        # The engine's transaction is closed and its writes undone before
+        # the client gets anything, not held open while it reads.
+        self.assertEqual(len(connection.savepoint_ids), savepoints)
+        self.assertFalse(SpendingAmount.objects.exists())
+        b''.join(chunks)
+
+    def test_disconnect_mid_stream_still_persists(self):
+        from unittest import mock
+        from .recommendation_engine import RecommendationEngine
+        generate = RecommendationEngine.generate_quick_recommendations
+        with mock.patch.object(RecommendationEngine, 'generate_quick_recommendations',
+                               autospec=True, side_effect=generate) as engine_run:
+            response = self.client.post(
+                '/api/roadmaps/quick-recommendation/stream/', self.payload,
+                content_type='application/json')
+            next(iter(response.streaming_content))
+            response.close()
+        # The finished result is persisted; the engine isn't run again.
+        self.assertEqual(engine_run.call_count, 1)
+
+        profile = UserSpendingProfile.objects.get(session_key=self.client.session.session_key)
+        stored = Roadmap.objects.get(profile=profile, name='Current Roadmap').calculation
+        self.assertEqual(len(stored.calculation_data['response']['recommendations']), 2)
+        self.assertIn('portfolio_summary', stored.calculation_data['response'])
+
+    def test_invalid_payload_is_plain_400(self):
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/stream/', {'strategy': 'nope'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('strategy', response.json())
+
+
+class WhatIfTests(CatalogFixtures, TestCase):
+    """what-if/ evaluates every spending variant against one engine; each
+    variant must agree with a plain quick recommendation at that spending."""
+
+    def setUp(self):
+        self._catalog()
+        self.dining = self._category('Dining')
+        self.groceries = self._category('Groceries')
+        self.cards = {}
+        for name, category, rate in [('Whatif-Dining', self.dining, '3'),
+                                     ('Whatif-Grocery', self.groceries, '4')]:
+            card = self._card(
+                name, [(category, rate)], signup_bonus_amount=100,
+                metadata={'signup_bonus': {'spending_requirement': 500, 'time_limit_months': 3}})
+            self.cards[card.slug] = card
+        self.payload = {
+            'spending_amounts': {str(self.dining.id): '800.00'},
+            'user_cards': [],
+            'max_recommendations': 1,
+        }
+
+    def plain_total(self, spending):
+        response = self.client.post(
+            '/api/roadmaps/quick-recommendation/',
+            {**self.payload, 'spending_amounts': spending, 'persist': False},
+            content_type='application/json').json()
+        return response['total_estimated_rewards'], [r['card']['id'] for r in response['recommendations']]
+
+    def test_variants_match_plain_endpoint(self):
+        response = self.client.post('/api/roadmaps/what-if/', {
+            **self.payload,
+            'variations': [
+                {'category_id': self.dining.id, 'from': 400, 'to': 1200, 'step': 400},
+                {'spending_amounts': {str(self.dining.id): 0, str(self.groceries.id): 2000}},
+            ],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['variants']), 4)
+
+        base_total, base_ids = self.plain_total(self.payload['spending_amounts'])
+        self.assertAlmostEqual(data['base']['net_value'], float(base_total), places=2)
+        self.assertEqual([c['id'] for c in data['base']['cards']], base_ids)
+
+        for variant in data['variants']:
+            spending = {**self.payload['spending_amounts'],
+                        **{cid: str(amount) for cid, amount in variant['spending'].items()}}
+            spending = {cid: amount for cid, amount in spending.items() if float(amount) > 0}
+            total, ids = self.plain_total(spending)
+            self.assertAlmostEqual(variant['net_value'], float(total), places=2)
+            self.assertEqual([c['id'] for c in variant['cards']], ids)
+            self.assertAlmostEqual(
+                variant['delta'], variant['net_value'] - data['base']['net_value'], places=2)
+
+        self.assertFalse(data['variants'][1]['cards_changed'])
+        switched = data['variants'][3]
+        self.assertTrue(switched['cards_changed'])
+        self.assertEqual(switched['cards'][0]['id'], self.cards['whatif-grocery'].id)
+
+    def test_nothing_is_persisted(self):
+        self.client.post('/api/roadmaps/what-if/', {
+            **self.payload,
+            'variations': [{'category_id': self.dining.id, 'from': 100, 'to': 200, 'step': 100}],
+        }, content_type='application/json')
+        self.assertFalse(Roadmap.objects.exists())
+
+    def test_invalid_variations_are_400(self):
+        for variations in ([],
+                           [{'category_id': 999999, 'from': 0, 'to': 10, 'step': 1}],
+                           [{'category_id': self.dining.id, 'from': 0, 'to': 1000, 'step': 1}],
+                           [{'spending_amounts': {str(self.dining.id): -5}}],
+                           [{'nonsense': True}]):
+            response = self.client.post(
+                '/api/roadmaps/what-if/', {**self.payload, 'variations': variations},
+                content_type='application/json')
+            self.assertEqual(response.status_code, 400, variations)
+            self.assertIn('variations', response.json())
+
+
+class ValuationTableTests(CatalogFixtures, TestCase):
+    """Card-level valuations are computed once per run into the engine's
+    ValuationTable and shared by both optimizer scenarios; nothing is
+    cached on the catalog's model instances."""
+
+    def setUp(self):
+        from cards.models import SpendingAmount, UserCard
+        from datetime import date
+        self.user = User.objects.create_user(username='valuer', email='val@example.com')
+        self.profile = UserSpendingProfile.objects.create(user=self.user)
+        self._catalog()
+        self.dining = self._category('Dining')
+        SpendingAmount.objects.create(profile=self.profile, category=self.dining,
+                                      monthly_amount=Decimal('500'))
+        self.cards = [
+            self._card(
+                name, [(self.dining, rate)], signup_bonus_amount=200,
+                metadata={'signup_bonus': {'spending_requirement': 1200, 'time_limit_months': 3}})
+            for name, rate in [('Value-Held', '2'), ('Value-Three', '3'), ('Value-Four', '4')]
+        ]
+        UserCard.objects.create(user=self.user, card=self.cards[0], opened_date=date(2024, 1, 1))
+        self.roadmap = Roadmap.objects.create(profile=self.profile, name='Test', max_recommendations=1)
+
+    def test_each_card_valued_once_without_touching_models(self):
+        from unittest import mock
+        from .recommendation_engine import RecommendationEngine
+        from .engine.valuation import ValuationTable
+        engine = RecommendationEngine(self.profile)
+        valued = []
+        original = ValuationTable._value
+
+        def counting(table, card):
+            valued.append(card.id)
+            return original(table, card)
+
+        with mock.patch.object(ValuationTable, '_value', counting):
+            engine.generate_quick_recommendations(self.roadmap)
+
+        self.assertEqual(sorted(valued), sorted(card.id for card in self.cards))
+        for card in self.cards:
+            self.assertFalse(hasattr(card, '_cached_reward_categories'))
+        self.assertFalse(hasattr(engine, '_cached_parent_spending'))
+
+        four = self.cards[2]
+        self.assertAlmostEqual(engine.valuations.standalone_value(four), 500 * 12 * 4 * 0.01)
+        self.assertAlmostEqual(engine.valuations.months_needed(four), 2.4)
+        self.assertAlmostEqual(engine.valuations.bonus_value(four), 200.0)
+        self.assertAlmostEqual(engine.optimizer.calculate_smart_card_value(four),
+                               240.0 + 200.0)
+
+    def test_new_spending_rebuilds_table(self):
+        from .recommendation_engine import RecommendationEngine
+        engine = RecommendationEngine(self.profile)
+        engine.generate_quick_recommendations(self.roadmap)
+        first = engine.valuations
+        engine.generate_quick_recommendations(
+            self.roadmap, spending_amounts={'dining': Decimal('1000')})
+        self.assertIsNot(engine.valuations, first)
+        self.assertAlmostEqual(engine.valuations.standalone_value(self.cards[2]), 480.0)
+        self.assertAlmostEqual(engine.valuations.months_needed(self.cards[2]), 1.2)
+
+
+class BreakdownRenderingTests(CatalogFixtures, TestCase):
+    """Scoring works on numeric breakdown records; display text is rendered
+    only on the recommendations that are returned."""
+
+    def setUp(self):
+        from cards.models import SpendingAmount
+        self.user = User.objects.create_user(username='renderer', email='render@example.com')
+        self.profile = UserSpendingProfile.objects.create(user=self.user)
+        self._catalog()
+        dining = self._category('Dining')
+        SpendingAmount.objects.create(profile=self.profile, category=dining,
+                                      monthly_amount=Decimal('500'))
+        self.card = self._card('Render Card', [(dining, '3')])
+        self.roadmap = Roadmap.objects.create(profile=self.profile, name='Test', max_recommendations=1)
+
+    def test_scoring_breakdown_has_no_text(self):
+        from .recommendation_engine import RecommendationEngine
+        engine = RecommendationEngine(self.profile)
+        breakdown = engine._calculate_card_rewards_breakdown(self.card)
+        self.assertAlmostEqual(breakdown['total_rewards'], 180.0)
+        line = breakdown['breakdown'][0]
+        self.assertNotIn('calculation', line)
+        self.assertNotIn('category_name', line)
+
+    def test_returned_recommendations_are_rendered(self):
+        from .recommendation_engine import RecommendationEngine
+        recs = RecommendationEngine(self.profile).generate_quick_recommendations(
+            self.roadmap)['recommendations']
+        rec = next(r for r in recs if r['card'].id == self.card.id)
+        line = next(b for b in rec['rewards_breakdown'] if b['type'] == 'reward_category')
+        self.assertEqual(line['category_name'], 'Dining (3.0x)')
+        self.assertEqual(line['calculation'], '$6,000 × 3.0x × 0.010 = $180.00')
+        self.assertNotIn('label', line)
@@ -14,7 +14,13 @@ urlpatterns = [
     
     # Roadmap generation
     path('<int:roadmap_id>/generate/', views.generate_roadmap_view, name='roadmap-generate'),
+    path('jobs/<int:job_id>/', views.roadmap_job_view, name='roadmap-job'),
     path('quick-recommendation/', views.quick_recommendation_view, name='quick-recommendation'),
+    path('quick-recommendation/stream/', views.quick_recommendation_stream_view, name='quick-recommendation-stream'),
+    path('quick-recommendation/async/', views.quick_recommendation_async_view, name='quick-recommendation-async'),
+    path('partner/batch/', views.partner_batch_view, name='partner-batch'),
+    path('expense-plan/', views.expense_plan_view, name='expense-plan'),
+    path('what-if/', views.what_if_view, name='what-if'),
     path('current/', views.current_roadmap_view, name='roadmap-current'),
     path('current/share/', views.current_roadmap_share_view, name='roadmap-current-share'),
     path('shared/<uuid:share_uuid>/', views.shared_roadmap_data_view, name='roadmap-shared-data'),
@@ -1,21 +1,45 @@
+import hashlib
+import json
+import logging
+
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import (
+    api_view, authentication_classes, permission_classes, renderer_classes,
+)
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder as DRFJSONEncoder
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_POST
 
+from cards.caching import catalog_version
 from cards.models import UserSpendingProfile
+from cards.renderers import COMPACT_RENDERER_CLASSES
 from .models import (
-    Roadmap, RoadmapCalculation, RoadmapFilter,
+    Roadmap, RoadmapCalculation, RoadmapFilter, RoadmapGenerationJob,
     CURRENT_ROADMAP_NAME, get_current_roadmap,
 )
 from .serializers import (
     RoadmapFilterSerializer, RoadmapSerializer,
     CreateRoadmapSerializer, GenerateRoadmapSerializer,
-    RoadmapRecommendationResponseSerializer, ExpenseRecommendationSerializer
+    ExpenseRecommendationSerializer, RoadmapGenerationJobSerializer, WhatIfSerializer,
+    PlanExpensesSerializer, ExpensePlanSerializer, RESPONSE_FORMAT_VERSION,
 )
-from .recommendation_engine import RecommendationEngine
-from .redemption import redemption_guidance_for
+from .coalescing import SingleFlight, Superseded
+from .jobs import enqueue_generation, generate_inline
+from .partner import HasPartnerAPIKey, PartnerAPIKeyAuthentication, evaluate_batch
+from .redemption import redemption_guidance_by_card
+from .responses import (
+    build_recommendation_response, portfolio_summary,
+    recommendation_headline, recommendation_item,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class RoadmapFilterListView(generics.ListCreateAPIView):
@@ -23,8 +47,10 @@ class RoadmapFilterListView(generics.ListCreateAPIView):
     serializer_class = RoadmapFilterSerializer
 
 
+@method_decorator(gzip_page, name='dispatch')
 class RoadmapListView(generics.ListAPIView):
     serializer_class = RoadmapSerializer
+    renderer_classes = COMPACT_RENDERER_CLASSES
     
     def get_queryset(self):
         # Get roadmaps for current user/session
@@ -45,8 +71,10 @@ class RoadmapListView(generics.ListAPIView):
         return Roadmap.objects.none()
 
 
+@method_decorator(gzip_page, name='dispatch')
 class RoadmapDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = RoadmapSerializer
+    renderer_classes = COMPACT_RENDERER_CLASSES
     
     def get_queryset(self):
         # Get roadmaps for current user/session
@@ -83,57 +111,79 @@ def create_roadmap_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _owned_roadmaps(request):
+    """Roadmaps belonging to the requesting user or anonymous session, or
+    None for an anonymous request with no session yet."""
+    if request.user.is_authenticated:
+        return Roadmap.objects.filter(profile__user=request.user)
+    session_key = request.session.session_key
+    if not session_key:
+        return None
+    return Roadmap.objects.filter(profile__session_key=session_key)
+
+
 @api_view(['POST'])
 def generate_roadmap_view(request, roadmap_id):
-    """Generate recommendations for an existing roadmap"""
-    
-    # Get roadmap for current user/session
-    if request.user.is_authenticated:
-        roadmap = get_object_or_404(
-            Roadmap.objects.select_related('profile__user')
-                           .prefetch_related('filters'),
-            id=roadmap_id,
-            profile__user=request.user
-        )
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            return Response(
-                {'error': 'No session found'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        roadmap = get_object_or_404(
-            Roadmap.objects.select_related('profile')
-                           .prefetch_related('filters'),
-            id=roadmap_id,
-            profile__session_key=session_key
-        )
-    
-    try:
-        # Generate recommendations using the engine
-        engine = RecommendationEngine(roadmap.profile)
-        recommendations = engine.generate_roadmap(roadmap)
-        
-        # Return updated roadmap
-        roadmap.refresh_from_db()
-        serializer = RoadmapSerializer(roadmap)
-        return Response(serializer.data)
-        
-    except Exception as e:
+    """Generate recommendations for an existing roadmap.
+
+    With a `run_roadmap_jobs` worker (ROADMAP_JOBS_INLINE off) this queues
+    a job and returns 202; poll its status_url for the result. Posting again
+    while a job is still pending returns that job instead of a new one.
+    Without one, the job runs in this request and the finished job is
+    returned with 200.
+    """
+    roadmaps = _owned_roadmaps(request)
+    if roadmaps is None:
         return Response(
-            {'error': f'Failed to generate roadmap: {str(e)}'}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': 'No session found'}, 
+            status=status.HTTP_400_BAD_REQUEST
         )
+    roadmap = get_object_or_404(roadmaps, id=roadmap_id)
 
+    if settings.ROADMAP_JOBS_INLINE:
+        job = generate_inline(roadmap)
+    else:
+        job, _ = enqueue_generation(roadmap)
+    data = _job_data(job)
+    finished = job.status in (
+        RoadmapGenerationJob.STATUS_SUCCEEDED, RoadmapGenerationJob.STATUS_FAILED)
+    return Response(
+        data,
+        status=status.HTTP_200_OK if finished else status.HTTP_202_ACCEPTED,
+        headers={'Location': data['status_url']},
+    )
 
-def _build_quick_rec_response(recommendations):
-    """Build the quick-recommendation JSON payload using DRF serializer."""
-    serializer = RoadmapRecommendationResponseSerializer({'recommendations': recommendations})
-    return serializer.data
+
+def _job_data(job):
+    """A job's status, plus the generated roadmap once it has succeeded."""
+    data = RoadmapGenerationJobSerializer(job).data
+    if job.status == RoadmapGenerationJob.STATUS_SUCCEEDED:
+        roadmap = Roadmap.objects.prefetch_related(
+            'filters', 'recommendations__card', 'calculation'
+        ).get(pk=job.roadmap_id)
+        data['roadmap'] = RoadmapSerializer(roadmap).data
+    return data
 
 
+@api_view(['GET'])
+def roadmap_job_view(request, job_id):
+    """Status of a roadmap generation job; includes the generated roadmap
+    once it has succeeded."""
+    roadmaps = _owned_roadmaps(request)
+    if roadmaps is None:
+        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    job = get_object_or_404(
+        RoadmapGenerationJob.objects.filter(roadmap__in=roadmaps), id=job_id)
+    return Response(_job_data(job))
 
-def _persist_current_roadmap(request, response_data):
+
+def _build_quick_rec_response(result):
+    """Build the quick-recommendation JSON payload (the fast path of
+    RoadmapRecommendationResponseSerializer, see roadmaps/responses.py)."""
+    return build_recommendation_response(result)
+
+
+def _persist_current_roadmap(request, request_data, response_data):
     """Save the just-generated roadmap as the user's "Current Roadmap".
 
     Runs AFTER `generate_recommendations()`'s always-rolled-back transaction
@@ -168,7 +218,7 @@ def _persist_current_roadmap(request, response_data):
         total_estimated_rewards=response_data['total_estimated_rewards'],
         calculation_data={
             'response': response_data,
-            'request': request.data,
+            'request': request_data,
             # Reuse the SAME timestamp shown in the live response (set
             # on response_data by the caller) rather than computing a
             # fresh one here — Phase E's calendar-month rendering needs
@@ -178,7 +228,40 @@ def _persist_current_roadmap(request, response_data):
     )
 
 
+def _finish_quick_rec(request, request_data, result, expense_recommendation):
+    """Serialize a quick-recommendation result and persist it as the
+    requester's Current Roadmap (unless the request opted out)."""
+    response_data = _build_quick_rec_response(result)
+    return _complete_quick_rec(request, request_data, response_data, expense_recommendation)
+
+
+def _complete_quick_rec(request, request_data, response_data, expense_recommendation):
+    """Add generated_at (and any expense result) to a serialized response,
+    then persist it. Shared by the plain, async and streaming endpoints."""
+    # The live POST response didn't carry generated_at before Phase
+    # E — only the GET current/shared endpoints did. Sequencing's
+    # calendar-month display ("Apply in ~4 months (Nov 2026)") needs
+    # a base date on every path, so set it here once and persist
+    # the SAME value (see _persist_current_roadmap).
+    response_data['generated_at'] = timezone.now().isoformat()
+
+    # Phase N: only present when the request posted an 'expense' —
+    # key stays ABSENT (not null) otherwise, so payloads without an
+    # expense stay byte-identical to before this feature existed.
+    if expense_recommendation is not None:
+        response_data['expense_recommendation'] = ExpenseRecommendationSerializer(
+            expense_recommendation).data
+
+    should_persist = request_data.get('persist', True) if isinstance(request_data, dict) else True
+    if should_persist:
+        _persist_current_roadmap(request, request_data, response_data)
+
+    return response_data
+
+
+@gzip_page
 @api_view(['POST'])
+@renderer_classes(COMPACT_RENDERER_CLASSES)
 def quick_recommendation_view(request):
     """Get quick recommendations without saving a roadmap"""
     # Anonymous users need a durable session BEFORE the generation transaction
@@ -195,26 +278,9 @@ def quick_recommendation_view(request):
 
     if serializer.is_valid():
         try:
-            recommendations = serializer.generate_recommendations()
-            response_data = _build_quick_rec_response(recommendations)
-            # The live POST response didn't carry generated_at before Phase
-            # E — only the GET current/shared endpoints did. Sequencing's
-            # calendar-month display ("Apply in ~4 months (Nov 2026)") needs
-            # a base date on every path, so set it here once and persist
-            # the SAME value (see _persist_current_roadmap).
-            response_data['generated_at'] = timezone.now().isoformat()
-
-            # Phase N: only present when the request posted an 'expense' —
-            # key stays ABSENT (not null) otherwise, so payloads without an
-            # expense stay byte-identical to before this feature existed.
-            if serializer.expense_recommendation is not None:
-                response_data['expense_recommendation'] = ExpenseRecommendationSerializer(
-                    serializer.expense_recommendation).data
-
-            should_persist = request.data.get('persist', True) if isinstance(request.data, dict) else True
-            if should_persist:
-                _persist_current_roadmap(request, response_data)
-
+            result = serializer.generate_recommendations()
+            response_data = _finish_quick_rec(
+                request, request.data, result, serializer.expense_recommendation)
             return Response(response_data)
 
         except Exception as e:
@@ -228,7 +294,261 @@ def quick_recommendation_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _sse_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DRFJSONEncoder)}\n\n'
+
+
+def _quick_rec_stream(request, request_data, serializer):
+    """The quick-recommendation response as Server-Sent Events.
+
+    The engine runs to completion first, in generate_recommendations()'s
+    rolled-back transaction, so no scratch write or lock is held while a
+    slow client reads. The events are then serialized from the result in
+    memory: `selection` (card set, headline values, total); one `card`
+    event per recommendation with its breakdown and redemption guidance;
+    `summary` (portfolio_summary, with bonus_capacity.timeline); then
+    `done` (generated_at, format_version). Concatenating the stages gives
+    exactly the plain endpoint's payload, which is what gets persisted. A
+    client that disconnects mid-stream still gets its Current Roadmap: the
+    finished result is persisted without sending the rest.
+    """
+    result = None
+    persisted = False
+    try:
+        result = serializer.generate_recommendations()
+        recommendations = result['recommendations']
+        total = sum(float(rec['estimated_rewards']) for rec in recommendations)
+        yield _sse_event('selection', {
+            'recommendations': [recommendation_headline(rec) for rec in recommendations],
+            'total_estimated_rewards': total,
+        })
+
+        guidance = redemption_guidance_by_card([rec['card'] for rec in recommendations])
+        items = []
+        for rec in recommendations:
+            item = recommendation_item(rec, guidance)
+            yield _sse_event('card', {'index': len(items), 'recommendation': item})
+            items.append(item)
+
+        summary = portfolio_summary(result['portfolio_summary'])
+        yield _sse_event('summary', {'portfolio_summary': summary})
+
+        response_data = {
+            'recommendations': items,
+            'total_estimated_rewards': total,
+            'portfolio_summary': summary,
+            'format_version': RESPONSE_FORMAT_VERSION,
+        }
+        response_data = _complete_quick_rec(
+            request, request_data, response_data, serializer.expense_recommendation)
+        persisted = True
+        done = {'generated_at': response_data['generated_at'],
+                'format_version': RESPONSE_FORMAT_VERSION}
+        if 'expense_recommendation' in response_data:
+            done['expense_recommendation'] = response_data['expense_recommendation']
+        yield _sse_event('done', done)
+    except GeneratorExit:
+        if result is not None and not persisted:
+            _persist_abandoned_stream(request, request_data, result, serializer.expense_recommendation)
+        raise
+    except Exception as e:
+        yield _sse_event('error', {'error': f'Failed to generate recommendations: {str(e)}'})
+
+
+def _persist_abandoned_stream(request, request_data, result, expense_recommendation):
+    """Persist the finished result of a stream nobody is reading any more,
+    so a disconnect doesn't lose the Current Roadmap. The engine is never
+    re-run for a client that has gone."""
+    try:
+        _finish_quick_rec(request, request_data, result, expense_recommendation)
+    except Exception:
+        logger.exception('Persisting an abandoned quick-recommendation stream failed')
+
+
+@api_view(['POST'])
+def quick_recommendation_stream_view(request):
+    """quick_recommendation_view, streamed in stages as Server-Sent Events
+    (see _quick_rec_stream). Validation errors are a plain 400 JSON body;
+    an engine failure is an `error` event, since the engine runs once the
+    response has started."""
+    if not request.user.is_authenticated and not request.session.session_key:
+        request.session.create()
+
+    serializer = GenerateRoadmapSerializer(
+        data=request.data,
+        context={'request': request}
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        _quick_rec_stream(request, request.data, serializer),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream into a single response.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Engine runs for the async endpoint. Bounded so a burst of distinct
+# requests queues here instead of taking every thread the server has.
+quick_rec_flights = SingleFlight(
+    max_workers=settings.QUICK_RECOMMENDATION_WORKERS,
+    thread_name_prefix='quick-rec')
+
+
+def _quick_rec_scope(request):
+    """Whose stored state, beyond the payload, the engine will read.
+
+    Signed-in users and anonymous sessions with a saved profile have
+    persisted credit preferences/cards that change the answer, so their
+    requests only coalesce with their own. A fresh anonymous session has
+    nothing stored, so identical payloads from any of them are one job.
+    """
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    session_key = request.session.session_key
+    if UserSpendingProfile.objects.filter(session_key=session_key).exists():
+        return f'session:{session_key}'
+    return 'anonymous'
+
+
+def _quick_rec_key(serializer, scope):
+    """Canonical hash of everything a quick-recommendation result depends on."""
+    canonical = json.dumps({
+        'data': serializer.validated_data,
+        # An explicit max_recommendations beats the strategy preset's,
+        # even when it equals the serializer default.
+        'explicit_max': 'max_recommendations' in serializer.initial_data,
+        'scope': scope,
+        'catalog': catalog_version().version,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _prepare_quick_rec(request, request_data):
+    if not request.user.is_authenticated and not request.session.session_key:
+        request.session.create()
+    serializer = GenerateRoadmapSerializer(data=request_data, context={'request': request})
+    if not serializer.is_valid():
+        return serializer, None, None
+    owner = f'user:{request.user.pk}' if request.user.is_authenticated \
+        else f'session:{request.session.session_key}'
+    return serializer, owner, _quick_rec_key(serializer, _quick_rec_scope(request))
+
+
+def _compute_quick_rec(serializer):
+    return serializer.generate_recommendations(), serializer.expense_recommendation
+
+
+@require_POST
+async def quick_recommendation_async_view(request):
+    """Async variant of quick_recommendation_view for bursty callers.
+
+    Same payload and response. The engine runs on the bounded
+    `quick_rec_flights` pool; concurrent identical requests share one run,
+    and a new request from the same session supersedes that session's
+    earlier one (which gets a 409 instead of a stale result).
+    """
+    try:
+        request_data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Request body must be JSON'}, status=400)
+
+    serializer, owner, key = await sync_to_async(_prepare_quick_rec)(request, request_data)
+    if key is None:
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        result, expense_recommendation = await quick_rec_flights.run(
+            key, lambda: _compute_quick_rec(serializer), owner=owner)
+        response_data = await sync_to_async(_finish_quick_rec)(
+            request, request_data, result, expense_recommendation)
+    except Superseded:
+        return JsonResponse(
+            {'error': 'Superseded by a newer request', 'superseded': True}, status=409)
+    except Exception as e:
+        return JsonResponse(
+            {'error': f'Failed to generate recommendations: {str(e)}'}, status=500)
+
+    return JsonResponse(response_data)
+
+
+@gzip_page
+@api_view(['POST'])
+@authentication_classes([PartnerAPIKeyAuthentication])
+@permission_classes([HasPartnerAPIKey])
+@renderer_classes(COMPACT_RENDERER_CLASSES)
+def partner_batch_view(request):
+    """Quick recommendations for a batch of profile documents (see
+    roadmaps/partner.py). Item errors are reported per item; only a
+    malformed batch is a 400."""
+    items = request.data.get('items') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return Response({'items': ['A non-empty list of profile documents is required.']},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > settings.PARTNER_BATCH_MAX_ITEMS:
+        return Response({'items': [f'At most {settings.PARTNER_BATCH_MAX_ITEMS} items per batch.']},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    results = evaluate_batch(items, request.auth)
+    return Response({
+        'results': results,
+        'errors': sum('error' in entry for entry in results),
+        'catalog_version': catalog_version().version,
+        'format_version': RESPONSE_FORMAT_VERSION,
+    })
+
+
+@api_view(['POST'])
+def what_if_view(request):
+    """Evaluate spending variations of a quick-recommendation payload.
+
+    Takes the quick-recommendation payload plus `variations` (see
+    WhatIfSerializer) and returns the chosen cards and net value for the
+    base spending and for every variant. Nothing is persisted.
+    """
+    # Same reason as quick_recommendation_view: the evaluation transaction
+    # is always rolled back, so the anon session must exist before it.
+    if not request.user.is_authenticated and not request.session.session_key:
+        request.session.create()
+
+    serializer = WhatIfSerializer(data=request.data, context={'request': request})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return Response(serializer.evaluate())
+    except Exception as e:
+        return Response(
+            {'error': f'Failed to evaluate variations: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+def expense_plan_view(request):
+    """Plan several upcoming one-off expenses across owned cards and new
+    applications (see PlanExpensesSerializer). Nothing is persisted."""
+    if not request.user.is_authenticated and not request.session.session_key:
+        request.session.create()
+
+    serializer = PlanExpensesSerializer(data=request.data, context={'request': request})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return Response(ExpensePlanSerializer(serializer.plan()).data)
+    except Exception as e:
+        return Response(
+            {'error': f'Failed to plan expenses: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@gzip_page
 @api_view(['GET'])
+@renderer_classes(COMPACT_RENDERER_CLASSES)
 def current_roadmap_view(request):
     """Return the user's most recently generated ("Current Roadmap"), if any.
 
@@ -296,7 +616,9 @@ def current_roadmap_share_view(request):
     return Response(_roadmap_share_response(roadmap))
 
 
+@gzip_page
 @api_view(['GET'])
+@renderer_classes(COMPACT_RENDERER_CLASSES)
 def shared_roadmap_data_view(request, share_uuid):
     """Return the stored recommendation payload for a public shared roadmap.
 
@@ -16,7 +16,8 @@ const source = fs.readFileSync(
 // The file also defines renderRoadmapResults(), which touches `document` —
 // harmless to load into the sandbox since we never call it here. utils.js
 // is loaded first since roadmap-results.js depends on its escapeHtml().
-const sandbox = {};
+// TextDecoder is a browser global the MessagePack decoder needs.
+const sandbox = { TextDecoder };
 vm.createContext(sandbox);
 vm.runInContext(utilsSource, sandbox);
 vm.runInContext(source, sandbox);
@@ -27,7 +28,7 @@ const { _roadmapTimingLabel, _roadmapFormatSigned, _roadmapBenefitsValue,
         _roadmapCategoryMatrix, _roadmapCategoryMatrixHtml,
         _roadmapValueOverTime, _roadmapValueOverTimeHtml,
         _roadmapRedemptionHtml, _roadmapExpenseLineText,
-        _roadmapExpensePanelHtml } = sandbox;
+        _roadmapExpensePanelHtml, _roadmapDecodeMsgpack } = sandbox;
 
 function test(name, fn) {
     try {
@@ -389,6 +390,25 @@ test('_roadmapExpensePanelHtml: no owned card omits the "already have" section',
     assert.ok(html.includes('No eligible new-card matches'));
 });
 
+test('_roadmapDecodeMsgpack: decodes a payload packed by cards/renderers.py', () => {
+    // packb({'recommendations': [{'card': {'id': 300, 'name': 'Café Card'},
+    //   'annual_fee': -95, 'value': 1234.5, 'ok': True, 'note': None}],
+    //   'format_version': 2, 'big': 70000, 'neg': -200})
+    const hex = '84af7265636f6d6d656e646174696f6e739185a46361726482a26964cd012ca46e616d65aa436166c3a92043617264aa616e6e75616c5f666565d0a1a576616c7565cb40934a0000000000a26f6bc3a46e6f7465c0ae666f726d61745f76657273696f6e02a3626967ce00011170a36e6567d1ff38';
+    const decoded = _roadmapDecodeMsgpack(Uint8Array.from(Buffer.from(hex, 'hex')));
+    assert.deepStrictEqual(JSON.parse(JSON.stringify(decoded)), {
+        recommendations: [{ card: { id: 300, name: 'Café Card' }, annual_fee: -95,
+                            value: 1234.5, ok: true, note: null }],
+        format_version: 2, big: 70000, neg: -200,
+    });
+});
+
+test('_roadmapDecodeMsgpack: arrays longer than the fixarray range', () => {
+    const hex = 'dc0014000102030405060708090a0b0c0d0e0f10111213';
+    const decoded = _roadmapDecodeMsgpack(Uint8Array.from(Buffer.from(hex, 'hex')));
+    assert.deepStrictEqual(Array.from(decoded), Array.from({ length: 20 }, (_, i) => i));
+});
+
 if (process.exitCode) {
     console.error('\nOne or more tests failed.');
 } else {
@@ -102,12 +102,38 @@
             localStorage.removeItem('userCards');
             localStorage.removeItem('userPreferences');
             localStorage.removeItem('userCardDetails');
+            clearWalletCaches();
 
             console.log('After clear - userCards:', localStorage.getItem('userCards'));
             console.log('After clear - userSpending:', localStorage.getItem('userSpending'));
             console.log('✅ All user data cleared from localStorage');
         }
 
+        // Wallet offline cache (templates/wallet_sw.js). Its page and data
+        // responses carry X-Wallet-Owner; with keepOwner, caches holding only
+        // that owner's responses are kept and any other wallet cache is
+        // deleted, so the wallet page can't open on someone else's cards.
+        async function clearWalletCaches(keepOwner) {
+            if (!('caches' in window)) return;
+            try {
+                const names = (await caches.keys()).filter((name) => name.startsWith('wallet-'));
+                await Promise.all(names.map(async (name) => {
+                    if (keepOwner) {
+                        const cache = await caches.open(name);
+                        const responses = await Promise.all(
+                            (await cache.keys()).map((request) => cache.match(request)));
+                        const owners = responses
+                            .map((response) => response && response.headers.get('X-Wallet-Owner'))
+                            .filter(Boolean);
+                        if (owners.every((owner) => owner === keepOwner)) return;
+                    }
+                    await caches.delete(name);
+                }));
+            } catch (error) {
+                console.error('Error clearing wallet caches:', error);
+            }
+        }
+
         // Handle data synchronization when user logs in
         async function handleLoginDataSync() {
             try {
@@ -1790,6 +1816,8 @@
         // Initialize user state when page loads
         document.addEventListener('DOMContentLoaded', function() {
             initUserState();
+            // This page came from the server, so its owner is the signed-in user.
+            clearWalletCaches(document.body.dataset.walletOwner);
 
             // Check for user state changes periodically
             setInterval(async () => {
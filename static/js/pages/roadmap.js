@@ -1026,7 +1026,7 @@ async function loadCurrentRoadmap() {
             setRoadmapViewMode('builder');
             return;
         }
-        const data = await response.json();
+        const data = await readRoadmapBody(response);
         const generatedAt = data.generated_at ? new Date(data.generated_at) : null;
         const banner = generatedAt
             ? `Generated on ${generatedAt.toLocaleDateString()} — inputs may have changed`
@@ -1177,29 +1177,20 @@ async function getRecommendations() {
             };
         }
 
-        const response = await fetch(`${API_BASE}/roadmaps/quick-recommendation/`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-CSRFToken': getCookie('csrftoken')
-            },
-            body: JSON.stringify(requestData)
-        });
-
-        const data = await response.json();
+        // Streamed: the card set renders as soon as the engine finishes,
+        // breakdowns and the summary fill in as they arrive.
+        const activePreset = strategyByKey(selectedStrategy);
+        const data = await streamRoadmapResults(
+            `${API_BASE}/roadmaps/quick-recommendation/stream/`, requestData, {
+                container: resultsDiv,
+                strategyLabel: activePreset ? activePreset.name : '',
+                poolLabel: activePreset ? activePreset.pool_label : ''
+            });
 
         if (data.error) {
             resultsDiv.innerHTML = `<div class="error">Error: ${data.error}</div>`;
             return;
         }
-
-        // Display recommendations
-        const activePreset = strategyByKey(selectedStrategy);
-        renderRoadmapResults(data, {
-            container: resultsDiv,
-            strategyLabel: activePreset ? activePreset.name : '',
-            poolLabel: activePreset ? activePreset.pool_label : ''
-        });
         // Settle into results mode — matches what a reload will show now
         // that this roadmap is persisted as the Current Roadmap.
         setRoadmapViewMode('results');
@@ -173,7 +173,7 @@ async function loadSharedCategoryOptimization(profileData) {
                     </div>
                     <div style="flex: 2; text-align: right;">
                         <span style="color: var(--accent); font-weight: 500; font-size: 14px;">
-                            ${rec.recommended_card} (${rec.reward_rate})
+                            ${rec.recommended_card ? `${rec.recommended_card} (${rec.reward_rate})` : 'No card earns rewards here'}
                         </span>
                     </div>
                 </div>
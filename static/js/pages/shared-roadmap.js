@@ -23,7 +23,7 @@ async function loadSharedRoadmap() {
         if (!response.ok) {
             throw new Error(`Failed to fetch roadmap: ${response.status}`);
         }
-        const data = await response.json();
+        const data = await readRoadmapBody(response);
 
         const generatedAt = data.generated_at ? new Date(data.generated_at) : null;
         renderRoadmapResults(data, {
@@ -873,6 +873,186 @@ function renderRoadmapResults(data, opts = {}) {
     }
 }
 
+// Roadmap reads (current/shared/list) also negotiate MessagePack
+// (`Accept: application/x-msgpack`, see cards/renderers.py). The pages ask
+// for JSON: gzipped, it is smaller on the wire than MessagePack over the
+// scenario corpus (`manage.py benchmark_response_formats`). readRoadmapBody()
+// decodes whichever of the two the server answered with.
+async function readRoadmapBody(response) {
+    const contentType = response.headers.get('Content-Type') || '';
+    if (contentType.startsWith('application/x-msgpack')) {
+        return _roadmapDecodeMsgpack(new Uint8Array(await response.arrayBuffer()));
+    }
+    return response.json();
+}
+
+// Minimal MessagePack decoder covering what cards/renderers.py emits
+// (nil/bool/int/float/str/bin/array/map; no ext types).
+function _roadmapDecodeMsgpack(bytes) {
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const text = new TextDecoder();
+    let pos = 0;
+
+    const str = (size) => {
+        const value = text.decode(bytes.subarray(pos, pos + size));
+        pos += size;
+        return value;
+    };
+    const bin = (size) => {
+        const value = bytes.slice(pos, pos + size);
+        pos += size;
+        return value;
+    };
+    const array = (size) => {
+        const value = new Array(size);
+        for (let i = 0; i < size; i++) {
+            value[i] = read();
+        }
+        return value;
+    };
+    const map = (size) => {
+        const value = {};
+        for (let i = 0; i < size; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    };
+    const take = (size, getter) => {
+        const value = getter(pos);
+        pos += size;
+        return value;
+    };
+
+    function read() {
+        const byte = bytes[pos++];
+        if (byte <= 0x7f) return byte;
+        if (byte <= 0x8f) return map(byte & 0x0f);
+        if (byte <= 0x9f) return array(byte & 0x0f);
+        if (byte <= 0xbf) return str(byte & 0x1f);
+        if (byte >= 0xe0) return byte - 0x100;
+        switch (byte) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return bin(take(1, p => view.getUint8(p)));
+            case 0xc5: return bin(take(2, p => view.getUint16(p)));
+            case 0xc6: return bin(take(4, p => view.getUint32(p)));
+            case 0xca: return take(4, p => view.getFloat32(p));
+            case 0xcb: return take(8, p => view.getFloat64(p));
+            case 0xcc: return take(1, p => view.getUint8(p));
+            case 0xcd: return take(2, p => view.getUint16(p));
+            case 0xce: return take(4, p => view.getUint32(p));
+            case 0xcf: return take(8, p => Number(view.getBigUint64(p)));
+            case 0xd0: return take(1, p => view.getInt8(p));
+            case 0xd1: return take(2, p => view.getInt16(p));
+            case 0xd2: return take(4, p => view.getInt32(p));
+            case 0xd3: return take(8, p => Number(view.getBigInt64(p)));
+            case 0xd9: return str(take(1, p => view.getUint8(p)));
+            case 0xda: return str(take(2, p => view.getUint16(p)));
+            case 0xdb: return str(take(4, p => view.getUint32(p)));
+            case 0xdc: return array(take(2, p => view.getUint16(p)));
+            case 0xdd: return array(take(4, p => view.getUint32(p)));
+            case 0xde: return map(take(2, p => view.getUint16(p)));
+            case 0xdf: return map(take(4, p => view.getUint32(p)));
+            default:
+                throw new Error(`Unsupported MessagePack type 0x${byte.toString(16)}`);
+        }
+    }
+
+    return read();
+}
+
+function _roadmapParseSseFrame(frame) {
+    let type = 'message';
+    const dataLines = [];
+    frame.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            type = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trimStart());
+        }
+    });
+    return { type, data: dataLines.length ? JSON.parse(dataLines.join('\n')) : null };
+}
+
+// Streamed variant of POST /quick-recommendation/ (stages documented on
+// roadmaps/views.py's _quick_rec_stream). Renders after each stage —
+// headline card set first, breakdowns as they arrive, then the summary —
+// and resolves to the same payload the plain endpoint returns, or to
+// {error} like it does on failure. Renders are batched per animation frame
+// so a long run of `card` events doesn't rebuild the DOM once per card.
+async function streamRoadmapResults(url, requestData, opts = {}) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'X-CSRFToken': getCookie('csrftoken')
+        },
+        body: JSON.stringify(requestData)
+    });
+
+    // Validation and engine errors come back as ordinary JSON bodies.
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!contentType.startsWith('text/event-stream') || !response.body) {
+        return response.json();
+    }
+
+    const data = { recommendations: [], portfolio_summary: {} };
+    let rendered = false;
+    let renderQueued = false;
+    const renderNow = () => {
+        renderQueued = false;
+        renderRoadmapResults(data, { ...opts, noScroll: rendered || opts.noScroll });
+        rendered = true;
+    };
+    const scheduleRender = () => {
+        if (renderQueued) {
+            return;
+        }
+        renderQueued = true;
+        (window.requestAnimationFrame || (fn => setTimeout(fn, 16)))(renderNow);
+    };
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const event = _roadmapParseSseFrame(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            switch (event.type) {
+                case 'selection':
+                    Object.assign(data, event.data);
+                    scheduleRender();
+                    break;
+                case 'card':
+                    data.recommendations[event.data.index] = event.data.recommendation;
+                    scheduleRender();
+                    break;
+                case 'summary':
+                    data.portfolio_summary = event.data.portfolio_summary;
+                    scheduleRender();
+                    break;
+                case 'done':
+                    Object.assign(data, event.data);
+                    renderNow();
+                    return data;
+                case 'error':
+                    return event.data;
+            }
+        }
+    }
+    return { error: 'The connection closed before the roadmap finished' };
+}
+
 if (typeof window !== 'undefined') {
     window.switchRoadmapTab = function(tabId) {
         if (renderRoadmapResults.state) {
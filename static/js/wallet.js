@@ -0,0 +1,117 @@
+// Wallet page: registers the offline service worker (templates/wallet_sw.js)
+// and re-renders the rows when it hands over a payload newer than the one
+// the page was rendered from, or reloads when it finds the page was for a
+// user who is no longer signed in. The markup mirrors templates/wallet.html.
+(function () {
+    const script = document.currentScript;
+    const container = document.getElementById('wallet-rows');
+    const banner = document.getElementById('wallet-quarter');
+    if (!container) return;
+
+    // Standalone page — utils.js isn't loaded here.
+    function escapeHtml(str) {
+        if (str === null || str === undefined) return '';
+        return String(str)
+            .replace(/&/g, '&amp;')
+            .replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;')
+            .replace(/"/g, '&quot;')
+            .replace(/'/g, '&#39;');
+    }
+
+    function localIsoDate(d) {
+        const pad = (n) => String(n).padStart(2, '0');
+        return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+    }
+
+    function shortDate(iso) {
+        const [y, m, d] = iso.split('-').map(Number);
+        return new Date(y, m - 1, d).toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
+    }
+
+    function formatRate(entry) {
+        const rate = Number.isInteger(entry.rate) ? entry.rate : entry.rate.toFixed(1);
+        return `${rate}${entry.unit}`;
+    }
+
+    function formatCap(amount) {
+        return `$${Math.round(amount).toLocaleString('en-US', { useGrouping: false })}`;
+    }
+
+    function rowHtml(row) {
+        let note = '';
+        if (row.is_rotating) {
+            const cap = row.max_annual_spend ? ` &middot; ${formatCap(row.max_annual_spend)} cap` : '';
+            note = `<span class="rotating-note">until ${shortDate(row.end_date)}${cap}</span>`;
+        } else if (row.max_annual_spend) {
+            note = `<span class="rotating-note">${formatCap(row.max_annual_spend)}/yr cap</span>`;
+        }
+        return `
+            <div class="row">
+                <div class="icon"><i class="${escapeHtml(row.icon || 'fas fa-circle')}"></i></div>
+                <div class="info">
+                    <div class="category">${escapeHtml(row.category)}</div>
+                    <div class="card-name">${escapeHtml(row.card_label)}</div>
+                    ${note}
+                </div>
+                <div class="rate">${formatRate(row)}</div>
+            </div>`;
+    }
+
+    function render(payload) {
+        if (payload.open_card_count === 0) return;  // server-rendered empty state stands
+
+        // Offline past the payload's expiry: drop rotating rows that have
+        // ended rather than show a 5% category that's no longer live.
+        const today = localIsoDate(new Date());
+        const rows = payload.rows.filter((row) => !row.end_date || row.end_date >= today);
+
+        let html = rows.length ? rows.map(rowHtml).join('') : `
+            <div class="empty">
+                <strong>No bonus categories found for your cards.</strong>
+                <p>Your cards may be missing reward category data.</p>
+            </div>`;
+        if (payload.base) {
+            html += `
+                <div class="section-label">Everything else</div>
+                <div class="row base">
+                    <div class="icon"><i class="fas fa-asterisk"></i></div>
+                    <div class="info">
+                        <div class="category">All other purchases</div>
+                        <div class="card-name">${escapeHtml(payload.base.card_label)}</div>
+                    </div>
+                    <div class="rate">${formatRate(payload.base)}</div>
+                </div>`;
+        }
+        container.innerHTML = html;
+        container.dataset.version = payload.version;
+        if (banner) {
+            banner.innerHTML = `Q${payload.quarter} ${payload.year} &middot; rotating categories end ${shortDate(payload.quarter_end)}`;
+        }
+    }
+
+    function accept(payload) {
+        if (payload && payload.version && payload.version !== container.dataset.version) {
+            render(payload);
+        }
+    }
+
+    if ('serviceWorker' in navigator && script) {
+        navigator.serviceWorker.addEventListener('message', (event) => {
+            if (!event.data) return;
+            if (event.data.type === 'wallet-data') accept(event.data.payload);
+            // Signed out, or someone else signed in: this page is stale.
+            if (event.data.type === 'wallet-owner-changed') window.location.reload();
+        });
+        navigator.serviceWorker.register(script.dataset.swUrl, { scope: script.dataset.swScope })
+            .catch(() => { /* no offline mode; the server-rendered page still works */ });
+    }
+
+    // A page served from the worker's cache may predate the cached payload;
+    // this request is answered from cache too and triggers the background
+    // revalidation that posts 'wallet-data' if anything changed.
+    fetch(container.dataset.url, { credentials: 'same-origin' })
+        .then((response) => (response.ok ? response.json() : null))
+        .then(accept)
+        .catch(() => { /* offline with nothing cached — keep what's rendered */ });
+})();
@@ -0,0 +1,123 @@
+{% load static %}// Wallet service worker, served from {% url 'wallet_sw' %} by
+// cards/wallet.py so its scope covers the wallet page.
+//
+// The page and its JSON payload are stale-while-revalidate: an in-store
+// open is answered from cache immediately and refreshed in the background.
+// When the refreshed payload's version differs from the cached one, open
+// wallet pages are sent the new payload and re-render (static/js/wallet.js).
+//
+// Page and payload responses carry X-Wallet-Owner (cards/wallet.py). A
+// cached copy is only served while it has one, and base.js deletes this
+// cache whenever a page renders for a different user or nobody, so a
+// logout or change of user never opens on the previous user's wallet. If
+// revalidation still finds the user signed out or changed (a session that
+// expired with no page seen since), the cached entries are dropped and
+// open wallet pages reload from the network.
+
+const CACHE_NAME = 'wallet-v2';
+const OWNER_HEADER = 'X-Wallet-Owner';
+const PAGE_URL = '{% url "wallet" %}';
+const DATA_URL = '{% url "cards:wallet-data" %}';
+const STATIC_URLS = [
+    '{% static "css/pages/wallet.css" %}',
+    '{% static "js/wallet.js" %}',
+    '{% static "icons/wallet.svg" %}',
+    '{% static "icons/wallet-180.png" %}',
+    '{% static "manifest.json" %}',
+];
+
+self.addEventListener('install', (event) => {
+    // cache.add per URL rather than addAll: one failed asset shouldn't
+    // leave the wallet with no offline copy at all.
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then((cache) => Promise.all(
+                [PAGE_URL, DATA_URL, ...STATIC_URLS].map((url) => cache.add(url).catch(() => null))
+            ))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then((keys) => Promise.all(
+                keys.filter((key) => key.startsWith('wallet-') && key !== CACHE_NAME)
+                    .map((key) => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+async function payloadVersion(response) {
+    if (!response) return null;
+    try {
+        return (await response.clone().json()).version;
+    } catch (e) {
+        return null;
+    }
+}
+
+async function broadcastPayload(response) {
+    const payload = await response.clone().json();
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach((client) => client.postMessage({ type: 'wallet-data', payload }));
+}
+
+async function dropUserEntries(cache) {
+    await Promise.all([cache.delete(PAGE_URL), cache.delete(DATA_URL)]);
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach((client) => client.postMessage({ type: 'wallet-owner-changed' }));
+}
+
+async function revalidate(cache, key, request, cached) {
+    let response;
+    try {
+        response = await fetch(request);
+    } catch (e) {
+        return null;  // offline: the cached copy stands
+    }
+    if (response.status === 401 || response.redirected || response.type === 'opaqueredirect') {
+        // Logged out — don't keep serving someone's wallet from cache.
+        if (cached) await dropUserEntries(cache);
+        return response;
+    }
+    if (response.ok) {
+        if (cached && cached.headers.get(OWNER_HEADER) !== response.headers.get(OWNER_HEADER)) {
+            // Someone else is signed in: the other cached entry is theirs too.
+            await dropUserEntries(cache);
+        } else if (key === DATA_URL) {
+            const [before, after] = await Promise.all([payloadVersion(cached), payloadVersion(response)]);
+            if (before !== after) await broadcastPayload(response);
+        }
+        await cache.put(key, response.clone());
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event, key) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(key);
+    const network = revalidate(cache, key, event.request, cached);
+    if (cached && cached.headers.get(OWNER_HEADER)) {
+        event.waitUntil(network);
+        return cached;
+    }
+    // Nothing cached, or a copy whose owner can't be checked: network first.
+    return (await network) || Response.error();
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (url.pathname === PAGE_URL || url.pathname === DATA_URL) {
+        event.respondWith(staleWhileRevalidate(event, url.pathname));
+    } else if (STATIC_URLS.includes(url.pathname)) {
+        event.respondWith(
+            caches.match(url.pathname).then((cached) => cached || fetch(request))
+        );
+    }
+});
@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db import transaction
 from django.utils import timezone
 from .models import UserProfile, UserPreferences
+from cards.caching import invalidate_shared_profile
 from cards.models import UserCard, UserSpendingProfile, SpendingAmount
 from cards.serializers import CreditCardListSerializer, SpendingCategorySerializer
+from cards.upsert import bulk_upsert
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -59,72 +61,84 @@ class UserDataSerializer(serializers.Serializer):
         # Get or create user spending profile
         profile, _ = UserSpendingProfile.objects.get_or_create(user=user)
         primary = profile.primary_entity()
-        
-        # Update spending
-        from cards.models import SpendingCategory
-        for category_slug, amount in spending_data.items():
-            try:
-                category = SpendingCategory.objects.get(slug=category_slug)
-                SpendingAmount.objects.update_or_create(
-                    profile=profile,
-                    category=category,
-                    defaults={'monthly_amount': amount}
-                )
-            except SpendingCategory.DoesNotExist:
-                continue
-        
-        # Update cards
-        from cards.models import CreditCard
-        # This flat list is the browse page's view of the PRIMARY's OPEN
-        # cards, and it is applied in both directions: cards absent from it
-        # are closed, cards present in it are opened. Only rows owned by the
-        # primary entity (or legacy NULL-owner rows, which read as the
+
+        # Everything the sync reads, in three queries: the posted categories,
+        # the posted cards that exist, and every UserCard in the household.
+        from cards.models import CreditCard, SpendingCategory
+        categories = SpendingCategory.objects.filter(slug__in=list(spending_data))
+        card_ids = set(CreditCard.objects.filter(id__in=cards_data).values_list('id', flat=True))
+        household_rows = list(UserCard.objects.filter(user=user).only(
+            'id', 'card_id', 'owner_id', 'closed_date'))
+
+        # Cards: this flat list is the browse page's view of the PRIMARY's
+        # OPEN cards, and it is applied in both directions: cards absent from
+        # it are closed, cards present in it are opened. Only rows owned by
+        # the primary entity (or legacy NULL-owner rows, which read as the
         # primary) are touched either way, so other household members' cards
         # (Phase K) survive untouched.
-        primary_rows = UserCard.objects.filter(user=user).filter(
-            Q(owner__isnull=True) | Q(owner=primary)
-        )
+        posted = set(cards_data)
+        rows_by_card = {}
+        for row in household_rows:
+            rows_by_card.setdefault(row.card_id, []).append(row)
+
+        def own(row):
+            return row.owner_id is None or row.owner_id == primary.id
 
         # Close cards not in the new list. Never delete: eligibility rules
         # (5/24, Amex lifetime, etc.) read full history including closed
         # cards, so destroying a row silently hands back approval
         # eligibility the user should not have.
-        primary_rows.filter(closed_date__isnull=True).exclude(
-            card_id__in=cards_data
-        ).update(closed_date=timezone.now().date())
+        to_close = [row.id for row in household_rows
+                    if own(row) and row.closed_date is None and row.card_id not in posted]
 
         # Add cards in the list, reopening the primary's own soft-closed row
         # rather than spawning a second one.
-        for card_id in cards_data:
-            try:
-                card = CreditCard.objects.get(id=card_id)
-            except CreditCard.DoesNotExist:
+        to_reopen = []
+        to_create = []
+        for card_id in dict.fromkeys(cards_data):
+            if card_id not in card_ids:
                 continue
-            household_rows = UserCard.objects.filter(user=user, card=card)
+            rows = rows_by_card.get(card_id, [])
             # Already open for SOMEONE in the household: the id's presence in
             # the list is fully explained, so there is nothing to do. This is
             # the guard that keeps the reopen honest — to_representation()
             # builds the list household-wide and unscoped by owner, so Sam
             # holding a card open is enough to put its id here, and that must
             # not resurrect a row the primary deliberately closed.
-            if household_rows.filter(closed_date__isnull=True).exists():
+            if any(row.closed_date is None for row in rows):
                 continue
-            own_closed = household_rows.filter(
-                Q(owner__isnull=True) | Q(owner=primary),
-                closed_date__isnull=False)
-            if own_closed.exists():
-                own_closed.update(closed_date=None)
+            own_closed = [row.id for row in rows if own(row)]
+            if own_closed:
+                to_reopen.extend(own_closed)
                 continue
             # Only another entity's closed row: not ours to reopen, and
             # spawning a parallel primary-owned row would double-count the
             # card in eligibility math.
-            if household_rows.exists():
+            if rows:
                 continue
-            UserCard.objects.create(
-                user=user, card=card, owner=primary,
+            to_create.append(UserCard(
+                user=user, card_id=card_id, owner=primary,
                 opened_date='2023-01-01'  # Default date
+            ))
+
+        # Apply the diff with one statement per kind. Bulk writes skip the
+        # model signals, so the shared-profile cache is retired by hand.
+        with transaction.atomic():
+            bulk_upsert(
+                SpendingAmount,
+                [SpendingAmount(profile=profile, category=category,
+                                monthly_amount=spending_data[category.slug])
+                 for category in categories],
+                unique_fields=['profile', 'category'],
+                update_fields=['monthly_amount'],
             )
-        
+            if to_close:
+                UserCard.objects.filter(id__in=to_close).update(closed_date=timezone.now().date())
+            if to_reopen:
+                UserCard.objects.filter(id__in=to_reopen).update(closed_date=None)
+            UserCard.objects.bulk_create(to_create)
+        invalidate_shared_profile(profile_id=profile.id)
+
         # Update preferences
         if preferences_data:
             prefs, _ = UserPreferences.objects.get_or_create(user=user)
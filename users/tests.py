@@ -316,4 +316,77 @@ class HouseholdBulkSaveOwnerScopingTests(TestCase):
         self.assertEqual(response.status_code, 200)
 
         user_card = UserCard.objects.get(user=self.user, card=self.other_card)
-        self.assertEqual(user_card.owner, self.primary)
\ No newline at end of file
+        self.assertEqual(user_card.owner, self.primary)
+
+
+class BulkSaveQueryCountTests(TestCase):
+    """The bulk /api/users/data/ save is a set-based sync: its query count
+    must not grow with the number of categories or cards posted."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk', password='x')
+        cashback = RewardType.objects.create(name='Cashback', slug='cashback')
+        issuer = Issuer.objects.create(name='Generic Bank', slug='generic-bank')
+        self.categories = [
+            SpendingCategory.objects.create(name=f'Category {i}', slug=f'category-{i}')
+            for i in range(20)]
+        self.cards = [
+            CreditCard.objects.create(
+                name=f'Card {i}', slug=f'card-{i}', issuer=issuer,
+                signup_bonus_type=cashback, primary_reward_type=cashback)
+            for i in range(15)]
+        self.client.force_login(self.user)
+
+    def post(self, spending, cards):
+        return self.client.post(
+            '/api/users/data/',
+            {'spending': spending, 'cards': cards, 'preferences': {}},
+            content_type='application/json')
+
+    def save_queries(self, spending, cards):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(spending, cards)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_scale_with_payload(self):
+        small = self.save_queries(
+            {'category-0': '10.00'}, [self.cards[0].id])
+        large = self.save_queries(
+            {c.slug: '25.00' for c in self.categories},
+            [card.id for card in self.cards])
+        self.assertLessEqual(large, small + 2)
+        self.assertLess(large, 30)
+
+    def test_spending_is_upserted_and_unknown_slugs_ignored(self):
+        from cards.models import SpendingAmount
+
+        self.post({'category-0': '10.00', 'category-1': '20.00'}, [])
+        self.post({'category-0': '15.00', 'not-a-category': '5.00'}, [])
+
+        profile = UserSpendingProfile.objects.get(user=self.user)
+        amounts = dict(SpendingAmount.objects.filter(profile=profile)
+                       .values_list('category__slug', 'monthly_amount'))
+        self.assertEqual(amounts, {'category-0': Decimal('15.00'), 'category-1': Decimal('20.00')})
+
+    def test_spending_upsert_without_a_conflict_target(self):
+        """MySQL's upsert names no conflict target (see cards/upsert.py)."""
+        from cards.models import SpendingAmount
+        from cards.test_upsert import targetless_upserts
+
+        with targetless_upserts():
+            self.assertEqual(self.post({'category-0': '10.00'}, []).status_code, 200)
+            self.assertEqual(self.post({'category-0': '15.00'}, []).status_code, 200)
+        self.assertEqual(
+            list(SpendingAmount.objects.filter(profile__user=self.user)
+                 .values_list('monthly_amount', flat=True)),
+            [Decimal('15.00')])
+
+    def test_duplicate_card_ids_create_one_row(self):
+        self.post({}, [self.cards[0].id, self.cards[0].id, 999999])
+        self.assertEqual(
+            UserCard.objects.filter(user=self.user, card=self.cards[0]).count(), 1)
+        self.assertEqual(UserCard.objects.filter(user=self.user).count(), 1)